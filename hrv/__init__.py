@@ -19,5 +19,6 @@
 
 import hrv.classical as classical
 import hrv.utils as utils
+from hrv.planner import compute
 
 __version__ = '0.2.10'
@@ -0,0 +1,5 @@
+import sys
+
+from hrv.cli import main
+
+sys.exit(main())
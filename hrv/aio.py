@@ -0,0 +1,158 @@
+"""
+Asynchronous analysis of live RRi streams.
+
+`windowed_metrics` consumes an async iterator of beats, e.g. received from a
+device connection, and yields the indices of running windows. Filtering and
+the time domain and non-linear indices are cheap and run in the event loop,
+while the frequency domain analysis (interpolation and PSD estimation) runs
+in an executor, so many streams can be analysed concurrently without
+blocking the event loop.
+"""
+
+import asyncio
+from collections import OrderedDict
+from functools import partial
+
+import numpy as np
+
+from hrv.pipeline import _step
+from hrv.planner import FREQUENCY_DOMAIN, _expand, compute
+from hrv.rri import RRi
+from hrv.streaming import QuotientFilter, ThresholdFilter, Windows, _beats
+
+__all__ = ["windowed_metrics"]
+
+STREAMING_FILTERS = OrderedDict(
+    [("quotient", QuotientFilter), ("threshold", ThresholdFilter)]
+)
+
+
+async def windowed_metrics(
+    beats,
+    window=300.0,
+    step=30.0,
+    filters=(),
+    indices=("time", "non_linear"),
+    executor=None,
+    **frequency_kwargs
+):
+    """
+    Yield the indices of running windows of a live RRi series.
+
+    Parameters
+    ----------
+    beats : async iterable
+        RRi values in milliseconds, one value or a sequence of values per
+        item. The time of the beats is the cumulative sum of the values,
+        starting at zero
+    window : float, optional
+        window size in seconds. Defaults to 300
+    step : float, optional
+        step in seconds between the beginning of two consecutive windows.
+        Defaults to 30
+    filters : list, optional
+        streaming filters applied to the beats, in the declared order:
+        'quotient' and 'threshold', optionally with keyword arguments, e.g.
+        ('threshold', {'threshold': 'strong'}). See `hrv.streaming`.
+        Defaults to ()
+    indices : list, optional
+        indices or groups of indices calculated for each window. See
+        `hrv.compute`. Defaults to ('time', 'non_linear')
+    executor : concurrent.futures.Executor, optional
+        executor running the frequency domain analysis. Defaults to the
+        default executor of the event loop
+    frequency_kwargs : dict, optional
+        keyword arguments of the frequency domain analysis. See `hrv.compute`
+
+    Yields
+    ------
+    results : OrderedDict
+        'start' and 'end' of the window in seconds, number of beats
+        ('n_beats') and the requested indices, for each complete window with
+        at least 3 beats. If the analysis of a window fails the indices are
+        replaced by the error message ('error')
+
+    Examples
+    --------
+    >>> from hrv.aio import windowed_metrics
+    >>> async def handle_device(connection):
+    ...     async for metrics in windowed_metrics(
+    ...         connection.rri_values(),
+    ...         window=300,
+    ...         step=30,
+    ...         filters=["quotient"],
+    ...         indices=["rmssd", "sd1", "lf_hf"],
+    ...     ):
+    ...         await publish(connection.device_id, metrics)
+    """
+    if not 0 < step <= window:
+        raise ValueError("`step` must be positive and not bigger than `window`")
+
+    indices = _expand(indices)
+    spectral = [index for index in indices if index in FREQUENCY_DOMAIN]
+    cheap = [index for index in indices if index not in FREQUENCY_DOMAIN]
+    stream_filters = [
+        STREAMING_FILTERS[name](**kwargs)
+        for name, kwargs in (_step(declared, STREAMING_FILTERS) for declared in filters)
+    ]
+    analyse = partial(
+        _analyse_window,
+        asyncio.get_running_loop(),
+        executor,
+        cheap,
+        spectral,
+        frequency_kwargs,
+    )
+
+    windows = Windows(window, step)
+    last_time = None
+    async for item in beats:
+        values, times, last_time = _beats(item, None, last_time)
+        for stream_filter in stream_filters:
+            values, times = stream_filter.update(values, times)
+        for window_bounds in _add_beats(windows, values, times):
+            results = await analyse(*window_bounds)
+            if results is not None:
+                yield results
+
+    # Beats held by the filters at the end of the stream
+    values, times = np.array([]), np.array([])
+    for stream_filter in stream_filters:
+        if len(values):
+            values, times = stream_filter.update(values, times)
+        flushed_values, flushed_times = stream_filter.flush()
+        values = np.concatenate([values, flushed_values])
+        times = np.concatenate([times, flushed_times])
+    for window_bounds in _add_beats(windows, values, times):
+        results = await analyse(*window_bounds)
+        if results is not None:
+            yield results
+
+
+def _add_beats(windows, values, times):
+    for value, time in zip(values, times):
+        for window_bounds in windows.add(time, value):
+            yield window_bounds
+
+
+async def _analyse_window(loop, executor, cheap, spectral, kwargs, start, end, beats):
+    # time_domain needs at least 3 beats to calculate SDSD
+    if len(beats) < 3:
+        return None
+
+    times, values = zip(*beats)
+    results = OrderedDict([("start", start), ("end", end), ("n_beats", len(values))])
+    try:
+        rri = RRi(values, times)
+        if cheap:
+            results.update(compute(rri, cheap))
+        if spectral:
+            results.update(
+                await loop.run_in_executor(
+                    executor, partial(compute, rri, spectral, **kwargs)
+                )
+            )
+    except Exception as error:
+        results["error"] = str(error)
+
+    return results
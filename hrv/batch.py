@@ -0,0 +1,240 @@
+"""
+Incremental analysis of cohorts of RRi files.
+
+The indices of every file are kept in a JSON manifest together with the
+content hash of the file and the configuration of the analysis. Running the
+same analysis again only analyses the files that are new or whose content
+changed, and changing the configuration analyses every file again. The
+manifest is written periodically while the files are analysed, so an
+interrupted run resumes from its last checkpoint.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from hrv import __version__
+from hrv.io import list_files
+from hrv.pipeline import analyse_file
+
+__all__ = ["run_incremental"]
+
+MANIFEST_VERSION = 1
+
+
+def run_incremental(source, pipeline, manifest, n_jobs=None, checkpoint_every=10):
+    """
+    Analyse the RRi files of a cohort with a `Pipeline`, reusing the results
+    stored in the manifest of previous runs for the files that did not
+    change.
+
+    A file is unchanged if its size and modification time are the same as in
+    the manifest or, otherwise, if the SHA-256 hash of its content is the
+    same. Files that raised an error are analysed again in the next run.
+
+    Parameters
+    ----------
+    source : str or list
+        path to a directory (searched recursively), to a zip archive, a glob
+        pattern or a list of paths to RRi files. See `hrv.io.read_many`
+    pipeline : hrv.pipeline.Pipeline
+        analysis applied to each file. Its representation is stored in the
+        manifest as the configuration of the analysis
+    manifest : str
+        path to the JSON manifest. It is created if it does not exist
+    n_jobs : int, optional
+        number of worker processes. If None or 1, the files are analysed
+        serially. Defaults to None
+    checkpoint_every : int, optional
+        number of analysed files between writes of the manifest.
+        Defaults to 10
+
+    Returns
+    -------
+    results : OrderedDict
+        indices of each successfully analysed file, indexed by file name in
+        sorted order
+    errors : OrderedDict
+        exceptions raised while analysing the remaining files
+    computed : list
+        names of the files analysed in this run, the other results were
+        read from the manifest
+
+    Examples
+    --------
+    >>> from hrv.batch import run_incremental
+    >>> from hrv.pipeline import Pipeline
+    >>> pipeline = Pipeline(filters=["quotient"], detrend="polynomial")
+    >>> results, errors, computed = run_incremental(
+    ...     "/path/to/cohort/", pipeline, "/path/to/manifest.json", n_jobs=4
+    ... )
+    >>> computed  # only the new or changed files
+    ['subject_42.hrm']
+    """
+    config = _config(pipeline)
+    previous = _load_manifest(manifest)
+    if previous["config"] != config:
+        previous["files"] = {}
+
+    files = OrderedDict()
+    pending = []
+    for name, pathname, member in _cohort_files(source):
+        entry = _reusable_entry(previous["files"].get(name), pathname, member)
+        if entry is None:
+            pending.append((name, pathname, member))
+        else:
+            files[name] = entry
+
+    state = {"version": MANIFEST_VERSION, "config": config, "files": files}
+    errors = OrderedDict()
+    computed = []
+    analysed = _analyse_pending(pending, pipeline, n_jobs)
+    try:
+        for count, (name, entry, error) in enumerate(analysed, 1):
+            computed.append(name)
+            if error is not None:
+                errors[name] = error
+            else:
+                files[name] = entry
+            if count % checkpoint_every == 0:
+                _write_manifest(manifest, state)
+    finally:
+        # Also reached when interrupted, so the next run resumes from here.
+        # Closing the analysis cancels the files not started yet
+        analysed.close()
+        _write_manifest(manifest, state)
+
+    results = OrderedDict((name, files[name]["results"]) for name in sorted(files))
+    errors = OrderedDict((name, errors[name]) for name in sorted(errors))
+    return results, errors, sorted(computed)
+
+
+def _config(pipeline):
+    return {"hrv": __version__, "pipeline": repr(pipeline)}
+
+
+def _cohort_files(source):
+    if not isinstance(source, str):
+        # Files given explicitly are always analysed, unsupported ones
+        # are reported as errors
+        for pathname in source:
+            yield pathname, pathname, None
+        return
+
+    for name, pathname, member in list_files(source):
+        yield name, pathname, member
+
+
+def _reusable_entry(entry, pathname, member):
+    if entry is None:
+        return None
+
+    try:
+        signature = _signature(pathname, member)
+        if entry["signature"] == signature:
+            return entry
+        digest = _hash_file(pathname, member)
+    except (OSError, KeyError):
+        # Reported as an error by the analysis
+        return None
+
+    if entry["sha256"] != digest:
+        return None
+
+    return dict(entry, signature=signature)
+
+
+def _signature(pathname, member):
+    # Cheap identity of the file, checked before hashing its content
+    if member is not None:
+        with zipfile.ZipFile(pathname) as archive:
+            info = archive.getinfo(member)
+        return [info.file_size, info.CRC]
+
+    stat = os.stat(pathname)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _hash_file(pathname, member, chunk_size=2 ** 20):
+    digest = hashlib.sha256()
+    if member is not None:
+        with zipfile.ZipFile(pathname) as archive:
+            with archive.open(member) as member_file:
+                for chunk in iter(lambda: member_file.read(chunk_size), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    with open(pathname, "rb") as rri_file:
+        for chunk in iter(lambda: rri_file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _analyse_pending(pending, pipeline, n_jobs):
+    tasks = (task + (pipeline,) for task in pending)
+    if n_jobs is None or n_jobs <= 1:
+        for task in tasks:
+            yield _analyse(task)
+        return
+
+    # Only a few files per worker are submitted at a time, so an interrupted
+    # run stops after the files being analysed instead of the whole cohort
+    executor = ProcessPoolExecutor(max_workers=n_jobs)
+    running = {executor.submit(_analyse, task) for task in islice(tasks, 2 * n_jobs)}
+    try:
+        while running:
+            # Completion order, so every finished file reaches the checkpoints
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                for task in islice(tasks, 1):
+                    running.add(executor.submit(_analyse, task))
+    finally:
+        if sys.version_info >= (3, 9):
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            # shutdown(wait=False) breaks the pool of Python 3.8 while files
+            # are running, so only the files already started are waited for
+            for future in running:
+                future.cancel()
+            executor.shutdown()
+
+
+def _analyse(task):
+    name, pathname, member, pipeline = task
+    try:
+        # Signature and hash are taken before reading, so a file modified
+        # during the analysis is analysed again in the next run
+        signature = _signature(pathname, member)
+        digest = _hash_file(pathname, member)
+        results = analyse_file(pipeline, pathname, member)
+    except Exception as error:
+        return name, None, error
+
+    entry = {"signature": signature, "sha256": digest, "results": results}
+    return name, entry, None
+
+
+def _load_manifest(manifest):
+    try:
+        with open(manifest) as manifest_file:
+            state = json.load(manifest_file, object_pairs_hook=OrderedDict)
+    except FileNotFoundError:
+        state = {}
+
+    if state.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "config": None, "files": {}}
+    return state
+
+
+def _write_manifest(manifest, state):
+    # Replaced atomically, a crash while writing keeps the last checkpoint
+    temp_manifest = manifest + ".tmp"
+    with open(temp_manifest, "w") as manifest_file:
+        json.dump(state, manifest_file, indent=1)
+    os.replace(temp_manifest, manifest)
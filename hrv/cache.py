@@ -0,0 +1,351 @@
+"""
+On-disk cache of analysis results.
+
+The cache is opt-in: analysis functions are wrapped with `ResultCache.cached`
+and the wrapped functions look up their results on disk before calculating
+them. Entries are addressed by a hash of the function code, of the RRi values
+and time and of every argument, so any change in the data or in the
+parameters is a new entry. When the cache grows beyond its size limit the
+least recently used entries are removed.
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import types
+from functools import partial, wraps
+from numbers import Number
+
+import numpy as np
+
+from hrv import __version__
+from hrv.rri import RRi
+
+__all__ = ["ResultCache"]
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "hrv")
+_SUFFIX = ".pkl"
+
+
+class ResultCache:
+    """A content-addressed cache of analysis results stored on disk.
+
+    Parameters
+    ----------
+    directory : str, optional
+        directory where the results are stored. Defaults to ~/.cache/hrv
+    max_size : int, optional
+        maximum size of the cache in bytes. When exceeded, the least recently
+        used results are removed. Defaults to 1 GiB
+
+    Examples
+    --------
+    >>> from hrv.cache import ResultCache
+    >>> from hrv.classical import frequency_domain
+    >>> from hrv.sampledata import load_rest_rri
+    >>> cache = ResultCache("/tmp/hrv-cache", max_size=100 * 2 ** 20)
+    >>> cached_frequency_domain = cache.cached(frequency_domain)
+    >>> cached_frequency_domain(load_rest_rri(), method="ar")  # calculated
+    >>> cached_frequency_domain(load_rest_rri(), method="ar")  # read from disk
+    >>> cache.hits, cache.misses
+    (1, 1)
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_size=2 ** 30):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        # Updated on every write, the directory is only scanned again when
+        # the limit is exceeded
+        self._size = self.size
+
+    def cached(self, func):
+        """
+        Wrap an analysis function, such as `time_domain` or
+        `polynomial_detrend`, so its results are read from the cache when
+        available and stored in the cache otherwise
+
+        The key of each call is a hash of `func` (its code, defaults and
+        closure when wrapped) and of its arguments bound to its signature,
+        so positional and keyword arguments and omitted defaults address the
+        same entry. Arguments and closures must be RRi series, arrays,
+        numbers, strings, functions or containers of them, other types
+        raise a TypeError
+
+        Parameters
+        ----------
+        func : callable
+            function receiving an RRi series as first argument
+        """
+        # The closure of `func` is hashed once, so functions accumulating
+        # state in it keep their key
+        func_digest = _digest(func)
+
+        @wraps(func)
+        def _cached(*args, **kwargs):
+            key = _hash_call(func, args, kwargs, func_digest)
+            found, result = self.get(key)
+            if not found:
+                result = func(*args, **kwargs)
+                self.set(key, result)
+            return result
+
+        return _cached
+
+    def get(self, key):
+        """
+        Return a tuple (found, result) with the result stored under `key`.
+        Reading an entry marks it as recently used
+        """
+        pathname = self._path(key)
+        try:
+            with open(pathname, "rb") as cache_file:
+                result = pickle.load(cache_file)
+        except OSError:
+            self.misses += 1
+            return False, None
+        except Exception:
+            # Corrupted entries, or results of classes that were changed or
+            # removed, are calculated again
+            self._remove(pathname)
+            self.misses += 1
+            return False, None
+
+        os.utime(pathname)
+        self.hits += 1
+        return True, result
+
+    def set(self, key, result):
+        """Store `result` under `key` and evict old entries if needed"""
+        # Written to a temporary file first, so concurrent readers never see
+        # a partial entry
+        pathname = self._path(key)
+        fd, temp_pathname = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as cache_file:
+                pickle.dump(result, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(temp_pathname)
+            self._size -= _file_size(pathname)
+            os.replace(temp_pathname, pathname)
+        except BaseException:
+            os.remove(temp_pathname)
+            raise
+
+        self._size += size
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the size limit"""
+        entries = self._entries()
+        size = sum(entry_size for _, _, entry_size in entries)
+        for pathname, _, entry_size in sorted(entries, key=lambda entry: entry[1]):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(pathname)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+    def clear(self):
+        """Remove every entry of the cache"""
+        for pathname, _, _ in self._entries():
+            try:
+                os.remove(pathname)
+            except FileNotFoundError:
+                pass
+        self._size = 0
+
+    @property
+    def size(self):
+        """Total size in bytes of the cached results"""
+        return sum(entry_size for _, _, entry_size in self._entries())
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def __repr__(self):
+        return "ResultCache(directory={!r}, max_size={})".format(
+            self.directory, self.max_size
+        )
+
+    def _remove(self, pathname):
+        size = _file_size(pathname)
+        try:
+            os.remove(pathname)
+        except FileNotFoundError:
+            return
+        self._size -= size
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as scanner:
+            for entry in scanner:
+                if not entry.name.endswith(_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+
+def _file_size(pathname):
+    try:
+        return os.path.getsize(pathname)
+    except FileNotFoundError:
+        return 0
+
+
+def _hash_call(func, args, kwargs, func_digest=None):
+    digest = hashlib.sha256()
+    digest.update("{}\0".format(__version__).encode())
+    digest.update(func_digest or _digest(func))
+    try:
+        signature = inspect.signature(func)
+    except ValueError:
+        # Callables without a signature, e.g. some builtins
+        digest.update(_digest((args, kwargs)))
+        return digest.hexdigest()
+
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    for name, value in bound.arguments.items():
+        digest.update("{}=".format(name).encode())
+        try:
+            digest.update(_digest(value))
+        except TypeError:
+            if value is not signature.parameters[name].default:
+                raise
+            # Sentinels of omitted arguments, e.g. numpy's _NoValue
+            digest.update(b"default\0")
+    return digest.hexdigest()
+
+
+def _digest(value):
+    digest = hashlib.sha256()
+    _update_hash(digest, value)
+    return digest.digest()
+
+
+def _update_hash(digest, value, seen=None):
+    if isinstance(value, RRi):
+        digest.update(
+            "{}({},{})".format(
+                type(value).__name__, value.detrended, value.interpolated
+            ).encode()
+        )
+        _update_hash(digest, value.values)
+        _update_hash(digest, value.time)
+    elif isinstance(value, (np.ndarray, list)) and _is_numeric(value):
+        array = np.ascontiguousarray(value, dtype=np.float64)
+        digest.update("array{}".format(array.shape).encode())
+        digest.update(array.tobytes())
+    elif isinstance(value, np.ndarray) and value.dtype.kind in "bcUSmM":
+        array = np.ascontiguousarray(value)
+        digest.update("array{}{}".format(array.dtype.str, array.shape).encode())
+        digest.update(array.tobytes())
+    elif isinstance(value, np.generic):
+        _update_hash(digest, np.asarray(value))
+    elif value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        digest.update(repr(value).encode())
+    elif isinstance(value, (list, tuple)):
+        digest.update("{}{}".format(type(value).__name__, len(value)).encode())
+        for item in value:
+            _update_hash(digest, item, seen)
+    elif isinstance(value, dict):
+        digest.update("dict{}".format(len(value)).encode())
+        for key in sorted(value, key=repr):
+            _update_hash(digest, key)
+            _update_hash(digest, value[key], seen)
+    elif isinstance(value, types.CodeType):
+        digest.update(value.co_code)
+        digest.update(repr(value.co_names).encode())
+        for const in value.co_consts:
+            if isinstance(const, types.CodeType):
+                _update_hash(digest, const, seen)
+            elif isinstance(const, frozenset):
+                # Set order depends on the hash seed of the interpreter
+                digest.update(repr(sorted(map(repr, const))).encode())
+            else:
+                # Literals, their representation is their content
+                digest.update(repr(const).encode())
+    elif callable(value):
+        _update_callable_hash(digest, value, set() if seen is None else seen)
+    else:
+        raise TypeError(
+            "cannot hash argument of type `{}` for the cache".format(
+                type(value).__name__
+            )
+        )
+    digest.update(b"\0")
+
+
+def _update_callable_hash(digest, func, seen):
+    name = getattr(func, "__qualname__", getattr(func, "__name__", None))
+    if isinstance(func, partial):
+        digest.update(b"partial")
+        _update_hash(digest, (func.func, func.args, func.keywords), seen)
+        return
+    elif isinstance(func, types.MethodType):
+        _update_hash(digest, (func.__func__, func.__self__), seen)
+        return
+    elif name is None:
+        raise TypeError(
+            "cannot hash callable of type `{}` for the cache".format(
+                type(func).__name__
+            )
+        )
+
+    digest.update("{}.{}".format(getattr(func, "__module__", ""), name).encode())
+    code = getattr(func, "__code__", None)
+    if code is None or id(func) in seen:
+        # Builtins are identified by name, recursive functions are hashed once
+        return
+
+    # Lambdas and local functions share names, their code, defaults and
+    # closure tell them apart
+    seen.add(id(func))
+    _update_hash(digest, code, seen)
+    defaults = list(func.__defaults__ or ()) + list((func.__kwdefaults__ or {}).items())
+    for default in defaults:
+        try:
+            digest.update(_digest(default))
+        except TypeError:
+            # Sentinels, e.g. numpy's _NoValue
+            digest.update(type(default).__qualname__.encode())
+    cells = [cell.cell_contents for cell in func.__closure__ or ()]
+    _update_hash(digest, cells, seen)
+
+
+def _is_numeric(value):
+    # Lists of RRi would be converted to arrays of their values, losing the
+    # time information
+    if isinstance(value, list) and not _only_numbers(value):
+        return False
+    try:
+        return np.asarray(value).dtype.kind in "biuf"
+    except (TypeError, ValueError):
+        return False
+
+
+def _only_numbers(items):
+    return all(
+        _only_numbers(item)
+        if isinstance(item, (list, tuple))
+        else isinstance(item, (Number, np.generic))
+        for item in items
+    )
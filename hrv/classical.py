@@ -9,7 +9,7 @@ from hrv.rri import RRi
 from hrv.utils import (validate_rri, _interpolate_rri)
 
 
-__all__ = ['time_domain', 'frequency_domain', 'non_linear']
+__all__ = ['time_domain', 'time_domain_windows', 'frequency_domain', 'non_linear']
 
 
 @validate_rri
@@ -58,6 +58,10 @@ def time_domain(rri):
      'mrri': 1058.7186813186813,
      'mhr': 56.85278105637358}
     """
+    return _time_domain(rri)
+
+
+def _time_domain(rri):
     # TODO: let user choose interval for pnn50 and nn50.
     diff_rri = np.diff(rri)
     rmssd = np.sqrt(np.mean(diff_rri ** 2))
@@ -76,6 +80,74 @@ def time_domain(rri):
     )
 
 
+def time_domain_windows(windows, chunk_size=4096):
+    """
+    Calculate the time-domain indices of many RRi windows at once, e.g. the
+    segments of `RRi.beat_split`.
+
+    The windows are evaluated in chunks with vectorized operations along
+    their rows, so the temporary arrays are bounded by `chunk_size` windows
+    and strided views are not copied as a whole. The values are not
+    validated, see `time_domain`.
+
+    Parameters
+    ----------
+    windows : array_like
+        (n_windows, size) array with the RRi values of each window in
+        milliseconds
+    chunk_size : int, optional
+        number of windows evaluated at once. Defaults to 4096
+
+    Returns
+    -------
+    results : dict
+        Dictionary containing the time domain indices of `time_domain`, each
+        an array with one value per window
+
+    See Also
+    --------
+    time_domain, hrv.rri.RRi.beat_split
+
+    Examples
+    --------
+    >>> from hrv.classical import time_domain_windows
+    >>> from hrv.sampledata import load_rest_rri
+    >>> rri = load_rest_rri()
+    >>> values, time = rri.beat_split(size=256, overlap=128)
+    >>> time_domain_windows(values)['rmssd']
+    array([66.67486224, 54.28671162, 48.47319858, 46.98389378, 53.93885427,
+           51.73185009])
+    """
+    windows = np.asarray(windows)
+    chunks = [
+        _time_domain_windows(windows[start : start + chunk_size])
+        for start in range(0, len(windows), chunk_size)
+    ] or [_time_domain_windows(windows)]
+    return {
+        key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]
+    }
+
+
+def _time_domain_windows(windows):
+    diff_rri = np.diff(windows, axis=1)
+    nn50 = np.sum(np.abs(diff_rri) > 50, axis=1)
+
+    return dict(
+        zip(
+            ["rmssd", "sdnn", "sdsd", "nn50", "pnn50", "mrri", "mhr"],
+            [
+                np.sqrt(np.mean(diff_rri ** 2, axis=1)),
+                np.std(windows, axis=1, ddof=1),
+                np.std(diff_rri, axis=1, ddof=1),
+                nn50,
+                nn50 / windows.shape[1] * 100,
+                np.mean(windows, axis=1),
+                np.mean(60 / (windows / 1000.0), axis=1),
+            ],
+        )
+    )
+
+
 def _nn50(rri):
     return sum(abs(np.diff(rri)) > 50)
 
@@ -199,6 +271,11 @@ def frequency_domain(
     if interp_method is not None:
         rri = _interpolate_rri(rri, time, fs, interp_method)
 
+    fxx, pxx = _psd(rri, fs, method, detrend, **kwargs)
+    return _auc(fxx, pxx, vlf_band, lf_band, hf_band)
+
+
+def _psd(rri, fs, method, detrend, **kwargs):
     if method == "welch":
         fxx, pxx = welch(x=rri, fs=fs, detrend=detrend, **kwargs)
     elif method == "ar":
@@ -206,17 +283,17 @@ def frequency_domain(
             rri = polynomial_detrend(rri, degree=1)
         fxx, pxx = _calc_pburg_psd(rri=rri, fs=fs, **kwargs)
 
-    return _auc(fxx, pxx, vlf_band, lf_band, hf_band)
+    return fxx, pxx
 
 
 def _auc(fxx, pxx, vlf_band, lf_band, hf_band):
-    vlf_indexes = np.logical_and(fxx >= vlf_band[0], fxx < vlf_band[1])
-    lf_indexes = np.logical_and(fxx >= lf_band[0], fxx < lf_band[1])
-    hf_indexes = np.logical_and(fxx >= hf_band[0], fxx < hf_band[1])
+    vlf = _band_power(fxx, pxx, vlf_band)
+    lf = _band_power(fxx, pxx, lf_band)
+    hf = _band_power(fxx, pxx, hf_band)
+    return _band_indices(vlf, lf, hf)
+
 
-    vlf = np.trapz(y=pxx[vlf_indexes], x=fxx[vlf_indexes])
-    lf = np.trapz(y=pxx[lf_indexes], x=fxx[lf_indexes])
-    hf = np.trapz(y=pxx[hf_indexes], x=fxx[hf_indexes])
+def _band_indices(vlf, lf, hf):
     total_power = vlf + lf + hf
     lf_hf = lf / hf
     lfnu = (lf / (total_power - vlf)) * 100
@@ -230,6 +307,12 @@ def _auc(fxx, pxx, vlf_band, lf_band, hf_band):
     )
 
 
+def _band_power(fxx, pxx, band):
+    # pxx may hold one PSD per row, e.g. of time-frequency methods
+    indexes = np.logical_and(fxx >= band[0], fxx < band[1])
+    return np.trapz(y=pxx[..., indexes], x=fxx[indexes], axis=-1)
+
+
 def _calc_pburg_psd(rri, fs, order=16, nfft=None):
     burg = pburg(data=rri, order=order, NFFT=nfft, sampling=fs)
     burg.scale_by_freq = False
@@ -279,6 +362,10 @@ def non_linear(rri):
     >>> non_linear(rri)
     {'sd1': 39.00945528912225, 'sd2': 71.86199098062633}
     """
+    return _non_linear(rri)
+
+
+def _non_linear(rri):
     sd1, sd2 = _poincare(rri)
     return dict(zip(["sd1", "sd2"], [sd1, sd2]))
 
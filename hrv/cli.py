@@ -0,0 +1,290 @@
+"""
+Command line interface of the hrv module.
+
+Analyse many RRi files at once, optionally filtering and detrending them,
+and write one row of indices per file:
+
+    $ hrv data/*.hrm --filter quotient --detrend polynomial -o results.csv
+
+Or analyse the RRi values (in milliseconds) read from the standard input in
+running windows, writing one JSON line per window:
+
+    $ tail -f device.log | hrv --stream --window 300 --step 30
+
+Or serve the analysis over HTTP. See `hrv.server`:
+
+    $ hrv --serve --port 8000
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from hrv.batch import run_incremental
+from hrv.pipeline import (
+    DETRENDERS,
+    FILTERS,
+    INDICES,
+    Pipeline,
+    _to_json,
+    analyse_file,
+    to_builtin,
+)
+from hrv.rri import RRi
+from hrv.server import serve
+from hrv.streaming import Windows
+
+
+def main(argv=None):
+    """Entry point of the `hrv` command"""
+    args = _parse_args(argv)
+    pipeline = Pipeline(
+        filters=args.filter or [],
+        detrend=args.detrend,
+        indices=args.indices,
+        fs=args.fs,
+        method=args.method,
+    )
+    if args.stream:
+        return _stream(sys.stdin, sys.stdout, pipeline, args.window, args.step)
+    if args.serve:
+        sys.stderr.write("Serving on http://{}:{}\n".format(args.host, args.port))
+        serve(args.host, args.port, pipeline=pipeline, n_workers=args.jobs)
+        return 0
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    output_format = args.format or (
+        "jsonl" if args.output.endswith((".jsonl", ".json")) else "csv"
+    )
+    write_row = _row_writer(output, output_format)
+
+    begin = time.perf_counter()
+    stages = defaultdict(float)
+    n_errors = 0
+    if args.manifest:
+        analysed = _analyse_incremental(
+            args.files, pipeline, args.jobs, args.manifest, args.quiet
+        )
+    else:
+        analysed = _analyse_files(args.files, pipeline, args.jobs)
+    try:
+        for name, row, timings, error in analysed:
+            for stage, elapsed in timings.items():
+                stages[stage] += elapsed
+            if error is not None:
+                n_errors += 1
+                sys.stderr.write("{}: {}\n".format(name, error))
+                continue
+            write_row(row)
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if not args.quiet:
+        _write_summary(len(args.files), n_errors, time.perf_counter() - begin, stages)
+
+    return 1 if n_errors else 0
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="hrv", description="Heart rate variability analysis of RRi files"
+    )
+    parser.add_argument(
+        "files", nargs="*", help="RRi files (.txt, .hrm, .csv, .atr, .edf, .fit)"
+    )
+    parser.add_argument(
+        "--filter",
+        action="append",
+        choices=list(FILTERS),
+        help="filter applied to the RRi series, can be repeated to chain filters",
+    )
+    parser.add_argument(
+        "--detrend",
+        choices=list(DETRENDERS),
+        help="detrend method applied before the frequency domain analysis",
+    )
+    parser.add_argument(
+        "--indices",
+        nargs="+",
+        choices=list(INDICES),
+        default=list(INDICES),
+        help="indices calculated for each file (default: all)",
+    )
+    parser.add_argument(
+        "--fs", type=float, default=4.0, help="interpolation frequency (default: 4)"
+    )
+    parser.add_argument(
+        "--method",
+        choices=["welch", "ar"],
+        default="welch",
+        help="PSD estimation method (default: welch)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of worker processes (default: number of cores)",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="output file (default: standard output)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "jsonl"],
+        help="output format (default: from the output file extension or csv)",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not print the timing summary"
+    )
+    parser.add_argument(
+        "--manifest",
+        help="JSON manifest of a previous run, only new or changed files are "
+        "analysed and the manifest is updated",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read RRi values (ms) from the standard input and write the indices "
+        "of each running window as JSON lines",
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=300.0,
+        help="window size in seconds of the stream mode (default: 300)",
+    )
+    parser.add_argument(
+        "--step",
+        type=float,
+        default=30.0,
+        help="step in seconds between windows of the stream mode (default: 30)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="run an HTTP server analysing the RRi series posted to /analyse",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="address of the server (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8000, help="port of the server (default: 8000)"
+    )
+    args = parser.parse_args(argv)
+    if not (args.stream or args.serve) and not args.files:
+        parser.error("the following arguments are required: files")
+    if args.stream and not 0 < args.step <= args.window:
+        parser.error("--step must be positive and not bigger than --window")
+
+    return args
+
+
+def _analyse_files(files, pipeline, jobs):
+    tasks = ((pathname, pipeline) for pathname in files)
+    if jobs is None or jobs <= 1:
+        for task in tasks:
+            yield _analyse_file(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # map keeps the order of the files while the results are streamed
+        for result in executor.map(_analyse_file, tasks, chunksize=4):
+            yield result
+
+
+def _analyse_file(task):
+    pathname, pipeline = task
+    timings = OrderedDict()
+    row = OrderedDict([("file", pathname)])
+    try:
+        row.update(analyse_file(pipeline, pathname, timings=timings))
+    except Exception as error:
+        return pathname, None, timings, error
+
+    return pathname, row, timings, None
+
+
+def _analyse_incremental(files, pipeline, jobs, manifest, quiet):
+    results, errors, computed = run_incremental(files, pipeline, manifest, n_jobs=jobs)
+    if not quiet:
+        sys.stderr.write(
+            "{} files analysed, {} read from {}\n".format(
+                len(computed), len(files) - len(computed), manifest
+            )
+        )
+    for name in files:
+        if name in errors:
+            yield name, None, {}, errors[name]
+        else:
+            yield name, OrderedDict([("file", name)], **results[name]), {}, None
+
+
+def _stream(input_stream, output, pipeline, window, step):
+    # Only the beats of the current window are kept in memory
+    windows = Windows(window, step)
+    beat_time = None
+    for line in iter(input_stream.readline, ""):
+        for value in map(float, re.findall(r"\d+(?:\.\d+)?", line)):
+            beat_time = 0.0 if beat_time is None else beat_time + value / 1000.0
+            for window_start, window_end, beats in windows.add(beat_time, value):
+                _write_window(output, beats, pipeline, window_start, window_end)
+
+    return 0
+
+
+def _write_window(output, beats, pipeline, window_start, window_end):
+    # time_domain needs at least 3 beats to calculate SDSD
+    if len(beats) < 3:
+        return
+
+    times, values = zip(*beats)
+    row = OrderedDict(
+        [("start", window_start), ("end", window_end), ("n_beats", len(values))]
+    )
+    try:
+        row.update(to_builtin(pipeline.run(RRi(values, times))))
+    except Exception as error:
+        sys.stderr.write("window {}-{}: {}\n".format(window_start, window_end, error))
+        return
+
+    output.write(_to_json(row) + "\n")
+    output.flush()
+
+
+def _row_writer(output, output_format):
+    if output_format == "jsonl":
+        return lambda row: output.write(_to_json(row) + "\n")
+
+    writer = None
+
+    def _write_csv_row(row):
+        nonlocal writer
+        if writer is None:
+            writer = csv.DictWriter(output, fieldnames=list(row.keys()))
+            writer.writeheader()
+        writer.writerow(row)
+
+    return _write_csv_row
+
+
+def _write_summary(n_files, n_errors, elapsed, stages):
+    lines = [
+        "{} files ({} errors) in {:.3f}s - {:.1f} files/s".format(
+            n_files, n_errors, elapsed, n_files / elapsed if elapsed else 0.0
+        )
+    ]
+    for stage, stage_elapsed in stages.items():
+        lines.append("  {:<12s}{:>10.3f}s".format(stage, stage_elapsed))
+    sys.stderr.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
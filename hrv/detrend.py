@@ -45,10 +45,13 @@ def polynomial_detrend(rri, degree=1):
     else:
         time = _create_time_array(rri)
 
+    return RRiDetrended(*_polynomial_detrend(rri, time, degree))
+
+
+def _polynomial_detrend(rri, time, degree=1):
     coef = np.polyfit(time, rri, deg=degree)
     polynomial = np.polyval(coef, time)
-    detrended_rri = rri - polynomial
-    return RRiDetrended(detrended_rri, time=time)
+    return rri - polynomial, time
 
 
 def smoothness_priors(rri, l=500, fs=4.0):
@@ -106,6 +109,16 @@ def smoothness_priors(rri, l=500, fs=4.0):
     else:
         time = _create_time_array(rri)
 
+    rri_detrended, time_interp = _smoothness_priors(rri, time, l, fs)
+    return RRiDetrended(
+        rri_detrended,
+        time=time_interp,
+        detrended=True,
+        interpolated=True,
+    )
+
+
+def _smoothness_priors(rri, time, l=500, fs=4.0):
     # TODO: only interp if not interpolated yet
     cubic_spline = CubicSpline(time, rri)
     time_interp = np.arange(time[0], time[-1], 1.0 / fs)
@@ -118,12 +131,7 @@ def smoothness_priors(rri, l=500, fs=4.0):
     z_stat = ((identity - np.linalg.inv(identity + l ** 2 * D_2.T @ D_2))) @ rri_interp
 
     rri_interp_detrend = np.squeeze(np.asarray(rri_interp - z_stat))
-    return RRiDetrended(
-        rri_interp - rri_interp_detrend,
-        time=time_interp,
-        detrended=True,
-        interpolated=True,
-    )
+    return rri_interp - rri_interp_detrend, time_interp
 
 
 def sg_detrend(rri, window_length=51, polyorder=3, *args, **kwargs):
@@ -169,7 +177,14 @@ def sg_detrend(rri, window_length=51, polyorder=3, *args, **kwargs):
     else:
         time = _create_time_array(rri)
 
+    rri_detrended, time = _sg_detrend(
+        rri, time, window_length, polyorder, *args, **kwargs
+    )
+    return RRiDetrended(rri_detrended, time=time, detrended=True)
+
+
+def _sg_detrend(rri, time, window_length=51, polyorder=3, *args, **kwargs):
     trend = savgol_filter(
         rri, window_length=window_length, polyorder=polyorder, *args, **kwargs
     )
-    return RRiDetrended(rri - trend, time=time, detrended=True)
+    return rri - trend, time
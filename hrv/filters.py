@@ -52,6 +52,10 @@ def quotient(rri):
         rri = np.array(rri)
         rri_time = _create_time_info(rri)
 
+    return RRi(*_quotient(rri, rri_time))
+
+
+def _quotient(rri, rri_time):
     L = len(rri) - 1
 
     indices = np.where(
@@ -61,8 +65,7 @@ def quotient(rri):
         | (rri[1:L] / rri[: L - 1] > 1.2)
     )
 
-    rri_filt, time_filt = np.delete(rri, indices), np.delete(rri_time, indices)
-    return RRi(rri_filt, time_filt)
+    return np.delete(rri, indices), np.delete(rri_time, indices)
 
 
 def moving_average(rri, order=3):
@@ -103,6 +106,10 @@ def moving_average(rri, order=3):
     return _moving_function(rri, order, np.mean)
 
 
+def _moving_average(rri, rri_time, order=3):
+    return _moving_values(rri, order, np.mean), rri_time
+
+
 def moving_median(rri, order=3):
     """
     Low-pass filter. Replace each RRi value by the median of its ⌊N/2⌋
@@ -140,6 +147,10 @@ def moving_median(rri, order=3):
     return _moving_function(rri, order, np.median)
 
 
+def _moving_median(rri, rri_time, order=3):
+    return _moving_values(rri, order, np.median), rri_time
+
+
 def threshold_filter(rri, threshold="medium", local_median_size=5):
     """
     Low-pass filter. Inspired by the threshold-based artifact correction
@@ -198,15 +209,11 @@ def threshold_filter(rri, threshold="medium", local_median_size=5):
     else:
         rri_time = _create_time_info(rri)
 
-    # Filter strength inspired in Kubios threshold based artifact correction
-    strength = {
-        "very low": 450,
-        "low": 350,
-        "medium": 250,
-        "strong": 150,
-        "very strong": 50,
-    }
-    threshold = strength[threshold] if threshold in strength else threshold
+    return RRi(*_threshold_filter(rri, rri_time, threshold, local_median_size))
+
+
+def _threshold_filter(rri, rri_time, threshold="medium", local_median_size=5):
+    threshold = _threshold_value(threshold)
 
     n_rri = len(rri)
     rri_to_remove = []
@@ -225,7 +232,19 @@ def threshold_filter(rri, threshold="medium", local_median_size=5):
     rri_temp = [r for idx, r in enumerate(rri) if idx not in rri_to_remove]
     time_temp = [t for idx, t in enumerate(rri_time) if idx not in rri_to_remove]
     cubic_spline = CubicSpline(time_temp, rri_temp)
-    return RRi(cubic_spline(rri_time), rri_time)
+    return cubic_spline(rri_time), rri_time
+
+
+def _threshold_value(threshold):
+    # Filter strength inspired in Kubios threshold based artifact correction
+    strength = {
+        "very low": 450,
+        "low": 350,
+        "medium": 250,
+        "strong": 150,
+        "very strong": 50,
+    }
+    return strength[threshold] if threshold in strength else threshold
 
 
 def _moving_function(rri, order, func):
@@ -235,6 +254,10 @@ def _moving_function(rri, order, func):
     else:
         rri_time = _create_time_info(rri)
 
+    return RRi(_moving_values(rri, order, func), rri_time)
+
+
+def _moving_values(rri, order, func):
     offset = int(order / 2)
 
     # TODO: Implemente copy method for RRi class
@@ -242,4 +265,4 @@ def _moving_function(rri, order, func):
     for i in range(offset, len(rri) - offset, 1):
         filt_rri[i] = func(rri[i - offset : i + offset + 1])
 
-    return RRi(filt_rri, rri_time)
+    return filt_rri
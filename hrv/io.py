@@ -1,13 +1,31 @@
+import bz2
 import csv
+import glob
+import gzip
+import io
+import itertools
+import lzma
+import os
 import re
+import struct
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 
 import numpy as np
 
-from hrv.exceptions import EmptyFileError
-from hrv.rri import RRi
+from hrv.exceptions import EmptyFileError, FileNotSupportedError
+from hrv.nonstationary import TimeVarying
+from hrv.rri import RRi, RRiDetrended
 
 
-__all__ = ['read_from_text', 'read_from_hrm', 'read_from_csv']
+__all__ = ['read_from_text', 'read_from_hrm', 'read_from_csv', 'read_from_wfdb',
+           'read_from_edf', 'read_from_fit', 'read_file', 'read_many',
+           'list_files',
+           'write_to_text', 'write_to_csv', 'write_to_hrm', 'write_results',
+           'rri_to_arrow', 'rri_from_arrow', 'results_to_arrow',
+           'write_to_parquet', 'read_from_parquet']
 
 
 def read_from_text(pathname):
@@ -20,14 +38,17 @@ def read_from_text(pathname):
        ...
        793
 
+    Only numbers with decimals (e.g. 0.8 or 812.5) or with two or more digits
+    are read, so single-digit integers, such as flags, are ignored.
     Time information is created using the cumulative sum of the RRi series
         time = np.cumsum(rri) / 1000.0
         time -= time[0]
 
     Parameters
     ----------
-    pathname : str
-        string containing the path to the file
+    pathname : str or file-like object
+        string containing the path to the file or a file-like object.
+        gzip, bz2 and xz compressed files are decompressed on the fly
 
     Returns
     -------
@@ -43,13 +64,17 @@ def read_from_text(pathname):
     >>> from hrv.io import read_from_text
     >>> rri = read_from_text('/path/to/file.txt')
     RRi array([1114., 1113., 1066., 1119., 1062.])
+    >>> rri = read_from_text('/path/to/file.txt.gz')
+    RRi array([1114., 1113., 1066., 1119., 1062.])
     """
-    with open(pathname, "r") as fileobj:
-        file_content = fileobj.read()
-        if not file_content:
+    with _open_text(pathname) as fileobj:
+        first_line = fileobj.readline()
+        if not first_line:
             raise EmptyFileError("empty file!")
 
-        values = list(map(float, re.findall(r"\d\.?[0-9]+", file_content)))
+        values = _read_numbers(
+            itertools.chain([first_line], fileobj), r"\d+\.\d+|\d{2,}"
+        )
 
     return RRi(values)
 
@@ -63,8 +88,9 @@ def read_from_hrm(pathname):
 
     Parameters
     ----------
-    pathname : str
-        string containing the path to the file
+    pathname : str or file-like object
+        string containing the path to the file or a file-like object.
+        gzip, bz2 and xz compressed files are decompressed on the fly
 
     Returns
     -------
@@ -85,19 +111,19 @@ def read_from_hrm(pathname):
     >>> rri = read_from_hrm('/path/to/file.hrm')
     RRi array([1114., 1113., 1066., 1119., 1062.])
     """
-    with open(pathname, "r") as fileobj:
-        file_content = fileobj.read()
-        rri_info_index = file_content.find("[HRData]")
-        rri = None
-        if rri_info_index < 0:
-            raise EmptyFileError("empty file!")
+    with _open_text(pathname) as fileobj:
+        for line in fileobj:
+            rri_info_index = line.find("[HRData]")
+            if rri_info_index >= 0:
+                break
         else:
-            rri = np.array(
-                list(map(float, re.findall(r"\d+", file_content[rri_info_index:-1]))),
-                dtype=np.float64,
-            )
-            if len(rri) == 0:
-                raise EmptyFileError("empty file!")
+            raise EmptyFileError("empty file!")
+
+        rri = _read_numbers(
+            itertools.chain([line[rri_info_index:]], fileobj), r"\d+"
+        )
+        if len(rri) == 0:
+            raise EmptyFileError("empty file!")
 
     return RRi(rri)
 
@@ -115,8 +141,9 @@ def read_from_csv(
 
     Parameters
     ----------
-    pathname : str
-        string containing the path to the file
+    pathname : str or file-like object
+        string containing the path to the file or a file-like object.
+        gzip, bz2 and xz compressed files are decompressed on the fly
     rri_col_index : int, optional
         position of the column that contains the RRi information. Defaults to 0
     time_col_index: int, optional
@@ -149,16 +176,20 @@ def read_from_csv(
     >>> rri = read_from_csv('/path/to/file.hrm', time_col_index=1)
     RRi array([1114., 1113., 1066., 1119., 1062.])
     """
-    with open(pathname, newline="") as csvfile:
+    with _open_text(pathname, newline="") as csvfile:
+        lines = csvfile
         if sep is None:
+            # Sniff the delimiter without rewinding, compressed streams and
+            # file-like objects can not always seek
+            head = csvfile.read(1024) + csvfile.readline()
             try:
-                sep = csv.Sniffer().sniff(csvfile.read(1024)).delimiter
+                sep = csv.Sniffer().sniff(head[:1024]).delimiter
             except csv.Error:
                 sep = ","
 
-            csvfile.seek(0)
+            lines = itertools.chain(io.StringIO(head, newline=""), csvfile)
 
-        reader = csv.reader(csvfile, delimiter=sep)
+        reader = csv.reader(lines, delimiter=sep)
 
         for offset in range(row_offset):
             next(reader)
@@ -173,3 +204,1254 @@ def read_from_csv(
             time.append(time_parser(row[time_col_index].strip()))
 
         return RRi(rri, time)
+
+
+_COMPRESSED_EXTENSIONS = (".gz", ".bz2", ".xz")
+_COMPRESSIONS = (
+    (b"\x1f\x8b", lambda fileobj: gzip.GzipFile(fileobj=fileobj)),
+    (b"BZh", bz2.BZ2File),
+    (b"\xfd7zXZ\x00", lzma.LZMAFile),
+)
+
+
+@contextmanager
+def _open_binary(source):
+    # Yield a binary stream from a path or a file-like object, decompressing
+    # gzip, bz2 and xz content on the fly
+    if hasattr(source, "read"):
+        fileobj = source
+    else:
+        fileobj = open(source, "rb")
+
+    try:
+        magic = _peek(fileobj, 6)
+        for signature, decompressor in _COMPRESSIONS:
+            if magic.startswith(signature):
+                with decompressor(fileobj) as stream:
+                    yield stream
+                break
+        else:
+            yield fileobj
+    finally:
+        if fileobj is not source:
+            fileobj.close()
+
+
+@contextmanager
+def _open_text(source, newline=None):
+    if isinstance(source, io.TextIOBase):
+        yield source
+        return
+
+    with _open_binary(source) as stream:
+        text_stream = io.TextIOWrapper(stream, newline=newline)
+        try:
+            yield text_stream
+        finally:
+            # Do not let the wrapper close a file-like object owned by the
+            # caller
+            text_stream.detach()
+
+
+def _peek(fileobj, size):
+    if hasattr(fileobj, "peek"):
+        return fileobj.peek(size)[:size]
+
+    position = fileobj.tell()
+    content = fileobj.read(size)
+    fileobj.seek(position)
+    return content
+
+
+def _read_numbers(lines, pattern, chunk_size=1 << 16):
+    # Parse the numbers of a text stream in chunks of lines, so the whole
+    # (possibly decompressed) content is never held in memory
+    pattern = re.compile(pattern)
+    lines = iter(lines)
+    values = []
+    while True:
+        chunk = "".join(itertools.islice(lines, chunk_size))
+        if not chunk:
+            break
+        values.append(np.array(pattern.findall(chunk), dtype=np.float64))
+
+    return np.concatenate(values) if values else np.array([], dtype=np.float64)
+
+
+# WFDB annotation codes (see wfdb/ecgcodes.h)
+_WFDB_SKIP = 59
+_WFDB_NUM = 60
+_WFDB_SUB = 61
+_WFDB_CHN = 62
+_WFDB_AUX = 63
+_WFDB_NORMAL = 1
+# Codes considered QRS complexes by WFDB's `isqrs`
+_WFDB_QRS_CODES = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 25, 30, 34, 35, 38, 41)
+
+
+def read_from_wfdb(pathname, fs=None, beat_codes=(_WFDB_NORMAL,)):
+    """
+    Read RRi series from PhysioNet WFDB annotation files (*.atr) stored in
+    the standard MIT format.
+    The RRi series is built from the intervals between consecutive QRS
+    annotations and only the intervals delimited by two beats whose
+    annotation codes are in `beat_codes` are kept (NN intervals).
+    Time information is created from the sample index of the beat that
+    closes each interval:
+        time = sample / fs
+
+    Parameters
+    ----------
+    pathname : str
+        string containing the path to the annotation file
+    fs : float, optional
+        sampling frequency of the annotated record. If None, it is read from
+        the record header file (*.hea) located in the same directory of the
+        annotation file. Defaults to None
+    beat_codes : tuple, optional
+        WFDB annotation codes of the beats used to build the RRi series.
+        Defaults to (1,) (normal beats, 'N')
+
+    Returns
+    -------
+    rri : RRi array
+        instance of the RRi class containing the RRi values
+
+    See Also
+    -------
+    read_from_text, read_from_hrm, read_from_csv
+
+    Reference
+    --------
+        https://physionet.org/physiotools/wag/annot-5.htm
+
+    Examples
+    --------
+    >>> from hrv.io import read_from_wfdb
+    >>> rri = read_from_wfdb('/path/to/100.atr')
+    RRi array([825., 808.33333333, 805.55555556, ..., 788.88888889])
+    """
+    with _open_binary(pathname) as fileobj:
+        file_content = fileobj.read()
+
+    if fs is None:
+        fs = _read_wfdb_sampling_frequency(pathname)
+
+    codes, samples = _decode_wfdb_annotations(file_content)
+    qrs_mask = np.isin(codes, _WFDB_QRS_CODES)
+    codes, samples = codes[qrs_mask], samples[qrs_mask]
+
+    is_beat = np.isin(codes, beat_codes)
+    nn_mask = is_beat[:-1] & is_beat[1:]
+    if not nn_mask.any():
+        raise EmptyFileError("empty file!")
+
+    rri = np.diff(samples)[nn_mask] / float(fs) * 1000.0
+    time = samples[1:][nn_mask] / float(fs)
+    return RRi(rri, time)
+
+
+def _decode_wfdb_annotations(file_content):
+    # Every annotation starts with a little-endian 16-bit word holding the
+    # annotation code in its 6 most significant bits and the interval (or a
+    # value, for the special codes) in the remaining 10 bits.
+    words = np.frombuffer(file_content[: len(file_content) // 2 * 2], dtype="<u2")
+    codes = (words >> 10).astype(np.int64)
+    intervals = (words & 0x3FF).astype(np.int64)
+
+    # SKIP and AUX words are followed by payload words that must not be
+    # interpreted as annotations. They are rare, so only them are visited.
+    is_payload = np.zeros(len(words), dtype=bool)
+    skips = []
+    payload_end = 0
+    for position in np.flatnonzero((codes == _WFDB_SKIP) | (codes == _WFDB_AUX)):
+        if position < payload_end:
+            continue
+        if codes[position] == _WFDB_SKIP:
+            n_payload = 2
+            skips.append(position)
+        else:
+            n_payload = (intervals[position] + 1) // 2
+        payload_end = position + 1 + n_payload
+        is_payload[position + 1 : payload_end] = True
+
+    headers = np.flatnonzero(~is_payload)
+    end_of_file = headers[words[headers] == 0]
+    if len(end_of_file):
+        headers = headers[headers < end_of_file[0]]
+
+    increments = np.where(codes < _WFDB_SKIP, intervals, 0)
+    skips = np.array(skips, dtype=np.int64)
+    skips = skips[skips + 2 < len(words)]
+    if len(skips):
+        # The 32-bit skip interval is stored with its high 16-bit word first
+        high = words[skips + 1].astype(np.uint32)
+        low = words[skips + 2].astype(np.uint32)
+        increments[skips] = ((high << 16) | low).astype(np.int32)
+
+    headers_codes = codes[headers]
+    samples = np.cumsum(increments[headers])
+    annotations = headers_codes < _WFDB_SKIP
+    return headers_codes[annotations], samples[annotations]
+
+
+def _read_wfdb_sampling_frequency(pathname):
+    if not isinstance(pathname, (str, os.PathLike)):
+        raise ValueError("sampling frequency must be provided for file-like objects")
+
+    pathname = os.fspath(pathname)
+    # The header of compressed annotations, e.g. 100.atr.gz, is 100.hea
+    root, extension = os.path.splitext(pathname)
+    if extension.lower() in _COMPRESSED_EXTENSIONS:
+        root = os.path.splitext(root)[0]
+    header_path = root + ".hea"
+    try:
+        with open(header_path, "r") as fileobj:
+            for line in fileobj:
+                if line.strip() and not line.startswith("#"):
+                    record_line = line.split()
+                    break
+            else:
+                record_line = []
+    except (IOError, OSError):
+        raise ValueError(
+            "sampling frequency not provided and header file {} "
+            "not found".format(header_path)
+        )
+
+    if len(record_line) < 3:
+        # WFDB default sampling frequency
+        return 250.0
+
+    return float(re.split(r"[/(]", record_line[2])[0])
+
+
+_EDF_ANNOTATION_LABELS = ("EDF Annotations", "BDF Annotations")
+# Texts of the beat annotations selected by default
+_EDF_BEAT_ANNOTATIONS = ("R", "N", "QRS", "Beat", "Normal beat")
+_EDF_TAL = re.compile(rb"([+-]\d+(?:\.\d*)?)(?:\x15(?:\d+(?:\.\d*)?)?)?\x14([^\x00]*)\x00")
+
+
+def read_from_edf(pathname, channel=None, annotation=None, start=None, end=None):
+    """
+    Read RRi series from European Data Format files (*.edf, *.bdf),
+    including the EDF+ and BDF+ variants.
+    The RRi series can be created either from the beat annotations stored in
+    the Time-stamped Annotations Lists (TALs) of the file or from a channel
+    containing heart rate (bpm) or RRi (s or ms) values.
+    When created from annotations, the RRi values are the intervals between
+    consecutive selected beats and time information is the onset of the beat
+    closing each interval.
+    The data records of plain files are memory-mapped and, when `start`
+    and/or `end` are provided, only the records covering the requested time
+    range are read. The records of compressed files (gzip, bz2 or xz) and
+    of file-like objects, e.g. members of zip archives, are read at once.
+
+    Parameters
+    ----------
+    pathname : str or file-like object
+        string containing the path to the file or binary file-like object
+    channel : str or int, optional
+        label or position of the channel containing the heart rate or RRi
+        values. If None, the RRi series is created from the annotations.
+        Defaults to None
+    annotation : str or list of str, optional
+        annotation text(s) used to select the beat annotations, other
+        annotations (e.g. sleep stages, events and notes) are ignored. If
+        None, the usual beat labels are selected: 'R', 'N', 'QRS', 'Beat'
+        and 'Normal beat'. Defaults to None
+    start : float, optional
+        beginning of the requested time range in seconds. Only beats or
+        samples after `start` are used. Defaults to None
+    end : float, optional
+        end of the requested time range in seconds. Only beats or samples
+        before `end` are used. Defaults to None
+
+    Returns
+    -------
+    rri : RRi array
+        instance of the RRi class containing the RRi values
+
+    See Also
+    -------
+    read_from_text, read_from_hrm, read_from_csv, read_from_wfdb
+
+    Reference
+    --------
+        https://www.edfplus.info/specs/edfplus.html
+
+    Examples
+    --------
+    >>> from hrv.io import read_from_edf
+    >>> rri = read_from_edf('/path/to/file.edf', annotation='R', end=300)
+    RRi array([1114., 1113., 1066., 1119., 1062.])
+    >>> rri = read_from_edf('/path/to/file.edf', channel='HR')
+    RRi array([1111.11111111, 1090.90909091, ..., 1071.42857143])
+    """
+    with _open_binary(pathname) as fileobj:
+        header = _read_edf_header(fileobj)
+        records = _read_edf_records(fileobj, header)
+    start = 0.0 if start is None else start
+    end = np.inf if end is None else end
+
+    first, stop = _edf_selected_records(records, header, start, end)
+    selected = slice(first, stop)
+
+    if channel is None:
+        beats = _edf_beats_from_annotations(records[selected], header, annotation)
+        beats = beats[(beats >= start) & (beats <= end)]
+        rri, time = np.diff(beats) * 1000.0, beats[1:]
+    else:
+        onsets = _edf_record_onsets(records[selected], header, first)
+        rri, time = _edf_rri_from_channel(records[selected], onsets, header, channel)
+        interval = (time >= start) & (time <= end)
+        rri, time = rri[interval], time[interval]
+
+    if len(rri) == 0:
+        raise EmptyFileError("empty file!")
+
+    return RRi(rri, time)
+
+
+def _read_edf_header(fileobj):
+    main_header = fileobj.read(256)
+    if len(main_header) < 256:
+        raise EmptyFileError("empty file!")
+
+    n_signals = int(main_header[252:256])
+    signals_header = fileobj.read(256 * n_signals)
+
+    def _field(offset, size):
+        fields = signals_header[offset * n_signals : (offset + size) * n_signals]
+        return [
+            fields[i * size : (i + 1) * size].decode("latin-1").strip()
+            for i in range(n_signals)
+        ]
+
+    is_bdf = main_header[:1] == b"\xff"
+    header_bytes = int(main_header[184:192])
+    samples_per_record = np.array(list(map(int, _field(216, 8))))
+    sample_width = 3 if is_bdf else 2
+    record_bytes = int(samples_per_record.sum()) * sample_width
+    labels = _field(0, 16)
+    return {
+        "is_bdf": is_bdf,
+        "discontinuous": main_header[192:197] in (b"EDF+D", b"BDF+D"),
+        "header_bytes": header_bytes,
+        # -1 while the records are being recorded
+        "n_records": int(main_header[236:244]),
+        "record_duration": float(main_header[244:252]),
+        "record_bytes": record_bytes,
+        "sample_width": sample_width,
+        "labels": labels,
+        "physical_dimensions": _field(96, 8),
+        "physical_min": np.array(list(map(float, _field(104, 8)))),
+        "physical_max": np.array(list(map(float, _field(112, 8)))),
+        "digital_min": np.array(list(map(float, _field(120, 8)))),
+        "digital_max": np.array(list(map(float, _field(128, 8)))),
+        "samples_per_record": samples_per_record,
+        "signal_offsets": np.concatenate([[0], np.cumsum(samples_per_record)[:-1]])
+        * sample_width,
+        "annotation_signal": next(
+            (i for i, label in enumerate(labels) if label in _EDF_ANNOTATION_LABELS),
+            None,
+        ),
+    }
+
+
+def _read_edf_records(fileobj, header):
+    # Records of plain files are memory-mapped, compressed files and archive
+    # members are read at once
+    header_bytes, record_bytes = header["header_bytes"], header["record_bytes"]
+    mapped = isinstance(fileobj, io.BufferedReader)
+    if mapped:
+        size = os.fstat(fileobj.fileno()).st_size - header_bytes
+    else:
+        # Only the main and the signals headers were read
+        fileobj.read(header_bytes - 256 * (len(header["labels"]) + 1))
+        content = fileobj.read()
+        size = len(content)
+
+    n_records = header["n_records"]
+    if n_records < 0:
+        n_records = size // record_bytes
+    if n_records == 0:
+        raise EmptyFileError("empty file!")
+
+    shape = (n_records, record_bytes)
+    if mapped:
+        return np.memmap(
+            fileobj, dtype=np.uint8, mode="r", offset=header_bytes, shape=shape
+        )
+
+    records = np.frombuffer(content, dtype=np.uint8, count=n_records * record_bytes)
+    return records.reshape(shape)
+
+
+def _edf_signal_bytes(records, header, signal):
+    begin = header["signal_offsets"][signal]
+    size = header["samples_per_record"][signal] * header["sample_width"]
+    return np.ascontiguousarray(records[:, begin : begin + size])
+
+
+def _edf_record_onsets(records, header, first=0):
+    n_records = len(records)
+    if header["discontinuous"] and header["annotation_signal"] is not None:
+        # The first TAL of each record of EDF+D/BDF+D files keeps its onset
+        raw = _edf_signal_bytes(records, header, header["annotation_signal"])
+        return np.array(
+            [float(_EDF_TAL.match(raw[i].tobytes()).group(1)) for i in range(n_records)]
+        )
+
+    return (first + np.arange(n_records)) * header["record_duration"]
+
+
+def _edf_selected_records(records, header, start, end):
+    # First and last (exclusive) records overlapping [start, end]. The onsets
+    # increase with the records, so only the onsets of the records probed by
+    # a binary search are decoded
+    duration = header["record_duration"]
+
+    def _onset(record):
+        return _edf_record_onsets(records[record : record + 1], header, record)[0]
+
+    first = _bisect(lambda record: _onset(record) + duration > start, len(records))
+    stop = _bisect(lambda record: _onset(record) > end, len(records))
+    return first, max(first, stop)
+
+
+def _bisect(predicate, size):
+    # First position in range(size) where the monotonic predicate is True
+    low, high = 0, size
+    while low < high:
+        middle = (low + high) // 2
+        if predicate(middle):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def _edf_beats_from_annotations(records, header, annotation):
+    if header["annotation_signal"] is None:
+        raise ValueError("file has no annotations, please provide a `channel`")
+
+    if annotation is None:
+        annotation = _EDF_BEAT_ANNOTATIONS
+    elif isinstance(annotation, str):
+        annotation = [annotation]
+
+    raw = _edf_signal_bytes(records, header, header["annotation_signal"]).tobytes()
+    onsets = []
+    for tal in _EDF_TAL.finditer(raw):
+        texts = [t.decode("utf-8") for t in tal.group(2).split(b"\x14") if t]
+        # TALs without text only keep the record onset
+        if any(t in annotation for t in texts):
+            onsets.append(float(tal.group(1)))
+
+    return np.unique(onsets)
+
+
+def _edf_rri_from_channel(records, onsets, header, channel):
+    if not isinstance(channel, int):
+        try:
+            channel = header["labels"].index(channel)
+        except ValueError:
+            raise ValueError("channel `{}` does not exist.".format(channel))
+
+    raw = _edf_signal_bytes(records, header, channel)
+    if header["is_bdf"]:
+        raw = raw.reshape(-1, 3).astype(np.int32)
+        digital = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        digital = np.where(digital >= 1 << 23, digital - (1 << 24), digital)
+    else:
+        digital = raw.view("<i2").ravel()
+
+    dig_min = header["digital_min"][channel]
+    dig_max = header["digital_max"][channel]
+    phys_min = header["physical_min"][channel]
+    phys_max = header["physical_max"][channel]
+    values = (digital - dig_min) * (phys_max - phys_min) / (dig_max - dig_min) + phys_min
+
+    n_samples = header["samples_per_record"][channel]
+    sample_time = np.arange(n_samples) * header["record_duration"] / n_samples
+    time = (onsets[:, np.newaxis] + sample_time).ravel()
+
+    dimension = header["physical_dimensions"][channel].lower()
+    if dimension == "ms":
+        rri = values
+    elif dimension == "s":
+        rri = values * 1000.0
+    else:
+        # Heart rate in beats per minute
+        with np.errstate(divide="ignore"):
+            rri = 60000.0 / values
+
+    valid = values > 0
+    return rri[valid], time[valid]
+
+
+_FIT_HRV_MESSAGE = 78
+_FIT_HRV_TIME_FIELD = 0
+_FIT_INVALID_UINT16 = 0xFFFF
+
+
+def read_from_fit(pathname):
+    """
+    Read RRi series from Garmin/ANT FIT activity files (*.fit).
+    The RRi values are taken from the beat-to-beat intervals of the HRV
+    messages. Only the record headers are scanned, the HRV messages are
+    decoded at once after the scan and the remaining messages are skipped.
+    Time information is created using the cumulative sum of the RRi series
+        time = np.cumsum(rri) / 1000.0
+        time -= time[0]
+
+    Parameters
+    ----------
+    pathname : str
+        string containing the path to the file
+
+    Returns
+    -------
+    rri : RRi array
+        instance of the RRi class containing the RRi values
+
+    See Also
+    -------
+    read_from_text, read_from_hrm, read_from_csv
+
+    Reference
+    --------
+        https://developer.garmin.com/fit/protocol/
+
+    Examples
+    --------
+    >>> from hrv.io import read_from_fit
+    >>> rri = read_from_fit('/path/to/file.fit')
+    RRi array([1114., 1113., 1066., 1119., 1062.])
+    """
+    with _open_binary(pathname) as fileobj:
+        file_content = fileobj.read()
+
+    if not file_content:
+        raise EmptyFileError("empty file!")
+
+    if len(file_content) < 12 or file_content[8:12] != b".FIT":
+        raise FileNotSupportedError("not a FIT file!")
+
+    header_size = file_content[0]
+    data_size = struct.unpack("<I", file_content[4:8])[0]
+    hrv_offsets = _scan_fit_records(
+        file_content, header_size, min(header_size + data_size, len(file_content))
+    )
+
+    raw = np.frombuffer(file_content, dtype=np.uint8)
+    rri, rri_offsets = [], []
+    for (size, big_endian), offsets in hrv_offsets.items():
+        offsets = np.array(offsets)[:, np.newaxis]
+        dtype = ">u2" if big_endian else "<u2"
+        rri.append(raw[offsets + np.arange(size)].view(dtype).ravel())
+        rri_offsets.append((offsets + np.arange(0, size - 1, 2)).ravel())
+
+    if rri:
+        # Messages of different definitions are decoded apart, the offsets
+        # in the file restore the order of the beats
+        order = np.argsort(np.concatenate(rri_offsets), kind="stable")
+        rri = np.concatenate(rri)[order]
+    else:
+        rri = np.array([])
+    rri = rri[rri != _FIT_INVALID_UINT16]
+    if len(rri) == 0:
+        raise EmptyFileError("empty file!")
+
+    return RRi(rri.astype(np.float64))
+
+
+def _scan_fit_records(file_content, position, end):
+    # local message type -> (message size, HRV time field offset and size)
+    definitions = {}
+    # (field size, big endian) -> offsets of the HRV time fields
+    hrv_offsets = {}
+    while position < end:
+        record_header = file_content[position]
+        position += 1
+        if record_header & 0x80:
+            # Compressed timestamp header, always a data message
+            local_type = (record_header >> 5) & 0x03
+        elif record_header & 0x40:
+            local_type = record_header & 0x0F
+            big_endian = file_content[position + 1] == 1
+            global_type = struct.unpack(
+                ">H" if big_endian else "<H", file_content[position + 2 : position + 4]
+            )[0]
+            n_fields = file_content[position + 4]
+            fields = file_content[position + 5 : position + 5 + 3 * n_fields]
+            position += 5 + 3 * n_fields
+
+            size = sum(fields[1::3])
+            hrv_field = None
+            if global_type == _FIT_HRV_MESSAGE:
+                field_offset = 0
+                for field_number, field_size in zip(fields[::3], fields[1::3]):
+                    if field_number == _FIT_HRV_TIME_FIELD:
+                        hrv_field = (field_offset, field_size, big_endian)
+                        break
+                    field_offset += field_size
+
+            if record_header & 0x20:
+                # Developer data fields
+                n_dev_fields = file_content[position]
+                size += sum(file_content[position + 2 : position + 1 + 3 * n_dev_fields : 3])
+                position += 1 + 3 * n_dev_fields
+
+            definitions[local_type] = (size, hrv_field)
+            continue
+        else:
+            local_type = record_header & 0x0F
+
+        try:
+            size, hrv_field = definitions[local_type]
+        except KeyError:
+            raise FileNotSupportedError("data message without definition!")
+
+        if position + size > end:
+            break
+
+        if hrv_field is not None:
+            field_offset, field_size, big_endian = hrv_field
+            hrv_offsets.setdefault((field_size, big_endian), []).append(
+                position + field_offset
+            )
+        position += size
+
+    return hrv_offsets
+
+
+_READERS = {
+    ".txt": read_from_text,
+    ".hrm": read_from_hrm,
+    ".csv": read_from_csv,
+    ".atr": read_from_wfdb,
+    ".edf": read_from_edf,
+    ".bdf": read_from_edf,
+    ".fit": read_from_fit,
+}
+
+
+def read_file(pathname, member=None, **kwargs):
+    """
+    Read the RRi series of a file with the reader matching its extension.
+    See `read_many` for the supported extensions.
+
+    Parameters
+    ----------
+    pathname : str
+        path to the file or to the zip archive containing it
+    member : str, optional
+        name of the file in the zip archive `pathname`. Defaults to None
+    kwargs : key, value mappings
+        keyword arguments passed to the reader
+
+    Returns
+    -------
+    rri : RRi
+        RRi series of the file
+
+    Raises
+    ------
+    FileNotSupportedError
+        if the extension of the file is not supported
+
+    Examples
+    --------
+    >>> from hrv.io import read_file
+    >>> read_file('/path/to/cohort.zip', member='subject_1.hrm')
+    RRi array([904., 913., ..., 808.])
+    """
+    reader = _reader_for(member or pathname)
+    if member is None:
+        return reader(pathname, **kwargs)
+
+    with zipfile.ZipFile(pathname) as archive, archive.open(member) as fileobj:
+        return reader(fileobj, **kwargs)
+
+
+def list_files(source):
+    """
+    List the files with a supported extension of a directory, a zip archive
+    or a glob pattern, in sorted order. See `read_many`.
+
+    Parameters
+    ----------
+    source : str
+        path to a directory (searched recursively), to a zip archive or a
+        glob pattern (e.g. 'data/**/*.hrm')
+
+    Returns
+    -------
+    files : generator
+        (name, pathname, member) of each file, where name is relative to the
+        directory or the zip archive and member is the name of the file in
+        the zip archive, or None. `read_file(pathname, member)` reads the
+        file
+    """
+    for name, pathname, member in _list_files(source):
+        if _file_extension(name) in _READERS:
+            yield name, pathname, member
+
+
+def read_many(
+    source, max_workers=None, use_processes=False, executor=None, reader_kwargs=None
+):
+    """
+    Read the RRi series of many files concurrently. Each file is read with
+    the reader matching its extension (compressed files are matched by the
+    extension before the compression one, e.g. rri.txt.gz):
+        - .txt: read_from_text
+        - .hrm: read_from_hrm
+        - .csv: read_from_csv
+        - .atr: read_from_wfdb
+        - .edf, .bdf: read_from_edf
+        - .fit: read_from_fit
+    Files with other extensions are ignored.
+
+    Parameters
+    ----------
+    source : str
+        path to a directory (searched recursively), to a zip archive or a
+        glob pattern (e.g. 'data/**/*.hrm')
+    max_workers : int, optional
+        number of workers used to read the files. See
+        concurrent.futures.Executor for more information. Defaults to None
+    use_processes : boolean, optional
+        If true, the files are read in a process pool instead of a thread
+        pool. Defaults to False
+    executor : concurrent.futures.Executor, optional
+        executor used to read the files. If provided, `max_workers` and
+        `use_processes` are ignored. Defaults to None
+    reader_kwargs : dict, optional
+        keyword arguments passed to the readers, indexed by file extension,
+        e.g. {'.csv': {'row_offset': 1}, '.atr': {'fs': 360}}.
+        Defaults to None
+
+    Returns
+    -------
+    rris : OrderedDict
+        RRi series of the successfully read files, indexed by their names
+        (relative to the directory or the zip archive) in sorted order
+    errors : OrderedDict
+        exceptions raised while reading the remaining files, indexed by
+        their names
+
+    See Also
+    -------
+    read_from_text, read_from_hrm, read_from_csv, read_from_wfdb,
+    read_from_edf, read_from_fit
+
+    Examples
+    --------
+    >>> from hrv.io import read_many
+    >>> rris, errors = read_many('/path/to/cohort/', use_processes=True)
+    >>> rris
+    OrderedDict([('subject_1.txt', RRi array([1114., 1113., ..., 1062.])),
+                 ('subject_2.hrm', RRi array([904., 913., ..., 808.]))])
+    >>> errors
+    OrderedDict([('subject_3.txt', EmptyFileError('empty file!'))])
+    """
+    reader_kwargs = reader_kwargs or {}
+    tasks = OrderedDict(
+        (name, (pathname, member, reader_kwargs.get(_file_extension(name), {})))
+        for name, pathname, member in list_files(source)
+    )
+
+    own_executor = executor is None
+    if own_executor:
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        executor = pool(max_workers=max_workers)
+
+    try:
+        futures = [
+            executor.submit(read_file, pathname, member, **kwargs)
+            for pathname, member, kwargs in tasks.values()
+        ]
+        rris, errors = OrderedDict(), OrderedDict()
+        for name, future in zip(tasks, futures):
+            try:
+                rris[name] = future.result()
+            except Exception as error:
+                errors[name] = error
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return rris, errors
+
+
+def _list_files(source):
+    if os.path.isdir(source):
+        pathnames = [
+            os.path.join(root, filename)
+            for root, _, filenames in os.walk(source)
+            for filename in filenames
+        ]
+        for pathname in sorted(pathnames):
+            yield os.path.relpath(pathname, source), pathname, None
+    elif os.path.isfile(source) and zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            members = [info.filename for info in archive.infolist() if not info.is_dir()]
+        for member in sorted(members):
+            yield member, source, member
+    else:
+        for pathname in sorted(glob.glob(source, recursive=True)):
+            if os.path.isfile(pathname):
+                yield pathname, pathname, None
+
+
+def _file_extension(pathname):
+    root, extension = os.path.splitext(pathname.lower())
+    if extension in _COMPRESSED_EXTENSIONS:
+        extension = os.path.splitext(root)[1]
+
+    return extension
+
+
+def _reader_for(pathname):
+    try:
+        return _READERS[_file_extension(pathname)]
+    except KeyError:
+        raise FileNotSupportedError(
+            "file extension of `{}` not supported".format(pathname)
+        )
+
+
+def write_to_text(rri, pathname, fmt="%.10g"):
+    """
+    Write RRi series to text files (*.txt) in a single column document.
+    See `read_from_text` for more information about the file format.
+
+    Parameters
+    ----------
+    rri : array_like
+        sequence containing the RRi series
+    pathname : str or file-like object
+        string containing the path to the file or a file-like object.
+        If the path ends with .gz the file is gzip compressed
+    fmt : str, optional
+        format of the RRi values. Defaults to '%.10g'
+
+    See Also
+    -------
+    write_to_csv, write_to_hrm, read_from_text
+
+    Examples
+    --------
+    >>> from hrv.io import write_to_text
+    >>> from hrv.sampledata import load_rest_rri
+    >>> rri = load_rest_rri()
+    >>> write_to_text(rri, '/path/to/file.txt')
+    """
+    np.savetxt(pathname, _rri_values(rri), fmt=fmt)
+
+
+def write_to_csv(rri, pathname, time=True, sep=",", header=False, fmt="%.10g"):
+    """
+    Write RRi series to CSV files (*.csv). The RRi values are written in the
+    first column and the time information in the second one.
+    See `read_from_csv` for more information about the file format.
+
+    Parameters
+    ----------
+    rri : array_like
+        sequence containing the RRi series
+    pathname : str or file-like object
+        string containing the path to the file or a file-like object.
+        If the path ends with .gz the file is gzip compressed
+    time : boolean, optional
+        If true, time information is written in the second column. When
+        `rri` is not an RRi instance, time is created using the cumulative
+        sum of the RRi series. Defaults to True
+    sep : char, optional
+        delimiter of the columns. Defaults to ','
+    header : boolean, optional
+        If true, the first row contains the columns names. Defaults to False
+    fmt : str, optional
+        format of the RRi and time values. Defaults to '%.10g'
+
+    See Also
+    -------
+    write_to_text, write_to_hrm, read_from_csv
+
+    Examples
+    --------
+    >>> from hrv.io import write_to_csv
+    >>> from hrv.sampledata import load_rest_rri
+    >>> rri = load_rest_rri()
+    >>> write_to_csv(rri, '/path/to/file.csv')
+    """
+    if not isinstance(rri, RRi):
+        rri = RRi(rri)
+
+    columns = ["rri"]
+    data = rri.values[:, np.newaxis]
+    if time:
+        columns.append("time")
+        data = np.column_stack((rri.values, rri.time))
+
+    np.savetxt(
+        pathname,
+        data,
+        fmt=fmt,
+        delimiter=sep,
+        header=sep.join(columns) if header else "",
+        comments="",
+    )
+
+
+def write_to_hrm(rri, pathname):
+    """
+    Write RRi series to Polar file format (*.hrm). Only the sections needed
+    to store the RRi series are written and the RRi values are rounded to
+    the closest integer.
+    See `read_from_hrm` for more information about the file format.
+
+    Parameters
+    ----------
+    rri : array_like
+        sequence containing the RRi series
+    pathname : str or file-like object
+        string containing the path to the file or a file-like object.
+        If the path ends with .gz the file is gzip compressed
+
+    See Also
+    -------
+    write_to_text, write_to_csv, read_from_hrm
+
+    Reference
+    --------
+        https://www.polar.com/sites/default/files/Polar_HRM_file%20format.pdf
+
+    Examples
+    --------
+    >>> from hrv.io import write_to_hrm
+    >>> from hrv.sampledata import load_rest_rri
+    >>> rri = load_rest_rri()
+    >>> write_to_hrm(rri, '/path/to/file.hrm')
+    """
+    values = _rri_values(rri)
+    minutes, seconds = divmod(values.sum() / 1000.0, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    header = (
+        "[Params]\n"
+        "Version=106\n"
+        "Length={:02d}:{:02d}:{:04.1f}\n"
+        # Interval 238 means the HR data contains RRi values
+        "Interval=238\n"
+        "\n"
+        "[HRData]"
+    ).format(hours, minutes, seconds)
+    np.savetxt(pathname, np.round(values), fmt="%d", header=header, comments="")
+
+
+def write_results(results, pathname, sep=",", fmt="%.10g"):
+    """
+    Write analysis results in a table, one row per result and one column
+    per index. The rows are formatted in bulk by numpy.savetxt.
+
+    Parameters
+    ----------
+    results : dict, list of dict, dict of dict or TimeVarying
+        results to be written:
+            - dict: results of a single analysis (e.g. `time_domain`)
+            - list of dict: results of many analyses
+            - dict of dict: results of many analyses indexed by name (e.g.
+              the name of the files of a cohort), written in the first
+              column
+            - TimeVarying: results of the non-stationary analysis, the
+              median time of each segment is written in the first column
+    pathname : str or file-like object
+        string containing the path to the file or a file-like object.
+        If the path ends with .gz the file is gzip compressed
+    sep : char, optional
+        delimiter of the columns. Defaults to ','
+    fmt : str, optional
+        format of the indices values. Defaults to '%.10g'
+
+    See Also
+    -------
+    write_to_text, write_to_csv
+
+    Examples
+    --------
+    >>> from hrv.classical import time_domain
+    >>> from hrv.io import read_many, write_results
+    >>> rris, errors = read_many('/path/to/cohort/')
+    >>> results = {name: time_domain(rri) for name, rri in rris.items()}
+    >>> write_results(results, '/path/to/results.csv')
+    """
+    names, columns, data = _results_table(results)
+    if names is None:
+        np.savetxt(
+            pathname, data, fmt=fmt, delimiter=sep, header=sep.join(columns), comments=""
+        )
+        return
+
+    # Format the numeric block in bulk and prepend the names to each row
+    buffer = io.StringIO()
+    np.savetxt(buffer, data, fmt=fmt, delimiter=sep)
+    rows = buffer.getvalue().splitlines()
+    content = "\n".join(
+        [sep.join(["name"] + columns)]
+        + [str(name) + sep + row for name, row in zip(names, rows)]
+    )
+    _write_text(pathname, content + "\n")
+
+
+def _results_table(results):
+    # Return the names of the results (if any), the indices names and a
+    # (n_results, n_indices) array with the indices values
+    names = None
+    if isinstance(results, TimeVarying):
+        columns = ["time"] + results.columns
+        data = np.column_stack([results.build_xaxis(), results.values])
+    else:
+        if isinstance(results, dict):
+            first = next(iter(results.values()), None)
+            if isinstance(first, dict):
+                names = list(results.keys())
+                results = list(results.values())
+            else:
+                results = [results]
+
+        columns = list(results[0].keys()) if results else []
+        data = np.array(
+            [[result[column] for column in columns] for result in results],
+            dtype=np.float64,
+        ).reshape(len(results), len(columns))
+
+    return names, columns, data
+
+
+def _rri_values(rri):
+    return rri.values if isinstance(rri, RRi) else np.asarray(rri, dtype=np.float64)
+
+
+def _write_text(pathname, content):
+    # Same conventions of numpy.savetxt: file-like objects and .gz paths
+    if hasattr(pathname, "write"):
+        pathname.write(content)
+        return
+
+    pathname = os.fspath(pathname)
+    opener = gzip.open if pathname.endswith(".gz") else open
+    with opener(pathname, "wt") as fileobj:
+        fileobj.write(content)
+
+
+_ARROW_DETRENDED = b"hrv.detrended"
+_ARROW_INTERPOLATED = b"hrv.interpolated"
+
+
+def rri_to_arrow(rri):
+    """
+    Convert an RRi series to an Apache Arrow table with the `rri` and `time`
+    columns. The columns share the memory of the RRi series (no copy) and
+    the detrended and interpolated flags are stored in the schema metadata.
+    Requires the pyarrow package.
+
+    Parameters
+    ----------
+    rri : array_like
+        sequence containing the RRi series
+
+    Returns
+    -------
+    table : pyarrow.Table
+        table containing the RRi values and the time information
+
+    See Also
+    -------
+    rri_from_arrow, results_to_arrow, write_to_parquet
+
+    Examples
+    --------
+    >>> from hrv.io import rri_to_arrow
+    >>> from hrv.sampledata import load_rest_rri
+    >>> rri = load_rest_rri()
+    >>> rri_to_arrow(rri)
+    pyarrow.Table
+    rri: double
+    time: double
+    """
+    pa = _import_pyarrow()
+    if not isinstance(rri, RRi):
+        rri = RRi(rri)
+
+    metadata = {
+        _ARROW_DETRENDED: str(rri.detrended).lower(),
+        _ARROW_INTERPOLATED: str(rri.interpolated).lower(),
+    }
+    return pa.table(
+        [pa.array(rri.values), pa.array(rri.time)],
+        names=["rri", "time"],
+        metadata=metadata,
+    )
+
+
+def rri_from_arrow(table):
+    """
+    Convert an Apache Arrow table created by `rri_to_arrow` back into an RRi
+    series. Requires the pyarrow package.
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        table containing the `rri` and `time` columns
+
+    Returns
+    -------
+    rri : RRi array
+        instance of the RRi class (or RRiDetrended, according to the table
+        metadata) containing the RRi values
+
+    See Also
+    -------
+    rri_to_arrow, read_from_parquet
+
+    Examples
+    --------
+    >>> from hrv.io import rri_from_arrow, rri_to_arrow
+    >>> from hrv.sampledata import load_rest_rri
+    >>> rri_from_arrow(rri_to_arrow(load_rest_rri()))
+    RRi array([1114., 1113., 1066., ...,  956., 1018., 1021.])
+    """
+    metadata = table.schema.metadata or {}
+    values = table.column("rri").to_numpy()
+    time = table.column("time").to_numpy()
+    if metadata.get(_ARROW_DETRENDED) == b"true":
+        interpolated = metadata.get(_ARROW_INTERPOLATED) == b"true"
+        return RRiDetrended(values, time, interpolated=interpolated)
+
+    return RRi(values, time)
+
+
+def results_to_arrow(results):
+    """
+    Convert analysis results to an Apache Arrow table, one row per result
+    and one column per index. Requires the pyarrow package.
+
+    Parameters
+    ----------
+    results : dict, list of dict, dict of dict or TimeVarying
+        results to be converted. See `write_results` for more information
+
+    Returns
+    -------
+    table : pyarrow.Table
+        table containing the results
+
+    See Also
+    -------
+    rri_to_arrow, write_results, write_to_parquet
+
+    Examples
+    --------
+    >>> from hrv.classical import time_domain
+    >>> from hrv.io import read_many, results_to_arrow
+    >>> rris, errors = read_many('/path/to/cohort/')
+    >>> results_to_arrow({name: time_domain(rri) for name, rri in rris.items()})
+    pyarrow.Table
+    name: string
+    rmssd: double
+    ...
+    """
+    pa = _import_pyarrow()
+    names, columns, data = _results_table(results)
+    # Fortran order keeps each index contiguous, so the columns are not copied
+    data = np.asfortranarray(data)
+    arrays = [pa.array(data[:, i]) for i in range(len(columns))]
+    if names is not None:
+        arrays.insert(0, pa.array([str(name) for name in names]))
+        columns = ["name"] + columns
+
+    return pa.table(arrays, names=columns)
+
+
+def write_to_parquet(data, pathname, **kwargs):
+    """
+    Write an RRi series or analysis results to an Apache Parquet file.
+    Requires the pyarrow package.
+
+    Parameters
+    ----------
+    data : RRi, dict, list of dict, dict of dict or TimeVarying
+        RRi series (see `rri_to_arrow`) or analysis results (see
+        `results_to_arrow`) to be written
+    pathname : str
+        string containing the path to the file
+    kwargs : dict, optional
+        keyword arguments passed to pyarrow.parquet.write_table
+
+    See Also
+    -------
+    read_from_parquet, rri_to_arrow, results_to_arrow
+
+    Examples
+    --------
+    >>> from hrv.io import write_to_parquet
+    >>> from hrv.sampledata import load_rest_rri
+    >>> write_to_parquet(load_rest_rri(), '/path/to/file.parquet')
+    """
+    pa = _import_pyarrow()
+    from pyarrow import parquet
+
+    if isinstance(data, pa.Table):
+        table = data
+    elif isinstance(data, RRi):
+        table = rri_to_arrow(data)
+    else:
+        table = results_to_arrow(data)
+
+    parquet.write_table(table, pathname, **kwargs)
+
+
+def read_from_parquet(pathname):
+    """
+    Read RRi series from Apache Parquet files written by `write_to_parquet`.
+    Requires the pyarrow package.
+
+    Parameters
+    ----------
+    pathname : str or file-like object
+        string containing the path to the file or a file-like object
+
+    Returns
+    -------
+    rri : RRi array
+        instance of the RRi class containing the RRi values
+
+    See Also
+    -------
+    write_to_parquet, rri_from_arrow
+
+    Examples
+    --------
+    >>> from hrv.io import read_from_parquet
+    >>> rri = read_from_parquet('/path/to/file.parquet')
+    RRi array([1114., 1113., 1066., 1119., 1062.])
+    """
+    _import_pyarrow()
+    from pyarrow import parquet
+
+    return rri_from_arrow(parquet.read_table(pathname, columns=["rri", "time"]))
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "pyarrow is required for Apache Arrow and Parquet support. "
+            "Install it with `pip install pyarrow`"
+        )
+
+    return pyarrow
@@ -1,43 +1,139 @@
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import matplotlib.pyplot as plt
 import numpy as np
+from scipy.fftpack import next_fast_len
+from scipy.signal import lfilter
 
-from hrv.classical import time_domain
-from hrv.rri import RRi
+from hrv.classical import _auc, _band_indices, time_domain
+from hrv.rri import RRi, _time_split_bounds
+from hrv.utils import _create_interp_time, _interpolate_rri
 
 
-__all__ = ["time_varying"]
+__all__ = ["time_varying", "time_varying_ar", "time_varying_wavelet"]
+
+YLABELS = {
+    "rmssd": "RMSSD (ms)",
+    "sdnn": "SDNN (ms²)",
+    "sdsd": "SDSD (ms²)",
+    "nn50": "nn50 (count)",
+    "pnn50": "pnn50 (%)",
+    "mrri": "mean RRi (ms)",
+    "mhr": "mean HR (bpm)",
+    "total_power": "Total Power (ms²)",
+    "vlf": "VLF (ms²)",
+    "lf": "LF (ms²)",
+    "hf": "HF (ms²)",
+    "lf_hf": "LF/HF",
+    "lfnu": "LFnu (nu)",
+    "hfnu": "HFnu (nu)",
+    "sd1": "SD1 (ms)",
+    "sd2": "SD2 (ms)",
+}
 
 
 class TimeVarying:
-    def __init__(self, rri, results, rri_segments, seg_size, overlap):
+    """Indices of running segments of an RRi series
+
+    The indices are stored in `data`, one array per index keeping its type
+    (e.g. nn50 is an integer count), and the segments as their bounds in the
+    analysed RRi series. The columns as lists (e.g. `results.rmssd`) and the
+    results of each segment are built on first access, the segments
+    themselves on every access.
+
+    Parameters
+    ----------
+    rri : hrv.rri.RRi
+        the analysed RRi series
+    results : list of dict or numpy.ndarray
+        indices of each segment, either as dictionaries or as a
+        (segments, indices) array whose columns are named by `columns`
+    rri_segments : list of RRi, optional
+        the analysed segments. Not needed if `bounds` is provided
+    seg_size : Number
+        the segment size in seconds
+    overlap : Number
+        the size of overlap between adjacents segments in seconds
+    columns : list, optional
+        names of the indices of a `results` array
+    bounds : tuple of numpy.ndarray, optional
+        start and end (exclusive) indices of the segments in `rri`
+    """
+
+    def __init__(
+        self, rri, results, rri_segments, seg_size, overlap, columns=None, bounds=None
+    ):
         self.rri = rri
-        self.results = results
-        self.transponsed = self._transform_results(results)
-        self.rri_segments = rri_segments
+        if columns is None:
+            columns = list(results[0].keys())
+            results = [[item[key] for key in columns] for item in results]
+        self.columns = list(columns)
+        if isinstance(results, np.ndarray):
+            data = [results[:, i] for i in range(len(self.columns))]
+        else:
+            data = zip(*results)
+        self.data = {key: np.asarray(column) for key, column in zip(self.columns, data)}
+        self.bounds = None if bounds is None else np.array(bounds, dtype=np.intp)
+        self._segments = rri_segments
         self.seg_size = seg_size
         self.overlap = overlap
+        self._values = None
+        self._results = None
+        self._transponsed = None
+
+    @property
+    def values(self):
+        """The indices as a (segments, indices) float array"""
+        if self._values is None:
+            self._values = np.zeros((len(self), len(self.columns)))
+            for i, key in enumerate(self.columns):
+                self._values[:, i] = self.data[key]
+        return self._values
 
-    def _transform_results(self, results):
-        return {key: [item[key] for item in results] for key in results[0].keys()}
+    @property
+    def results(self):
+        if self._results is None:
+            columns = [self.transponsed[key] for key in self.columns]
+            self._results = [dict(zip(self.columns, row)) for row in zip(*columns)]
+        return self._results
+
+    @property
+    def transponsed(self):
+        if self._transponsed is None:
+            self._transponsed = {
+                key: column.tolist() for key, column in self.data.items()
+            }
+        return self._transponsed
+
+    @property
+    def rri_segments(self):
+        if self.bounds is None:
+            return self._segments
+        return [_segment(self.rri, start, end) for start, end in self.bounds.T]
+
+    def __len__(self):
+        return len(self.data[self.columns[0]]) if self.columns else 0
 
     def ylabel_mapper(self, index):
-        mapper = {
-            "rmssd": "RMSSD (ms)",
-            "sdnn": "SDNN (ms²)",
-            "sdsd": "SDSD (ms²)",
-            "nn50": "nn50 (count)",
-            "pnn50": "pnn50 (%)",
-            "mrri": "mean RRi (ms)",
-            "mhr": "mean HR (bpm)",
-        }
-        return mapper.get(index)
+        return YLABELS.get(index)
 
     def build_xaxis(self):
-        return [np.median(r.time) for r in self.rri_segments]
+        if self.bounds is None:
+            return [np.median(r.time) for r in self._segments]
+
+        # Median of the sorted time of each segment
+        starts, ends = self.bounds
+        time = self.rri.time
+        lower = time[np.maximum((starts + ends - 1) // 2, 0)]
+        upper = time[np.minimum((starts + ends) // 2, len(time) - 1)]
+        return np.where(ends > starts, (lower + upper) / 2, np.nan).tolist()
 
     def __getattr__(self, index):
+        # Attributes not set yet, e.g. while unpickling
+        if index.startswith("_") or index in ("columns", "data", "values"):
+            raise AttributeError(index)
         try:
             return self.transponsed[index]
         except KeyError:
@@ -62,16 +158,435 @@ class TimeVarying:
         return fig, ax
 
     def __str__(self):
-        return f"Time Varying {self.seg_size}:{self.overlap} - #{len(self.results)}"
+        return f"Time Varying {self.seg_size}:{self.overlap} - #{len(self)}"
+
+
+class TimeFrequency:
+    """Frequency domain indices at every sample of an interpolated RRi series
+
+    Parameters
+    ----------
+    rri : hrv.rri.RRi
+        the analysed RRi series
+    time : numpy.ndarray
+        time of the samples of the interpolated RRi series in seconds
+    results : dict
+        indices, each an array with one value per sample
+    method : str
+        name of the time-frequency method
+    """
+
+    def __init__(self, rri, time, results, method):
+        self.rri = rri
+        self.time = time
+        self.results = results
+        self.method = method
+
+    def ylabel_mapper(self, index):
+        return YLABELS.get(index)
+
+    def __getattr__(self, index):
+        # Avoid recursion while unpickling, when results is not set yet
+        if index == "results":
+            raise AttributeError(index)
+        try:
+            return self.results[index]
+        except KeyError:
+            raise ValueError(f"index `{index}` does not exist.")
+
+    def __len__(self):
+        return len(self.time)
+
+    def plot(self, ax=None, index="lf_hf", *args, **kwargs):
+        fig = None
+        if ax is None:
+            fig, ax = plt.subplots(1, 1)
+
+        ax.plot(self.time, self.__getattr__(index), *args, **kwargs)
+        ax.set(xlabel="Time (s)", ylabel=self.ylabel_mapper(index))
+        plt.show(block=False)
+
+        return fig, ax
+
+    def plot_together(self, ax=None, index="lf_hf", *args, **kwargs):
+        fig, ax = self.rri.plot(alpha=0.7, color="grey")
+        ax1 = ax.twinx()
+        self.plot(ax=ax1, index=index, *args, **kwargs)
+
+        return fig, ax
+
+    def __str__(self):
+        return f"Time Frequency {self.method} - #{len(self.time)}"
+
+
+def time_varying(
+    rri,
+    seg_size,
+    overlap,
+    keep_last=False,
+    analysis=time_domain,
+    n_jobs=None,
+    executor=None,
+    **kwargs
+):
+    """
+    Apply an analysis function to running segments of an RRi series.
+
+    The segments can be analysed concurrently in threads, which is worth it
+    for the frequency domain analysis as interpolation and FFT routines
+    release the GIL. The results keep the order of the segments.
 
+    Parameters
+    ----------
+    rri : array_like
+        sequence containing the RRi series
+    seg_size : Number
+        the segment size in seconds
+    overlap : Number
+        the size of overlap between adjacents segments in seconds
+    keep_last : boolean, optional
+        If set to True the last segment is analysed even if smaller than
+        `seg_size`, defaults to False
+    analysis : function, optional
+        function applied to each segment and returning a dictionary of
+        indices, e.g. `frequency_domain` or `non_linear`.
+        Defaults to `time_domain`
+    n_jobs : int, optional
+        number of threads analysing the segments. If None or 1 the segments
+        are analysed serially. Defaults to None
+    executor : concurrent.futures.Executor, optional
+        executor used to analyse the segments. If provided, `n_jobs` is
+        ignored. Defaults to None
+    kwargs : dict, optional
+        keyword arguments passed to `analysis`
 
-def time_varying(rri, seg_size, overlap, keep_last=False):
+    Returns
+    -------
+    results : TimeVarying
+
+    Examples
+    --------
+    >>> from hrv.classical import frequency_domain
+    >>> from hrv.nonstationary import time_varying
+    >>> from hrv.sampledata import load_exercise_rri
+    >>> rri = load_exercise_rri()
+    >>> results = time_varying(rri, seg_size=60, overlap=30,
+    ...                        analysis=frequency_domain, n_jobs=4, nperseg=128)
+    >>> results.plot(index="lf_hf")
+    """
+    if not isinstance(rri, RRi):
+        rri = RRi(rri)
+
+    bounds = _time_split_bounds(rri.time, seg_size, overlap, keep_last)
+    # Segments are created as they are analysed and not kept
+    segments = (_segment(rri, start, end) for start, end in zip(*bounds))
+    func = partial(analysis, **kwargs) if kwargs else analysis
+    if executor is not None:
+        results = list(executor.map(func, segments))
+    elif n_jobs is not None and n_jobs > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(func, segments))
+    else:
+        results = [func(segment) for segment in segments]
+
+    columns = list(results[0].keys())
+    return TimeVarying(
+        rri,
+        [[result[key] for key in columns] for result in results],
+        None,
+        seg_size=seg_size,
+        overlap=overlap,
+        columns=columns,
+        bounds=bounds,
+    )
+
+
+def _segment(rri, start, end):
+    return type(rri)._from_arrays(
+        rri.values[start:end].copy(),
+        rri.time[start:end].copy(),
+        rri.detrended,
+        rri.interpolated,
+    )
+
+
+def time_varying_ar(
+    rri,
+    order=16,
+    fs=4.0,
+    interp_method="cubic",
+    update_coefficient=0.005,
+    nfft=1024,
+    vlf_band=(0, 0.04),
+    lf_band=(0.04, 0.15),
+    hf_band=(0.15, 0.4),
+):
+    """
+    Estimate the frequency domain indices at every sample of the interpolated
+    RRi series with a time-varying Autoregressive (AR) model.
+
+    The AR coefficients are modelled as a random walk and estimated with a
+    Kalman filter followed by a Rauch-Tung-Striebel smoother, i.e. one
+    forward and one backward pass over the samples instead of fitting an AR
+    model to each running segment. The process noise is proportional to the
+    covariance of the coefficients (a forgetting factor), which makes the
+    smoother an exponential average of the filtered coefficients backwards in
+    time. The variance of the prediction error is tracked the same way. The
+    PSD of each sample is calculated from its AR coefficients and the indices
+    are the area under the curve of the bands, as in
+    `hrv.classical.frequency_domain`.
+
+    Parameters
+    ----------
+    rri : array_like
+        sequence containing the RRi series
+    order : int, optional
+        order of the AR model. Defaults to 16
+    fs : float, optional
+        sampling frequency of the interpolated RRi series. Defaults to 4.0
+    interp_method : str {'cubic', 'linear'}, optional
+        interpolation function applied to the RRi series. Skipped if the RRi
+        series is already interpolated. Defaults to 'cubic'
+    update_coefficient : float, optional
+        one minus the forgetting factor, i.e. the weight of the newest sample
+        in the estimates. The bigger, the faster the PSD follows changes of
+        the series and the noisier the estimates. Defaults to 0.005
+    nfft : int, optional
+        number of points of the FFT grid the PSD is evaluated at.
+        Defaults to 1024
+    vlf_band, lf_band, hf_band : tuple, optional
+        frequency bands. See `hrv.classical.frequency_domain`
+
+    Returns
+    -------
+    results : TimeFrequency
+        total_power, vlf, lf, hf, lf_hf, lfnu and hfnu of each sample
+
+    References
+    ----------
+    - Tarvainen, M. P., Georgiadis, S. D., Ranta-aho, P. O., & Karjalainen,
+      P. A. (2006). Time-varying analysis of heart rate variability signals
+      with a Kalman smoother algorithm. Physiological Measurement, 27(3),
+      225-239.
+
+    Examples
+    --------
+    >>> from hrv.nonstationary import time_varying_ar
+    >>> from hrv.sampledata import load_exercise_rri
+    >>> rri = load_exercise_rri()
+    >>> results = time_varying_ar(rri, order=16)
+    >>> results.plot(index="lf_hf")
+    """
+    if not isinstance(rri, RRi):
+        rri = RRi(rri)
+
+    time, samples = _resample(rri, fs, interp_method)
+    if len(samples) <= order:
+        raise ValueError("The RRi series must have more samples than `order`")
+
+    # The filter works with the normalized series for any RRi scale
+    scale = np.std(samples)
+    samples = (samples - np.mean(samples)) / scale
+    coefficients, noise_variance = _kalman_smoother(
+        samples, order, update_coefficient
+    )
+
+    fxx = np.fft.rfftfreq(nfft, 1 / fs)
+    fxx = fxx[fxx < max(band[1] for band in (vlf_band, lf_band, hf_band))]
+    # e^(-j 2 pi f k / fs) of the lags 1..order
+    kernel = np.exp(-2j * np.pi * np.outer(np.arange(1, order + 1), fxx) / fs)
+    bands = []
+    for start in range(0, len(samples), _CHUNK_SIZE):
+        chunk = slice(start, start + _CHUNK_SIZE)
+        transfer = np.abs(1 - coefficients[chunk] @ kernel) ** 2
+        pxx = (2 * scale ** 2 / fs) * noise_variance[chunk, None] / transfer
+        bands.append(_auc(fxx, pxx, vlf_band, lf_band, hf_band))
+
+    results = {
+        key: np.concatenate([chunk_bands[key] for chunk_bands in bands])
+        for key in bands[0]
+    }
+    return TimeFrequency(rri, time, results, method="ar")
+
+
+def time_varying_wavelet(
+    rri,
+    fs=4.0,
+    interp_method="cubic",
+    omega0=6.0,
+    n_frequencies=128,
+    min_frequency=0.0033,
+    vlf_band=(0, 0.04),
+    lf_band=(0.04, 0.15),
+    hf_band=(0.15, 0.4),
+):
+    """
+    Estimate the frequency domain indices at every sample of the interpolated
+    RRi series with the continuous wavelet transform (Morlet wavelet).
+
+    Each frequency of the transform is a Gaussian band-pass filter applied in
+    the frequency domain followed by an inverse FFT. The squared modulus of
+    the coefficients is scaled by the bandwidth of each filter, giving a PSD
+    in ms²/Hz at every sample, and the indices are the area under the curve
+    of the bands, as in `hrv.classical.frequency_domain`. The series is
+    transformed in chunks extended by four widths of the longest wavelet on
+    each side (overlap-save) and the frequencies in blocks, accumulated into
+    the band powers, so besides the series and its indices memory does not
+    grow with the length of the recording, e.g. 24h Holter series.
+
+    Parameters
+    ----------
+    rri : array_like
+        sequence containing the RRi series
+    fs : float, optional
+        sampling frequency of the interpolated RRi series. Defaults to 4.0
+    interp_method : str {'cubic', 'linear'}, optional
+        interpolation function applied to the RRi series. Skipped if the RRi
+        series is already interpolated. Defaults to 'cubic'
+    omega0 : float, optional
+        central angular frequency of the Morlet wavelet. The bigger, the
+        better the frequency resolution and the worse the time resolution.
+        Defaults to 6.0
+    n_frequencies : int, optional
+        number of frequencies of the transform, logarithmically spaced from
+        `min_frequency` to the upper bound of the highest band.
+        Defaults to 128
+    min_frequency : float, optional
+        lowest frequency of the transform in Hz, as the lowest band usually
+        starts at 0 Hz. Defaults to 0.0033 (upper bound of the ULF band)
+    vlf_band, lf_band, hf_band : tuple, optional
+        frequency bands. See `hrv.classical.frequency_domain`
+
+    Returns
+    -------
+    results : TimeFrequency
+        total_power, vlf, lf, hf, lf_hf, lfnu and hfnu of each sample
+
+    References
+    ----------
+    - Torrence, C., & Compo, G. P. (1998). A practical guide to wavelet
+      analysis. Bulletin of the American Meteorological Society, 79(1),
+      61-78.
+
+    Examples
+    --------
+    >>> from hrv.nonstationary import time_varying_wavelet
+    >>> from hrv.sampledata import load_exercise_rri
+    >>> rri = load_exercise_rri()
+    >>> results = time_varying_wavelet(rri)
+    >>> results.plot(index="lf_hf")
+    """
     if not isinstance(rri, RRi):
         rri = RRi(rri)
 
-    segments = rri.time_split(seg_size=seg_size, overlap=overlap, keep_last=keep_last)
-    results = []
-    for segment in segments:
-        results.append(time_domain(segment))
+    time, samples = _resample(rri, fs, interp_method)
+    bands = (vlf_band, lf_band, hf_band)
+    frequencies = np.geomspace(
+        min_frequency, max(band[1] for band in bands), n_frequencies, endpoint=False
+    )
+
+    # The wavelets are negligible beyond four widths, so each chunk of the
+    # series only needs that margin of its neighbours (zeros at both ends)
+    margin = int(np.ceil(4 * omega0 / (2 * np.pi * frequencies[0]) * fs))
+    chunk_size = max(_CHUNK_SIZE, 2 * margin)
+    n_fft = next_fast_len(min(chunk_size, len(samples)) + 2 * margin)
+    fft_frequencies = np.fft.rfftfreq(n_fft, 1 / fs)
+    padded = np.zeros(len(samples) + 2 * margin)
+    padded[margin:-margin] = samples - np.mean(samples)
+
+    # The band powers are linear in the PSD of each frequency: the weights of
+    # the trapezoidal method within the bands
+    weights = np.zeros((len(bands), n_frequencies))
+    for row, band in enumerate(bands):
+        indexes = np.logical_and(frequencies >= band[0], frequencies < band[1])
+        weights[row, indexes] = np.trapz(
+            np.eye(indexes.sum()), frequencies[indexes], axis=-1
+        )
+
+    blocks = []
+    block_size = max(1, 64 * _CHUNK_SIZE // n_fft)
+    for start in range(0, n_frequencies, block_size):
+        block = slice(start, start + block_size)
+        scales = omega0 / (2 * np.pi * frequencies[block])
+        filters = np.exp(
+            -0.5 * (2 * np.pi * np.outer(scales, fft_frequencies) - omega0) ** 2
+        )
+        # Equivalent noise bandwidth of the filters over positive frequencies
+        bandwidths = np.sum(filters ** 2, axis=1) * fft_frequencies[1]
+        blocks.append((block, filters, bandwidths))
+
+    band_powers = np.zeros((len(bands), len(samples)))
+    for start in range(0, len(samples), chunk_size):
+        end = min(start + chunk_size, len(samples))
+        spectrum = np.fft.rfft(padded[start : end + 2 * margin], n_fft)
+        for block, filters, bandwidths in blocks:
+            analytic = np.zeros((len(filters), n_fft), dtype=np.complex128)
+            analytic[:, : len(fft_frequencies)] = spectrum * filters
+            coefficients = np.fft.ifft(analytic, axis=1)[
+                :, margin : margin + end - start
+            ]
+            # |W|² estimates half the one-sided PSD times the bandwidth
+            pxx = 2 * np.abs(coefficients) ** 2 / bandwidths[:, None]
+            band_powers[:, start:end] += weights[:, block] @ pxx
+
+    results = _band_indices(*band_powers)
+    return TimeFrequency(rri, time, results, method="wavelet")
+
+
+# Samples evaluated at once by the time-frequency methods, bounding memory
+_CHUNK_SIZE = 4096
+
+
+def _resample(rri, fs, interp_method):
+    if rri.interpolated:
+        return rri.time, rri.values
+
+    samples = _interpolate_rri(rri.values, rri.time, fs, interp_method)
+    return _create_interp_time(rri.time, fs), samples
+
+
+def _kalman_smoother(samples, order, update_coefficient):
+    n_samples = len(samples)
+    forgetting = 1 - update_coefficient
+    filtered = np.zeros((n_samples, order))
+    variances = np.ones(n_samples)
+
+    coefficients = np.zeros(order)
+    covariance = 100 * np.eye(order)
+    variance = 1.0
+    for n in range(order, n_samples):
+        # Previous samples, the most recent first
+        lagged = samples[n - order : n][::-1]
+        # Process noise Q = P (1 - forgetting) / forgetting
+        predicted = covariance / forgetting
+        gain = predicted @ lagged
+        gain /= 1 + lagged @ gain
+        error = samples[n] - lagged @ coefficients
+        coefficients = coefficients + gain * error
+        covariance = predicted - np.outer(gain, lagged @ predicted)
+        variance += update_coefficient * (error ** 2 - variance)
+
+        filtered[n] = coefficients
+        variances[n] = variance
+
+    # The first samples have no estimate of their own
+    filtered[:order] = filtered[order]
+    variances[:order] = variances[order]
 
-    return TimeVarying(rri, results, segments, seg_size=seg_size, overlap=overlap)
+    # Rauch-Tung-Striebel smoother: with Q proportional to P the smoother
+    # gain is `forgetting` times the identity, an exponential average of the
+    # filtered estimates backwards in time
+    smoothed = lfilter(
+        [update_coefficient],
+        [1, -forgetting],
+        filtered[::-1],
+        axis=0,
+        zi=forgetting * filtered[-1:],
+    )[0][::-1]
+    variances = lfilter(
+        [update_coefficient],
+        [1, -forgetting],
+        variances[::-1],
+        zi=forgetting * variances[-1:],
+    )[0][::-1]
+    return smoothed, variances
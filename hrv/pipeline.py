@@ -0,0 +1,329 @@
+"""
+Declarative analysis of RRi series.
+
+A `Pipeline` is declared once with the preprocessing steps (filters,
+resampling and detrending) and the indices to be calculated, and then
+applied to one or many RRi series. The steps work directly on the arrays of
+the RRi series, so no intermediate RRi object is created and validated
+between them.
+"""
+
+import json
+import math
+import time as _time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from hrv.classical import frequency_domain
+from hrv.detrend import _polynomial_detrend, _sg_detrend, _smoothness_priors
+from hrv.filters import _moving_average, _moving_median, _quotient, _threshold_filter
+from hrv.io import read_file
+from hrv.planner import NON_LINEAR, TIME_DOMAIN, _Graph
+from hrv.rri import RRi
+from hrv.utils import _create_interp_time, _interpolate_rri, _validate_choice
+
+__all__ = ["Pipeline", "analyse_file", "to_builtin"]
+
+FILTERS = OrderedDict(
+    [
+        ("quotient", _quotient),
+        ("moving_average", _moving_average),
+        ("moving_median", _moving_median),
+        ("threshold", _threshold_filter),
+    ]
+)
+DETRENDERS = OrderedDict(
+    [
+        ("polynomial", _polynomial_detrend),
+        ("smoothness_priors", _smoothness_priors),
+        ("savitzky_golay", _sg_detrend),
+    ]
+)
+INDICES = ("time", "frequency", "non_linear")
+
+
+class Pipeline:
+    """An RRi analysis pipeline.
+
+       The steps are applied in the following order:
+            - filters, in the declared order
+            - time domain and non-linear indices of the filtered RRi series
+            - resampling, detrending and frequency domain indices of the
+              filtered RRi series
+
+       Steps are declared by name, optionally with keyword arguments, e.g.
+       'quotient' or ('threshold', {'threshold': 'strong'}). As the pipeline
+       only holds names and arguments, it can be sent to worker processes
+       and the results are the same in every execution backend.
+
+    Parameters
+    ----------
+    filters : list, optional
+        filters applied to the RRi series: 'quotient', 'moving_average',
+        'moving_median' and 'threshold'. See `hrv.filters`. Defaults to ()
+    resample : float, optional
+        sampling frequency in which the filtered RRi series is resampled
+        before detrending. If None the RRi series is interpolated by
+        `frequency_domain`. Defaults to None
+    interp_method : str {'cubic', 'linear'}, optional
+        interpolation function used to resample the RRi series.
+        Defaults to 'cubic'
+    detrend : str or tuple, optional
+        detrend method applied before the frequency domain analysis:
+        'polynomial', 'smoothness_priors' and 'savitzky_golay'.
+        See `hrv.detrend`. Defaults to None
+    indices : list, optional
+        indices calculated: 'time', 'frequency' and 'non_linear'.
+        Defaults to all
+    frequency_kwargs : dict, optional
+        keyword arguments passed to `hrv.classical.frequency_domain`
+
+    Examples
+    --------
+    >>> from hrv.pipeline import Pipeline
+    >>> from hrv.sampledata import load_noisy_rri
+    >>> pipeline = Pipeline(filters=["quotient"], detrend="polynomial")
+    >>> pipeline.run(load_noisy_rri())
+    OrderedDict([('rmssd', 23.63...), ..., ('sd2', 99.04...)])
+    >>> pipeline.map(["/path/to/file_1.txt", "/path/to/file_2.hrm"],
+    ...              backend="process")
+    [OrderedDict([('rmssd', 55.13...), ...]), OrderedDict([...])]
+    """
+
+    def __init__(
+        self,
+        filters=(),
+        resample=None,
+        interp_method="cubic",
+        detrend=None,
+        indices=INDICES,
+        **frequency_kwargs
+    ):
+        self.filters = [_step(step, FILTERS) for step in filters]
+        self.resample = resample
+        self.interp_method = interp_method
+        self.detrend = None if detrend is None else _step(detrend, DETRENDERS)
+        self.indices = tuple(indices)
+        self.frequency_kwargs = frequency_kwargs
+
+        for index in self.indices:
+            _validate_choice(index, INDICES)
+
+    def preprocess(self, rri):
+        """
+        Return the RRi series after applying the filters
+
+        Parameters
+        ----------
+        rri : RRi, array_like or str
+            RRi series or path to a file containing the RRi series
+        """
+        rri = _to_rri(rri)
+        values, time = self._filter(rri.values, rri.time)
+        return RRi(values, time)
+
+    def run(self, rri):
+        """
+        Apply the pipeline to an RRi series and return a dictionary with the
+        calculated indices
+
+        Parameters
+        ----------
+        rri : RRi, array_like or str
+            RRi series or path to a file containing the RRi series
+        """
+        rri = _to_rri(rri)
+        return self._run(rri.values, rri.time)
+
+    def map(self, rris, backend="serial", n_jobs=None, executor=None):
+        """
+        Apply the pipeline to many RRi series and return the list of results
+        in the same order of the RRi series
+
+        Parameters
+        ----------
+        rris : iterable
+            RRi series, array_like or paths to files containing RRi series
+        backend : str {'serial', 'thread', 'process'}, optional
+            how the RRi series are analysed: serially, in a thread pool or in
+            a process pool. Defaults to 'serial'
+        n_jobs : int, optional
+            number of workers of the pool. Defaults to None
+        executor : concurrent.futures.Executor, optional
+            executor used to analyse the RRi series. If provided, `backend`
+            and `n_jobs` are ignored. Defaults to None
+        """
+        if executor is not None:
+            return list(executor.map(self.run, rris))
+
+        _validate_choice(backend, ("serial", "thread", "process"))
+        if backend == "serial":
+            return [self.run(rri) for rri in rris]
+
+        pool = ThreadPoolExecutor if backend == "thread" else ProcessPoolExecutor
+        with pool(max_workers=n_jobs) as executor:
+            return list(executor.map(self.run, rris))
+
+    def _filter(self, values, time, timings=None):
+        for name, kwargs in self.filters:
+            values, time = _timed(
+                timings, "filter", FILTERS[name], values, time, **kwargs
+            )
+
+        return values, time
+
+    def _run(self, values, time, timings=None):
+        values, time = self._filter(values, time, timings)
+
+        # time domain and non-linear indices share the successive differences
+        graph = _Graph(rri=values)
+        results = OrderedDict()
+        for index in self.indices:
+            if index == "time":
+                results.update(_timed(timings, index, graph.evaluate, TIME_DOMAIN))
+            elif index == "non_linear":
+                results.update(_timed(timings, index, graph.evaluate, NON_LINEAR))
+            else:
+                results.update(self._frequency_domain(values, time, timings))
+
+        return results
+
+    def _frequency_domain(self, values, time, timings):
+        kwargs = dict(self.frequency_kwargs)
+        fs = kwargs.pop("fs", 4.0)
+        interp_method = self.interp_method
+        if self.resample is not None:
+            fs = self.resample
+            values = _timed(
+                timings, "resample", _interpolate_rri, values, time, fs, interp_method
+            )
+            time = _create_interp_time(time, fs)
+            interp_method = None
+
+        if self.detrend is not None:
+            name, detrend_kwargs = self.detrend
+            if name == "smoothness_priors":
+                detrend_kwargs = dict({"fs": fs}, **detrend_kwargs)
+                interp_method = None
+            values, time = _timed(
+                timings, "detrend", DETRENDERS[name], values, time, **detrend_kwargs
+            )
+            kwargs["detrend"] = False
+
+        return _timed(
+            timings,
+            "frequency",
+            frequency_domain,
+            values,
+            time=time,
+            fs=fs,
+            interp_method=interp_method,
+            **kwargs
+        )
+
+    def __repr__(self):
+        return (
+            "Pipeline(filters={}, resample={}, interp_method={!r}, detrend={}, "
+            "indices={}, frequency_kwargs={})".format(
+                self.filters,
+                self.resample,
+                self.interp_method,
+                self.detrend,
+                list(self.indices),
+                self.frequency_kwargs,
+            )
+        )
+
+
+def _step(step, available):
+    if isinstance(step, str):
+        name, kwargs = step, {}
+    else:
+        name, kwargs = step
+
+    _validate_choice(name, available)
+    return name, dict(kwargs)
+
+
+def _to_rri(rri):
+    if isinstance(rri, str):
+        return read_file(rri)
+    elif not isinstance(rri, RRi):
+        return RRi(rri)
+
+    return rri
+
+
+def analyse_file(pipeline, pathname, member=None, timings=None):
+    """
+    Read the RRi series of a file and apply a pipeline to it. Used by the
+    command line interface, `hrv.batch` and `hrv.server`.
+
+    Parameters
+    ----------
+    pipeline : Pipeline
+        analysis applied to the RRi series
+    pathname : str
+        path to the file or to the zip archive containing it. See
+        `hrv.io.read_file`
+    member : str, optional
+        name of the file in the zip archive `pathname`. Defaults to None
+    timings : dict, optional
+        if provided, the elapsed time of each stage ('read', 'filter',
+        'time', ...) is added to it. Defaults to None
+
+    Returns
+    -------
+    results : OrderedDict
+        calculated indices as built-in Python types. See `to_builtin`
+    """
+    rri = _timed(timings, "read", read_file, pathname, member)
+    return to_builtin(pipeline._run(rri.values, rri.time, timings))
+
+
+def to_builtin(results):
+    """
+    Convert the indices calculated by a pipeline to built-in Python types,
+    so they can be serialized as JSON
+
+    Parameters
+    ----------
+    results : dict
+        indices returned by `Pipeline.run`
+
+    Returns
+    -------
+    results : OrderedDict
+        the same indices with numpy scalars replaced by Python scalars
+    """
+    return OrderedDict((key, _to_builtin(value)) for key, value in results.items())
+
+
+def _to_builtin(value):
+    # numpy scalars are not JSON serializable
+    return value.item() if hasattr(value, "item") else value
+
+
+def _json_safe(value):
+    # NaN and infinity are not valid JSON
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    elif isinstance(value, dict):
+        return OrderedDict((key, _json_safe(item)) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+def _to_json(results):
+    return json.dumps(_json_safe(results), allow_nan=False)
+
+
+def _timed(timings, stage, func, *args, **kwargs):
+    if timings is None:
+        return func(*args, **kwargs)
+
+    begin = _time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[stage] = timings.get(stage, 0.0) + _time.perf_counter() - begin
+    return result
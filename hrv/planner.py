@@ -0,0 +1,182 @@
+"""
+Calculation of HRV indices from a dependency graph of intermediates.
+
+Each index and each intermediate result (successive differences, resampled
+RRi series, PSD, band powers, ...) is a node of the graph, declared with the
+nodes it depends on. Only the nodes needed by the requested indices are
+evaluated and each one is evaluated once, so asking for `rmssd` does not
+estimate a PSD and asking for every index calculates the successive
+differences and the PSD a single time.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from hrv.classical import _band_power, _psd
+from hrv.rri import RRi
+from hrv.utils import _interpolate_rri, _validate_choice
+
+__all__ = ["compute"]
+
+TIME_DOMAIN = ("rmssd", "sdnn", "sdsd", "nn50", "pnn50", "mrri", "mhr")
+FREQUENCY_DOMAIN = ("total_power", "vlf", "lf", "hf", "lf_hf", "lfnu", "hfnu")
+NON_LINEAR = ("sd1", "sd2")
+INDICES = TIME_DOMAIN + FREQUENCY_DOMAIN + NON_LINEAR
+GROUPS = OrderedDict(
+    [
+        ("time", TIME_DOMAIN),
+        ("frequency", FREQUENCY_DOMAIN),
+        ("non_linear", NON_LINEAR),
+    ]
+)
+
+
+def _resample(rri, time, fs, interp_method, interpolated):
+    if interpolated or interp_method is None:
+        return rri
+    return _interpolate_rri(rri, time, fs, interp_method)
+
+
+def _spectrum(resampled, fs, method, detrend, detrended, psd_kwargs):
+    return _psd(resampled, fs, method, False if detrended else detrend, **psd_kwargs)
+
+
+# name: (dependencies, function of the dependencies)
+_NODES = {
+    "diff": (("rri",), np.diff),
+    "squared_diff": (("diff",), np.square),
+    "diff_std": (("diff",), lambda diff: np.std(diff, ddof=1)),
+    "rri_std": (("rri",), lambda rri: np.std(rri, ddof=1)),
+    "resampled": (
+        ("rri", "time", "fs", "interp_method", "interpolated"),
+        _resample,
+    ),
+    "psd": (
+        ("resampled", "fs", "method", "detrend", "detrended", "psd_kwargs"),
+        _spectrum,
+    ),
+    "rmssd": (("squared_diff",), lambda squared_diff: np.sqrt(np.mean(squared_diff))),
+    "sdnn": (("rri_std",), lambda rri_std: rri_std),
+    "sdsd": (("diff_std",), lambda diff_std: diff_std),
+    "nn50": (("diff",), lambda diff: sum(abs(diff) > 50)),
+    "pnn50": (("nn50", "rri"), lambda nn50, rri: nn50 / len(rri) * 100),
+    "mrri": (("rri",), np.mean),
+    "mhr": (("rri",), lambda rri: np.mean(60 / (rri / 1000.0))),
+    "vlf": (("psd", "vlf_band"), lambda psd, band: _band_power(*psd, band)),
+    "lf": (("psd", "lf_band"), lambda psd, band: _band_power(*psd, band)),
+    "hf": (("psd", "hf_band"), lambda psd, band: _band_power(*psd, band)),
+    "total_power": (("vlf", "lf", "hf"), lambda vlf, lf, hf: vlf + lf + hf),
+    "lf_hf": (("lf", "hf"), lambda lf, hf: lf / hf),
+    "lfnu": (
+        ("lf", "total_power", "vlf"),
+        lambda lf, total_power, vlf: (lf / (total_power - vlf)) * 100,
+    ),
+    "hfnu": (
+        ("hf", "total_power", "vlf"),
+        lambda hf, total_power, vlf: (hf / (total_power - vlf)) * 100,
+    ),
+    "sd1": (("diff_std",), lambda diff_std: np.sqrt(diff_std ** 2 * 0.5)),
+    "sd2": (
+        ("rri_std", "diff_std"),
+        lambda rri_std, diff_std: np.sqrt(2 * rri_std ** 2 - 0.5 * diff_std ** 2),
+    ),
+}
+
+
+def compute(
+    rri,
+    indices=None,
+    fs=4.0,
+    method="welch",
+    interp_method="cubic",
+    detrend="constant",
+    vlf_band=(0, 0.04),
+    lf_band=(0.04, 0.15),
+    hf_band=(0.15, 0.4),
+    **kwargs
+):
+    """
+    Calculate the requested HRV indices of an RRi series, sharing the
+    intermediate results among them.
+
+    Parameters
+    ----------
+    rri : RRi or array_like
+        RRi series
+    indices : list, optional
+        names of the indices ('rmssd', 'hf', 'sd1', ...) or of groups of
+        indices ('time', 'frequency' and 'non_linear'). Defaults to all the
+        indices
+    fs, method, interp_method, detrend, vlf_band, lf_band, hf_band, kwargs
+        frequency domain arguments. See `hrv.classical.frequency_domain`
+
+    Returns
+    -------
+    results : OrderedDict
+        the requested indices, in the requested order. The values are the
+        same returned by `time_domain`, `frequency_domain` and `non_linear`
+
+    Examples
+    --------
+    >>> import hrv
+    >>> from hrv.sampledata import load_rest_rri
+    >>> rri = load_rest_rri()
+    >>> hrv.compute(rri, indices=["rmssd", "hf"])
+    OrderedDict([('rmssd', 55.13744203126742), ('hf', 895.0254764711115)])
+    """
+    _validate_choice(method, ("welch", "ar"))
+    if not isinstance(rri, RRi):
+        rri = RRi(rri)
+
+    graph = _Graph(
+        rri=rri.values,
+        time=rri.time,
+        interpolated=rri.interpolated,
+        detrended=rri.detrended,
+        fs=fs,
+        method=method,
+        interp_method=interp_method,
+        detrend=detrend,
+        vlf_band=vlf_band,
+        lf_band=lf_band,
+        hf_band=hf_band,
+        psd_kwargs=kwargs,
+    )
+    return graph.evaluate(_expand(INDICES if indices is None else indices))
+
+
+class _Graph:
+    def __init__(self, **inputs):
+        self._values = dict(inputs)
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            dependencies, func = _NODES[name]
+            self._values[name] = func(*(self[node] for node in dependencies))
+
+        return self._values[name]
+
+    def evaluate(self, indices):
+        return OrderedDict((index, self[index]) for index in indices)
+
+
+def _expand(indices):
+    if isinstance(indices, str):
+        indices = [indices]
+
+    expanded = []
+    for index in indices:
+        if index in GROUPS:
+            expanded.extend(GROUPS[index])
+        elif index in INDICES:
+            expanded.append(index)
+        else:
+            raise ValueError(
+                "`{}` not supported! Choose among: {}".format(
+                    index, ", ".join(list(GROUPS) + list(INDICES))
+                )
+            )
+
+    # Keep the first occurrence of repeated indices
+    return list(OrderedDict.fromkeys(expanded))
@@ -12,8 +12,10 @@ Classes
 ------
  - `RRi` -- RRi series class
  - `RRiDetrended` -- detrended RRi values
+ - `SharedRRi` -- handle of an RRi series stored in shared memory
 """
 
+import os
 import sys
 from collections import MutableMapping, defaultdict
 
@@ -22,7 +24,7 @@ import numpy as np
 
 from .utils import _ellipsedraw
 
-__all__ = ['RRi', 'RRiDetrended']
+__all__ = ['RRi', 'RRiDetrended', 'SharedRRi']
 
 
 class RRi:
@@ -66,6 +68,84 @@ class RRi:
             self.__time = _create_time_array(self.rri)
         else:
             self.__time = _validate_time(self.__rri, time)
+        self.__shared = None
+
+    @classmethod
+    def _from_arrays(cls, rri, time, detrended=False, interpolated=False, shared=None):
+        # Build the series from already validated arrays
+        instance = cls.__new__(cls)
+        instance.__rri = rri
+        instance.__time = time
+        instance.__detrended = detrended
+        instance.__interpolated = interpolated
+        instance.__shared = shared
+        return instance
+
+    def __reduce__(self):
+        # Only the arrays and flags are serialized, and the series is not
+        # validated again when unpickled. Series in shared memory are
+        # serialized as their handle, without the values
+        if self.__shared is not None:
+            return RRi.from_shared_memory, (self.__shared,)
+        return (
+            type(self)._from_arrays,
+            (self.__rri, self.__time, self.__detrended, self.__interpolated),
+        )
+
+    def to_shared_memory(self):
+        """
+        Copy the RRi values and time to a new shared memory block and return
+        its handle (`SharedRRi`).
+
+        The handle is cheap to pickle, so it can be sent to worker processes
+        which rebuild the series with `RRi.from_shared_memory` without
+        copying the values. The block must be released with the `unlink`
+        method of the handle, or using the handle as a context manager.
+
+        Examples
+        --------
+        >>> from concurrent.futures import ProcessPoolExecutor
+        >>> from hrv.classical import frequency_domain
+        >>> from hrv.rri import RRi
+        >>> from hrv.sampledata import load_rest_rri
+        >>> with load_rest_rri().to_shared_memory() as shared:
+        ...     with ProcessPoolExecutor() as executor:
+        ...         future = executor.submit(frequency_domain, shared.to_rri())
+        ...         future.result()
+        {'total_power': 2212.2894012201778, ...}
+        """
+        shared_memory = _import_shared_memory()
+        length = len(self.__rri)
+        # A block can not be empty
+        block = shared_memory.SharedMemory(create=True, size=max(16 * length, 1))
+        arrays = np.ndarray((2, length), dtype=np.float64, buffer=block.buf)
+        arrays[0] = self.__rri
+        arrays[1] = self.__time
+        _ATTACHED_BLOCKS[block.name] = block
+
+        return SharedRRi(
+            block.name, length, self.__detrended, self.__interpolated, _tracker_id()
+        )
+
+    @classmethod
+    def from_shared_memory(cls, shared):
+        """
+        Return the RRi series stored in shared memory by `to_shared_memory`.
+        The values and time are read-only views of the shared memory block,
+        and pickling the series only serializes the handle
+
+        Parameters
+        ----------
+        shared : SharedRRi
+            handle returned by `to_shared_memory`
+        """
+        block = _attach_block(shared.name, shared.tracker)
+        arrays = np.ndarray((2, shared.length), dtype=np.float64, buffer=block.buf)
+        arrays.flags.writeable = False
+        rri_class = RRiDetrended if shared.detrended else RRi
+        return rri_class._from_arrays(
+            arrays[0], arrays[1], shared.detrended, shared.interpolated, shared
+        )
 
     def __len__(self):
         return len(self.__rri)
@@ -321,30 +401,61 @@ class RRi:
             If set to True the last segment is returned even if smaller than
             `seg_size`, defaults to False
         """
-        rri_duration = self.time[-1]
-        if overlap > seg_size:
-            raise Exception("`overlap` can not be bigger than `seg_size`")
-        elif seg_size > rri_duration:
-            raise Exception("`seg_size` is longer than RRi duration.")
-
-        begin = 0
-        end = seg_size
-        step = seg_size - overlap
-        n_splits = int((rri_duration - seg_size) / step) + 1
-        segments = []
-        for i in range(n_splits):
-            OP = np.less if i + 1 != n_splits else np.less_equal
-            mask = np.logical_and(self.time >= begin, OP(self.time, end))
-            segments.append(RRi(self.rri[mask], time=self.time[mask]))
-            begin += step
-            end += step
-
-        last = segments[-1]
-        if keep_last and last.time[-1] < rri_duration:
-            mask = self.time > begin
-            segments.append(RRi(self.rri[mask], time=self.time[mask]))
-
-        return segments
+        starts, ends = _time_split_bounds(self.time, seg_size, overlap, keep_last)
+        return [
+            type(self)._from_arrays(
+                self.rri[start:end].copy(),
+                self.time[start:end].copy(),
+                self.detrended,
+                self.interpolated,
+            )
+            for start, end in zip(starts, ends)
+        ]
+
+    def beat_split(self, size, overlap=0):
+        """
+        Splits the RRi series in segments with the same number of beats.
+        The segments are read-only views of the RRi values and time, i.e.
+        no data is copied. Beats after the last complete segment are
+        discarded.
+
+        Parameters
+        ----------
+        size : int
+            The number of beats of each segment
+        overlap : int, optional
+            The number of beats shared by adjacent segments, defaults to 0
+
+        Returns
+        -------
+        values : numpy.ndarray
+            (n_segments, size) array with the RRi values of each segment
+        time : numpy.ndarray
+            (n_segments, size) array with the time of each segment
+
+        See Also
+        --------
+        hrv.classical.time_domain_windows
+
+        Examples
+        --------
+        >>> from hrv.sampledata import load_rest_rri
+        >>> rri = load_rest_rri()
+        >>> values, time = rri.beat_split(size=256, overlap=128)
+        >>> values.shape
+        (6, 256)
+        """
+        if not 0 <= overlap < size:
+            raise ValueError("`overlap` must be non-negative and smaller than `size`")
+        elif size > len(self.rri):
+            raise ValueError("`size` is longer than the RRi series.")
+
+        step = size - overlap
+        n_segments = (len(self.rri) - size) // step + 1
+        return (
+            _sliding_windows(self.rri, size, step, n_segments),
+            _sliding_windows(self.time, size, step, n_segments),
+        )
 
     def __repr__(self):
         return "RRi %s" % np.array_repr(self.rri)
@@ -394,6 +505,64 @@ class RRiDetrended(RRi):
         super().__init__(rri, time, interpolated=interpolated, detrended=detrended)
 
 
+class SharedRRi:
+    """Handle of an RRi series stored in a shared memory block.
+
+       Only the name of the block, the length of the series and its flags
+       are kept in the handle, so it is cheap to pickle and send to other
+       processes of the same machine.
+
+    Parameters
+    ----------
+    name : str
+        name of the shared memory block
+    length : int
+        number of RRi values
+    detrended : boolean, optional
+        If the RRi series is detrended, defaults to False
+    interpolated : boolean, optional
+        If the RRi series is interpolated, defaults to False
+    tracker : tuple, optional
+        identity of the resource tracker of the creator of the block,
+        defaults to None
+    """
+
+    def __init__(self, name, length, detrended=False, interpolated=False, tracker=None):
+        self.name = name
+        self.length = length
+        self.detrended = detrended
+        self.interpolated = interpolated
+        self.tracker = tracker
+
+    def to_rri(self):
+        """Return the RRi series stored in the block. See `RRi.from_shared_memory`"""
+        return RRi.from_shared_memory(self)
+
+    def close(self):
+        """
+        Detach the block from the current process. RRi series returned by
+        `to_rri` can not be used afterwards
+        """
+        block = _ATTACHED_BLOCKS.pop(self.name, None)
+        if block is not None:
+            block.close()
+
+    def unlink(self):
+        """Detach and destroy the block. Must be called once, by its creator"""
+        block = _attach_block(self.name, self.tracker)
+        self.close()
+        block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+    def __repr__(self):
+        return "SharedRRi(name={!r}, length={})".format(self.name, self.length)
+
+
 class RRiDescription(MutableMapping):
     def __init__(self, table, *args, **kwargs):
         self.store = defaultdict(dict)
@@ -490,3 +659,86 @@ def _validate_time(rri, time):
 def _create_time_array(rri):
     time = np.cumsum(rri) / 1000.0
     return time - time[0]
+
+
+# Blocks attached by this process, kept open while their RRi views are used
+_ATTACHED_BLOCKS = {}
+
+
+def _time_split_bounds(time, seg_size, overlap=0, keep_last=False):
+    # Start and end (exclusive) indices of the segments of `RRi.time_split`,
+    # found by binary search as the time is increasing
+    rri_duration = time[-1]
+    if overlap > seg_size:
+        raise Exception("`overlap` can not be bigger than `seg_size`")
+    elif seg_size > rri_duration:
+        raise Exception("`seg_size` is longer than RRi duration.")
+
+    step = seg_size - overlap
+    n_splits = int((rri_duration - seg_size) / step) + 1
+    # Cumulative sums add the steps in the same order as a running sum, so
+    # the bounds are not affected by rounding differences
+    begins = np.cumsum([0] + [step] * n_splits)
+    ends = np.cumsum([seg_size] + [step] * (n_splits - 1))
+    starts = np.searchsorted(time, begins[:-1], side="left")
+    stops = np.searchsorted(time, ends, side="left")
+    # The last segment includes its end
+    stops[-1] = np.searchsorted(time, ends[-1], side="right")
+
+    if keep_last and time[stops[-1] - 1] < rri_duration:
+        starts = np.append(starts, np.searchsorted(time, begins[-1], side="right"))
+        stops = np.append(stops, len(time))
+
+    return starts, stops
+
+
+def _sliding_windows(array, size, step, n_windows):
+    stride = array.strides[0]
+    return np.lib.stride_tricks.as_strided(
+        array,
+        shape=(n_windows, size),
+        strides=(step * stride, stride),
+        writeable=False,
+    )
+
+
+def _import_shared_memory():
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise ImportError("Shared memory support requires Python 3.8 or newer")
+    return shared_memory
+
+
+def _attach_block(name, tracker=None):
+    if name not in _ATTACHED_BLOCKS:
+        shared_memory = _import_shared_memory()
+        if sys.version_info >= (3, 13):
+            # Only the creator of the block tracks it
+            block = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            block = shared_memory.SharedMemory(name=name)
+            # Attaching registers the block in the resource tracker of this
+            # process, which destroys it when the process ends. Processes
+            # started by multiprocessing share the tracker of their parent,
+            # where the registration is the one of the creator and is kept
+            if os.name == "posix" and _tracker_id() != tracker:
+                from multiprocessing import resource_tracker
+
+                resource_tracker.unregister(block._name, "shared_memory")
+        _ATTACHED_BLOCKS[name] = block
+    return _ATTACHED_BLOCKS[name]
+
+
+def _tracker_id():
+    # The pipe to the resource tracker is inherited by the processes started
+    # from this one with any start method, so it identifies the tracker
+    if os.name != "posix":
+        return None
+    from multiprocessing import resource_tracker
+
+    fd = resource_tracker._resource_tracker._fd
+    if fd is None:
+        return None
+    stat = os.fstat(fd)
+    return stat.st_dev, stat.st_ino
@@ -1,6 +1,6 @@
 import os
 
-from hrv.io import read_from_text, read_from_hrm
+from hrv.io import _reader_for
 
 
 def load_sample_data(filename):
@@ -18,12 +18,9 @@ def load_sample_data(filename):
     -------
         rri = load_sample_data('rest_rri.txt')
     """
-    extension = os.path.splitext(filename)[1]
-    handler = {".txt": read_from_text, ".hrm": read_from_hrm}
-
     here = os.path.dirname(__file__)
     complete_path = os.path.join(here, filename)
-    return handler[extension](complete_path)
+    return _reader_for(filename)(complete_path)
 
 
 def load_rest_rri():
@@ -0,0 +1,311 @@
+"""
+Local HTTP server for HRV analysis.
+
+The server receives RRi series as JSON and answers with their indices,
+calculated by a `Pipeline`. Concurrent requests are coalesced in batches and
+each batch is a single task of a pool of workers, so the cost of dispatching
+work to the pool (serializing the pipeline, the round trip to a worker
+process) is shared by the requests of a batch. The series of a batch are
+still analysed one after the other by its worker. Only the standard library
+is used.
+
+Endpoints:
+    - POST /analyse: {"rri": [...], "time": [...]} -> {"rmssd": ..., ...}
+      `time` is optional. Indices that cannot be calculated, such as NaN,
+      are null
+    - GET /stats: request, batch, latency and throughput counters
+    - GET /health: {"status": "ok"}
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from hrv.pipeline import Pipeline, _to_json, _validate_choice, to_builtin
+from hrv.rri import RRi
+
+__all__ = ["AnalysisServer", "serve"]
+
+
+class AnalysisServer:
+    """An HTTP server analysing RRi series, coalescing concurrent requests.
+
+    Parameters
+    ----------
+    host : str, optional
+        address the server listens to. Defaults to '127.0.0.1'
+    port : int, optional
+        port the server listens to. If 0 a free port is chosen, see the
+        `port` attribute. Defaults to 8000
+    pipeline : hrv.pipeline.Pipeline, optional
+        analysis applied to the RRi series. Defaults to `Pipeline()`
+    max_batch_size : int, optional
+        maximum number of requests of a batch. Defaults to 32
+    max_wait : float, optional
+        time in seconds a batch waits for more requests after the first one.
+        Defaults to 0.005
+    backend : str {'process', 'thread'}, optional
+        pool of workers analysing the batches. Defaults to 'process'
+    n_workers : int, optional
+        number of workers. Defaults to the number of cores
+
+    Examples
+    --------
+    >>> from hrv.server import AnalysisServer
+    >>> with AnalysisServer(port=0) as server:
+    ...     print(server.url)
+    ...     # POST {"rri": [...]} to server.url + "/analyse"
+    http://127.0.0.1:36519
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=8000,
+        pipeline=None,
+        max_batch_size=32,
+        max_wait=0.005,
+        backend="process",
+        n_workers=None,
+    ):
+        _validate_choice(backend, ("process", "thread"))
+        self.pipeline = Pipeline() if pipeline is None else pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        pool = ProcessPoolExecutor if backend == "process" else ThreadPoolExecutor
+        self._executor = pool(max_workers=n_workers)
+        self._queue = queue.Queue()
+        self._stats = _Stats()
+        self._http = _HTTPServer((host, port), _Handler)
+        self._http.analysis_server = self
+        self._threads = []
+        self._started = False
+
+    @property
+    def port(self):
+        return self._http.server_address[1]
+
+    @property
+    def url(self):
+        host, port = self._http.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        """Start serving in background threads"""
+        self._started = True
+        self._threads = [
+            threading.Thread(target=self._batch_requests, daemon=True),
+            threading.Thread(target=self._http.serve_forever, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve until interrupted"""
+        batcher = threading.Thread(target=self._batch_requests, daemon=True)
+        self._threads = [batcher]
+        self._started = True
+        batcher.start()
+        try:
+            self._http.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stop serving and release the workers"""
+        # http.server waits forever for a serving loop that never started
+        if self._started:
+            self._http.shutdown()
+            self._started = False
+        self._http.server_close()
+        self._queue.put(None)
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        self._executor.shutdown()
+
+    def analyse(self, rri, time=None):
+        """
+        Analyse an RRi series in the next batch and return a future of its
+        indices. Used by the request handler
+        """
+        future = Future()
+        self._queue.put((rri, time, future))
+        return future
+
+    def stats(self):
+        """Return the counters of the server"""
+        return self._stats.snapshot()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def _batch_requests(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            batch = [request]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)
+                    break
+                batch.append(request)
+
+            self._stats.add_batch(len(batch))
+            # Batches are not awaited here, so many batches run at once
+            future = self._executor.submit(
+                _analyse_batch,
+                self.pipeline,
+                [(rri, rri_time) for rri, rri_time, _ in batch],
+            )
+            future.add_done_callback(partial(_complete_batch, batch))
+
+
+def serve(host="127.0.0.1", port=8000, **kwargs):
+    """
+    Run an `AnalysisServer` until interrupted. See `AnalysisServer` for the
+    parameters
+    """
+    server = AnalysisServer(host=host, port=port, **kwargs)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def _analyse_batch(pipeline, batch):
+    # One task of the pool per batch, each series fails on its own
+    results = []
+    for rri, rri_time in batch:
+        try:
+            results.append((to_builtin(pipeline.run(RRi(rri, rri_time))), None))
+        except Exception as error:
+            results.append((None, str(error)))
+    return results
+
+
+def _complete_batch(batch, future):
+    try:
+        results = future.result()
+    except Exception as error:
+        results = [(None, str(error))] * len(batch)
+
+    for (_, _, request_future), result in zip(batch, results):
+        request_future.set_result(result)
+
+
+class _Stats:
+    def __init__(self, max_latencies=10000):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._requests = 0
+        self._errors = 0
+        self._batches = 0
+        self._batched_requests = 0
+        self._latencies = deque(maxlen=max_latencies)
+
+    def add_batch(self, size):
+        with self._lock:
+            self._batches += 1
+            self._batched_requests += size
+
+    def add_request(self, latency, error):
+        with self._lock:
+            self._requests += 1
+            self._errors += bool(error)
+            self._latencies.append(latency)
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.monotonic() - self._started
+            latencies = np.array(self._latencies)
+            stats = {
+                "uptime": uptime,
+                "requests": self._requests,
+                "errors": self._errors,
+                "batches": self._batches,
+                "mean_batch_size": (
+                    self._batched_requests / self._batches if self._batches else 0.0
+                ),
+                "throughput": self._requests / uptime if uptime else 0.0,
+            }
+        for name, percentile in [("p50", 50), ("p95", 95), ("p99", 99)]:
+            stats["latency_" + name] = (
+                float(np.percentile(latencies, percentile)) if len(latencies) else 0.0
+            )
+        stats["latency_max"] = float(latencies.max()) if len(latencies) else 0.0
+        return stats
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Bursts of concurrent clients overflow the default backlog of 5
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server.analysis_server
+        if self.path == "/stats":
+            self._send_json(200, server.stats())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/analyse":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        begin = time.perf_counter()
+        server = self.server.analysis_server
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            rri, rri_time = payload["rri"], payload.get("time")
+        except (ValueError, KeyError, TypeError) as error:
+            self._send_json(400, {"error": "invalid payload: {}".format(error)})
+            return
+
+        results, error = server.analyse(rri, rri_time).result()
+        server._stats.add_request(time.perf_counter() - begin, error)
+        if error is not None:
+            self._send_json(422, {"error": error})
+        else:
+            self._send_json(200, results)
+
+    def _send_json(self, status, body):
+        content = _to_json(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        # Requests are accounted by the /stats endpoint
+        pass
@@ -0,0 +1,770 @@
+"""
+Online calculation of HRV indices.
+
+The objects of this module are updated with the RRi values as they arrive,
+e.g. from a wearable device, and keep constant memory regardless of the
+length of the recording.
+
+Classes
+------
+ - `TimeDomainAccumulator` -- time domain indices of all the values received
+ - `RRiBuffer` -- time domain and Poincaré indices of the most recent values
+ - `QuotientFilter` -- streaming counterpart of `hrv.filters.quotient`
+ - `ThresholdFilter` -- streaming counterpart of `hrv.filters.threshold_filter`
+ - `BandPowerTracker` -- frequency domain indices of the most recent samples
+"""
+
+from collections import deque
+
+import numpy as np
+
+from hrv.classical import _auc
+from hrv.filters import _threshold_value
+from hrv.rri import RRi
+
+__all__ = [
+    "TimeDomainAccumulator",
+    "RRiBuffer",
+    "QuotientFilter",
+    "ThresholdFilter",
+    "BandPowerTracker",
+    "Windows",
+]
+
+
+class TimeDomainAccumulator:
+    """Streaming counterpart of `hrv.classical.time_domain`.
+
+       The mean and the sum of squared deviations of the RRi values and of
+       their successive differences are updated with Welford's algorithm,
+       using Chan's parallel formula to add a batch of values at once, so
+       the indices are numerically stable for long recordings. Only the
+       first and the last values are kept to calculate the differences at
+       the boundaries of the batches and of merged accumulators.
+
+       RRi values must be in milliseconds.
+
+    Examples
+    --------
+    >>> from hrv.streaming import TimeDomainAccumulator
+    >>> from hrv.sampledata import load_rest_rri
+    >>> rri = load_rest_rri()
+    >>> accumulator = TimeDomainAccumulator()
+    >>> for value in rri:
+    ...     accumulator.update(value)
+    >>> accumulator.result()
+    {'rmssd': 55.13744203126742, ..., 'mhr': 56.85278105637358}
+
+    Accumulators of consecutive chunks, e.g. analysed in parallel, are
+    combined with `merge`:
+
+    >>> first, second = TimeDomainAccumulator(), TimeDomainAccumulator()
+    >>> first.update(rri[:400])
+    >>> second.update(rri[400:])
+    >>> first.merge(second).result()
+    {'rmssd': 55.13744203126742, ..., 'mhr': 56.85278105637358}
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.first = None
+        self.last = None
+        # mean and sum of squared deviations of the RRi values
+        self._mean = 0.0
+        self._m2 = 0.0
+        # mean of the heart rate
+        self._mean_hr = 0.0
+        # mean and sum of squared deviations of the successive differences
+        self._diff_count = 0
+        self._diff_mean = 0.0
+        self._diff_m2 = 0.0
+        # mean of the squared successive differences
+        self._mean_squared_diff = 0.0
+        self._nn50 = 0
+
+    def update(self, rri):
+        """
+        Add RRi values, which follow the values already added
+
+        Parameters
+        ----------
+        rri : Number, array_like or RRi
+            RRi value or values in milliseconds
+        """
+        values = rri.values if isinstance(rri, RRi) else rri
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        if not len(values):
+            return
+        if np.any(values <= 0):
+            raise ValueError("rri series can only have positive values")
+
+        if self.count:
+            diffs = np.diff(np.concatenate([[self.last], values]))
+        else:
+            diffs = np.diff(values)
+            self.first = values[0]
+
+        self.count, self._mean, self._m2 = _combine(
+            self.count, self._mean, self._m2, *_moments(values)
+        )
+        self._mean_hr = _combine_means(
+            self.count - len(values),
+            self._mean_hr,
+            len(values),
+            np.mean(60000.0 / values),
+        )
+        self._add_diffs(diffs)
+        self.last = values[-1]
+
+    def merge(self, other):
+        """
+        Return a new accumulator of the values of this accumulator followed
+        by the values of `other`
+
+        Parameters
+        ----------
+        other : TimeDomainAccumulator
+            accumulator of the values following the values of this one
+        """
+        merged = TimeDomainAccumulator()
+        merged.__dict__.update(self.__dict__)
+        if not other.count:
+            return merged
+        if not self.count:
+            merged.__dict__.update(other.__dict__)
+            return merged
+
+        merged.count, merged._mean, merged._m2 = _combine(
+            self.count, self._mean, self._m2, other.count, other._mean, other._m2
+        )
+        merged._mean_hr = _combine_means(
+            self.count, self._mean_hr, other.count, other._mean_hr
+        )
+        # The difference between the last value of this accumulator and the
+        # first value of the other one belongs to none of them
+        merged._add_diffs(np.array([other.first - self.last]))
+        merged._diff_count, merged._diff_mean, merged._diff_m2 = _combine(
+            merged._diff_count,
+            merged._diff_mean,
+            merged._diff_m2,
+            other._diff_count,
+            other._diff_mean,
+            other._diff_m2,
+        )
+        merged._mean_squared_diff = _combine_means(
+            merged._diff_count - other._diff_count,
+            merged._mean_squared_diff,
+            other._diff_count,
+            other._mean_squared_diff,
+        )
+        merged._nn50 += other._nn50
+        merged.last = other.last
+        return merged
+
+    def result(self):
+        """
+        Return a dictionary with the time domain indices of the values added
+        so far. See `hrv.classical.time_domain`. Indices that can not be
+        calculated yet are nan
+        """
+        count, diff_count = self.count, self._diff_count
+        return dict(
+            zip(
+                ["rmssd", "sdnn", "sdsd", "nn50", "pnn50", "mrri", "mhr"],
+                [
+                    np.sqrt(self._mean_squared_diff) if diff_count else np.nan,
+                    np.sqrt(self._m2 / (count - 1)) if count > 1 else np.nan,
+                    np.sqrt(self._diff_m2 / (diff_count - 1))
+                    if diff_count > 1
+                    else np.nan,
+                    self._nn50,
+                    self._nn50 / count * 100 if count else np.nan,
+                    self._mean if count else np.nan,
+                    self._mean_hr if count else np.nan,
+                ],
+            )
+        )
+
+    def _add_diffs(self, diffs):
+        if not len(diffs):
+            return
+
+        previous_count = self._diff_count
+        self._diff_count, self._diff_mean, self._diff_m2 = _combine(
+            self._diff_count, self._diff_mean, self._diff_m2, *_moments(diffs)
+        )
+        self._mean_squared_diff = _combine_means(
+            previous_count, self._mean_squared_diff, len(diffs), np.mean(diffs ** 2)
+        )
+        self._nn50 += int(np.sum(np.abs(diffs) > 50))
+
+    def __repr__(self):
+        return "TimeDomainAccumulator(count={})".format(self.count)
+
+
+class RRiBuffer:
+    """Fixed capacity ring buffer of the most recent beats of an RRi series.
+
+       Beats older than `horizon` seconds before the newest beat, or beyond
+       `capacity` beats, are evicted as new beats are appended. Running sums
+       of the values (shifted by the first value, to avoid cancellation), of
+       the heart rate and of the successive differences are updated on every
+       append and eviction, so the time domain and Poincaré indices of the
+       window are available in constant time per beat. The sums are
+       recalculated from the buffer every `capacity` appends, which bounds
+       the accumulated rounding errors at an amortized constant cost.
+
+    Parameters
+    ----------
+    capacity : int
+        maximum number of beats kept in the buffer
+    horizon : float, optional
+        length in seconds of the window of beats kept in the buffer.
+        Defaults to 300
+
+    Examples
+    --------
+    >>> from hrv.streaming import RRiBuffer
+    >>> buffer = RRiBuffer(capacity=1024, horizon=300)
+    >>> for value in device_rri_values():
+    ...     buffer.append(value)
+    ...     print(buffer.time_domain()["rmssd"], buffer.non_linear()["sd1"])
+    """
+
+    def __init__(self, capacity, horizon=300.0):
+        if capacity < 1:
+            raise ValueError("`capacity` must be a positive integer")
+
+        self.capacity = int(capacity)
+        self.horizon = horizon
+        self._values = np.empty(self.capacity)
+        self._times = np.empty(self.capacity)
+        self._start = 0
+        self._count = 0
+        self._last_time = None
+        self._shift = None
+        self._appends = 0
+        self._reset_sums()
+
+    def append(self, value, time=None):
+        """
+        Append a beat to the buffer, evicting the beats out of the window
+
+        Parameters
+        ----------
+        value : Number
+            RRi value in milliseconds
+        time : Number, optional
+            time of the beat in seconds. Defaults to the time of the previous
+            beat plus `value`, starting at zero
+        """
+        value = float(value)
+        if value <= 0:
+            raise ValueError("rri series can only have positive values")
+        if time is None:
+            time = 0.0 if self._last_time is None else self._last_time + value / 1000.0
+        elif self._last_time is not None and time <= self._last_time:
+            raise ValueError("time series must be monotonically increasing")
+        if self._shift is None:
+            self._shift = value
+
+        if self._count == self.capacity:
+            self._evict_oldest()
+        if self._count:
+            self._add_diff(value - self._values[self._index(self._count - 1)], 1)
+        position = self._index(self._count)
+        self._values[position] = value
+        self._times[position] = time
+        self._add_value(value, 1)
+        self._count += 1
+        self._last_time = time
+
+        while self._times[self._start] < time - self.horizon:
+            self._evict_oldest()
+
+        self._appends += 1
+        if self._appends % self.capacity == 0:
+            self._recalculate_sums()
+
+    def extend(self, values, times=None):
+        """Append many beats to the buffer. See `append`"""
+        if times is None:
+            times = [None] * len(values)
+        for value, time in zip(values, times):
+            self.append(value, time)
+
+    def time_domain(self):
+        """
+        Return the time domain indices of the beats in the buffer. See
+        `hrv.classical.time_domain`. Indices that can not be calculated yet
+        are nan
+        """
+        count = self._count
+        rmssd = np.sqrt(self._diff_sq_sum / (count - 1)) if count > 1 else np.nan
+        return dict(
+            zip(
+                ["rmssd", "sdnn", "sdsd", "nn50", "pnn50", "mrri", "mhr"],
+                [
+                    rmssd,
+                    self._sdnn(),
+                    self._sdsd(),
+                    self._nn50,
+                    self._nn50 / count * 100 if count else np.nan,
+                    self._shift + self._sum / count if count else np.nan,
+                    self._hr_sum / count if count else np.nan,
+                ],
+            )
+        )
+
+    def non_linear(self):
+        """
+        Return the Poincaré indices (SD1 and SD2) of the beats in the buffer.
+        See `hrv.classical.non_linear`
+        """
+        sdnn, sdsd = self._sdnn(), self._sdsd()
+        sd1 = np.sqrt(sdsd ** 2 * 0.5)
+        sd2 = np.sqrt(max(2 * sdnn ** 2 - 0.5 * sdsd ** 2, 0.0))
+        return dict(zip(["sd1", "sd2"], [sd1, sd2]))
+
+    @property
+    def values(self):
+        """Return a copy of the RRi values in the buffer, oldest first"""
+        return self._ordered(self._values)
+
+    @property
+    def time(self):
+        """Return a copy of the time of the beats in the buffer, oldest first"""
+        return self._ordered(self._times)
+
+    def to_rri(self):
+        """Return the beats in the buffer as an RRi series"""
+        return RRi(self.values, self.time)
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        return "RRiBuffer(capacity={}, horizon={}, beats={})".format(
+            self.capacity, self.horizon, self._count
+        )
+
+    def _index(self, offset):
+        return (self._start + offset) % self.capacity
+
+    def _ordered(self, array):
+        return np.roll(array, -self._start)[: self._count].copy()
+
+    def _evict_oldest(self):
+        value = self._values[self._start]
+        if self._count > 1:
+            self._add_diff(self._values[self._index(1)] - value, -1)
+        self._add_value(value, -1)
+        self._start = self._index(1)
+        self._count -= 1
+
+    def _add_value(self, value, sign):
+        shifted = value - self._shift
+        self._sum += sign * shifted
+        self._sq_sum += sign * shifted ** 2
+        self._hr_sum += sign * 60000.0 / value
+
+    def _add_diff(self, diff, sign):
+        self._diff_sum += sign * diff
+        self._diff_sq_sum += sign * diff ** 2
+        self._nn50 += sign * (abs(diff) > 50)
+
+    def _reset_sums(self):
+        self._sum = self._sq_sum = self._hr_sum = 0.0
+        self._diff_sum = self._diff_sq_sum = 0.0
+        self._nn50 = 0
+
+    def _recalculate_sums(self):
+        values = self.values
+        diffs = np.diff(values)
+        shifted = values - self._shift
+        self._sum = np.sum(shifted)
+        self._sq_sum = np.sum(shifted ** 2)
+        self._hr_sum = np.sum(60000.0 / values)
+        self._diff_sum = np.sum(diffs)
+        self._diff_sq_sum = np.sum(diffs ** 2)
+        self._nn50 = int(np.sum(np.abs(diffs) > 50))
+
+    def _sdnn(self):
+        return _std_from_sums(self._count, self._sum, self._sq_sum)
+
+    def _sdsd(self):
+        return _std_from_sums(self._count - 1, self._diff_sum, self._diff_sq_sum)
+
+
+class QuotientFilter:
+    """Streaming counterpart of `hrv.filters.quotient`.
+
+       Beats are received one at a time or in chunks and the accepted beats
+       are emitted with a fixed latency of two beats: a beat is removed if
+       its ratio to the next beat is outside [0.8, 1.2], and it is emitted
+       once the beat after the next one arrives since, as in `quotient`, the
+       last two beats of the series are never removed. `flush` emits the two
+       beats held at the end of the stream. The emitted beats are the same
+       returned by `quotient` for the whole series.
+
+    Examples
+    --------
+    >>> from hrv.streaming import QuotientFilter
+    >>> quotient_filter = QuotientFilter()
+    >>> for value in device_rri_values():
+    ...     values, time = quotient_filter.update(value)
+    ...     store(values, time)
+    >>> store(*quotient_filter.flush())
+    """
+
+    latency = 2
+
+    def __init__(self):
+        self._pending = deque()
+        self._last_time = None
+
+    def update(self, rri, time=None):
+        """
+        Filter new beats and return a tuple (values, time) with the beats
+        ready to be emitted
+
+        Parameters
+        ----------
+        rri : Number or array_like
+            RRi values in milliseconds
+        time : Number or array_like, optional
+            time of the beats in seconds. Defaults to the cumulative sum of
+            the values, starting at zero
+        """
+        values, times, self._last_time = _beats(rri, time, self._last_time)
+        emitted = []
+        for beat in zip(values, times):
+            if len(self._pending) == self.latency:
+                current, following = self._pending.popleft(), self._pending[0]
+                if 0.8 <= current[0] / following[0] <= 1.2 and (
+                    0.8 <= following[0] / current[0] <= 1.2
+                ):
+                    emitted.append(current)
+            self._pending.append(beat)
+
+        return _emitted(emitted)
+
+    def flush(self):
+        """Return the beats held at the end of the stream"""
+        emitted, self._pending = list(self._pending), deque()
+        return _emitted(emitted)
+
+
+class ThresholdFilter:
+    """Streaming counterpart of `hrv.filters.threshold_filter`.
+
+       The ectopic beats are detected as in `threshold_filter`: each beat is
+       compared to the median of the previous `local_median_size` beats and
+       each of the first `local_median_size` beats to the median of the
+       other first `local_median_size + 1` beats. As the cubic spline of
+       `threshold_filter` depends on future beats, the ectopic beats are
+       replaced by the local median they were compared to.
+
+       The first `local_median_size + 1` beats are emitted when the last of
+       them arrives and the following beats are emitted as soon as they
+       arrive, so the latency is at most `local_median_size` beats. Streams
+       shorter than `local_median_size + 1` beats are emitted unfiltered by
+       `flush`.
+
+    Parameters
+    ----------
+    threshold : str or int, optional
+        strength of the filter. See `hrv.filters.threshold_filter`.
+        Defaults to 'medium' (250ms)
+    local_median_size : int, optional
+        number of RRi values used to calculate the local median.
+        Defaults to 5
+    """
+
+    def __init__(self, threshold="medium", local_median_size=5):
+        self.threshold = _threshold_value(threshold)
+        self.local_median_size = local_median_size
+        self._warm_up = []
+        self._history = deque(maxlen=local_median_size)
+        self._last_time = None
+
+    @property
+    def latency(self):
+        """Number of beats held before emitting the first beats"""
+        return self.local_median_size
+
+    def update(self, rri, time=None):
+        """
+        Filter new beats and return a tuple (values, time) with the beats
+        ready to be emitted, ectopic beats replaced by the local median
+
+        Parameters
+        ----------
+        rri : Number or array_like
+            RRi values in milliseconds
+        time : Number or array_like, optional
+            time of the beats in seconds. Defaults to the cumulative sum of
+            the values, starting at zero
+        """
+        values, times, self._last_time = _beats(rri, time, self._last_time)
+        emitted = []
+        size = self.local_median_size
+        for value, beat_time in zip(values, times):
+            if len(self._warm_up) <= size:
+                self._warm_up.append((value, beat_time))
+                if len(self._warm_up) == size + 1:
+                    emitted.extend(self._filter_warm_up())
+                continue
+
+            median = np.median(self._history)
+            if value > median + self.threshold:
+                emitted.append((median, beat_time))
+            else:
+                emitted.append((value, beat_time))
+            self._history.append(value)
+
+        return _emitted(emitted)
+
+    def flush(self):
+        """Return the beats of streams too short to be filtered"""
+        if len(self._warm_up) > self.local_median_size:
+            return _emitted([])
+
+        emitted, self._warm_up = self._warm_up, []
+        return _emitted(emitted)
+
+    def _filter_warm_up(self):
+        size = self.local_median_size
+        values = [value for value, _ in self._warm_up]
+        emitted = []
+        for j, (value, beat_time) in enumerate(self._warm_up[:size]):
+            median = np.median(values[:j] + values[j + 1 :])
+            if abs(value - median) > self.threshold:
+                value = median
+            emitted.append((value, beat_time))
+
+        value, beat_time = self._warm_up[size]
+        median = np.median(values[:size])
+        if value > median + self.threshold:
+            value = median
+        emitted.append((value, beat_time))
+        self._history.extend(values[1:])
+        return emitted
+
+
+class BandPowerTracker:
+    """Recursive VLF, LF and HF band powers of an evenly sampled RRi series.
+
+       The DFT bins up to the highest band are updated by a sliding DFT for
+       each new sample, in O(bins) time, instead of estimating the whole PSD
+       of every window. The band powers of the last `nperseg` samples are the
+       same returned by `hrv.classical.frequency_domain` with Welch's method
+       and `nperseg` samples: the mean is removed by zeroing the DC bin, the
+       Hann window is applied as a convolution of the neighbouring bins and
+       the PSD is integrated with the trapezoidal method. The bins are
+       recalculated from the samples every `nperseg` updates, which bounds
+       the rounding errors of the recursion at an amortized O(bins) cost.
+
+    Parameters
+    ----------
+    fs : float, optional
+        sampling frequency of the samples, e.g. of the interpolated RRi
+        series. Defaults to 4.0
+    nperseg : int, optional
+        number of samples of the window. Defaults to 256
+    vlf_band, lf_band, hf_band : tuple, optional
+        frequency bands. See `hrv.classical.frequency_domain`
+
+    Examples
+    --------
+    >>> from hrv.streaming import BandPowerTracker
+    >>> tracker = BandPowerTracker(fs=4.0, nperseg=256)
+    >>> for sample in resampled_rri_samples():
+    ...     band_powers = tracker.update(sample)
+    ...     print(band_powers["lf"], band_powers["hf"])
+    """
+
+    def __init__(
+        self,
+        fs=4.0,
+        nperseg=256,
+        vlf_band=(0, 0.04),
+        lf_band=(0.04, 0.15),
+        hf_band=(0.15, 0.4),
+    ):
+        self.fs = fs
+        self.nperseg = nperseg
+        self.bands = (vlf_band, lf_band, hf_band)
+
+        highest_bin = int(np.ceil(max(band[1] for band in self.bands) * nperseg / fs))
+        # One more bin is needed by the window of the highest bin, unless the
+        # bands reach the Nyquist frequency: the bins above it are the
+        # conjugates of the bins below it
+        self._one_sided = highest_bin + 2 > nperseg // 2 + 1
+        n_bins = nperseg // 2 + 1 if self._one_sided else highest_bin + 2
+        n_psd_bins = n_bins if self._one_sided else n_bins - 1
+        bins = np.arange(n_bins)
+        self._frequencies = bins[:n_psd_bins] * fs / nperseg
+        self._twiddles = np.exp(2j * np.pi * bins / nperseg)
+        self._basis = np.exp(-2j * np.pi * np.outer(bins, np.arange(nperseg)) / nperseg)
+        window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(nperseg) / nperseg)
+        self._scale = np.full(n_psd_bins, 2.0 / (fs * np.sum(window ** 2)))
+        self._scale[0] /= 2
+        if self._one_sided and nperseg % 2 == 0:
+            # The Nyquist bin is not doubled by scipy's one-sided PSD
+            self._scale[-1] /= 2
+
+        self._spectrum = np.zeros(n_bins, dtype=np.complex128)
+        self._samples = np.zeros(nperseg)
+        self._position = 0
+        self._count = 0
+
+    def update(self, sample):
+        """
+        Add a sample and return the frequency domain indices of the last
+        `nperseg` samples (nan while fewer samples were added)
+
+        Parameters
+        ----------
+        sample : Number
+            new sample of the evenly sampled RRi series
+        """
+        oldest = self._samples[self._position]
+        self._samples[self._position] = sample
+        self._position = (self._position + 1) % self.nperseg
+        self._count += 1
+
+        if self._count % self.nperseg == 0:
+            self._spectrum = self._basis @ np.roll(self._samples, -self._position)
+        else:
+            self._spectrum = (self._spectrum + (sample - oldest)) * self._twiddles
+
+        return self.band_powers()
+
+    def extend(self, samples):
+        """
+        Add many samples and return a dictionary with the traces of the
+        indices, one value per sample. See `update`
+        """
+        traces = [self.update(sample) for sample in samples]
+        keys = traces[0].keys() if traces else self.band_powers().keys()
+        return {key: np.array([trace[key] for trace in traces]) for key in keys}
+
+    def band_powers(self):
+        """Return the frequency domain indices of the last `nperseg` samples"""
+        if self._count < self.nperseg:
+            return dict.fromkeys(
+                ["total_power", "vlf", "lf", "hf", "lf_hf", "lfnu", "hfnu"], np.nan
+            )
+
+        spectrum = self._spectrum.copy()
+        # Constant detrend only changes the DC bin
+        spectrum[0] = 0.0
+        if self._one_sided:
+            following = np.conj(spectrum[self.nperseg - len(spectrum)])
+            spectrum = np.append(spectrum, following)
+        previous = np.concatenate([[np.conj(spectrum[1])], spectrum[:-2]])
+        windowed = 0.5 * spectrum[:-1] - 0.25 * previous - 0.25 * spectrum[1:]
+        pxx = self._scale * np.abs(windowed) ** 2
+        return _auc(self._frequencies, pxx, *self.bands)
+
+    def __repr__(self):
+        return "BandPowerTracker(fs={}, nperseg={})".format(self.fs, self.nperseg)
+
+
+class Windows:
+    """Split a stream of beats in running windows.
+
+       The windows [start, start + window) begin every step seconds from
+       time 0. Only the beats of the current window are kept in memory and
+       a window is completed by the first beat after its end. Used by the
+       stream mode of the command line interface and by
+       `hrv.aio.windowed_metrics`.
+
+    Parameters
+    ----------
+    window : float
+        size of the windows in seconds
+    step : float
+        seconds between the start of consecutive windows
+
+    Examples
+    --------
+    >>> from hrv.streaming import Windows
+    >>> windows = Windows(window=2, step=1)
+    >>> windows.add(0.8, 800.0)
+    []
+    >>> windows.add(2.4, 1600.0)
+    [(0.0, 2.0, [(0.8, 800.0)])]
+    """
+
+    def __init__(self, window, step):
+        self.window = window
+        self.step = step
+        self._start = 0.0
+        self._beats = deque()
+
+    def add(self, time, value):
+        """Add a beat and return the (start, end, beats) of completed windows"""
+        completed = []
+        while time >= self._start + self.window:
+            end = self._start + self.window
+            completed.append((self._start, end, list(self._beats)))
+            self._start += self.step
+            while self._beats and self._beats[0][0] < self._start:
+                self._beats.popleft()
+        self._beats.append((time, value))
+        return completed
+
+
+def _beats(rri, time, last_time):
+    values = np.atleast_1d(np.asarray(rri, dtype=np.float64))
+    if np.any(values <= 0):
+        raise ValueError("rri series can only have positive values")
+    if time is None:
+        times = np.cumsum(values) / 1000.0
+        if last_time is None:
+            times -= times[0] if len(times) else 0.0
+        else:
+            times += last_time
+    else:
+        times = np.atleast_1d(np.asarray(time, dtype=np.float64))
+        if len(times) != len(values):
+            raise ValueError("rri and time series must have the same length")
+
+    return values, times, times[-1] if len(times) else last_time
+
+
+def _emitted(beats):
+    if not beats:
+        return np.array([]), np.array([])
+    values, times = zip(*beats)
+    return np.array(values, dtype=np.float64), np.array(times, dtype=np.float64)
+
+
+def _std_from_sums(count, total, squared_total):
+    if count < 2:
+        return np.nan
+    return np.sqrt(max(squared_total - total ** 2 / count, 0.0) / (count - 1))
+
+
+def _moments(values):
+    mean = np.mean(values)
+    return len(values), mean, np.sum((values - mean) ** 2)
+
+
+def _combine(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    # Chan et al. parallel update of the mean and sum of squared deviations
+    count = count_a + count_b
+    if not count_a:
+        return count_b, mean_b, m2_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / count
+    m2 = m2_a + m2_b + delta ** 2 * count_a * count_b / count
+    return count, mean, m2
+
+
+def _combine_means(count_a, mean_a, count_b, mean_b):
+    if not count_a:
+        return mean_b
+    return mean_a + (mean_b - mean_a) * count_b / (count_a + count_b)
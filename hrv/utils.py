@@ -65,6 +65,13 @@ def validate_frequency_domain_arguments(func):
     return _check_frequency_domain_arguments
 
 
+def _validate_choice(name, available):
+    if name not in available:
+        raise ValueError(
+            "`{}` not supported! Choose among: {}".format(name, ", ".join(available))
+        )
+
+
 def _create_time_info(rri):
     rri_time = np.cumsum(rri) / 1000.0  # make it seconds
     return rri_time - rri_time[0]  # force it to start at zero
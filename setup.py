@@ -36,6 +36,8 @@ setup(
     include_package_data=True,
     author='Rhenan Bartels',
     install_requires=install_requires,
+    extras_require={'parquet': ['pyarrow']},
+    entry_points={'console_scripts': ['hrv=hrv.cli:main']},
     dependency_links=dependency_links,
     author_email='rhenan.bartels@gmail.com'
 )
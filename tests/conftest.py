@@ -1,5 +1,7 @@
+import struct
 from tempfile import NamedTemporaryFile
 
+import numpy as np
 import pytest
 
 
@@ -17,3 +19,110 @@ def text_file_with_floats():
         fobj.seek(0)
 
     yield temp_rri_text
+
+
+def _edf_bytes(
+    hr,
+    beats,
+    record_duration=1,
+    hr_per_record=1,
+    annot_bytes=60,
+    events=(),
+    discontinuous=False,
+):
+    def _fields(values, size):
+        return b"".join(str(v).ljust(size)[:size].encode("ascii") for v in values)
+
+    n_records = len(hr) // hr_per_record
+    labels = ["HR", "EDF Annotations"]
+    header = (
+        b"0".ljust(8)
+        + b"X X X X".ljust(80)
+        + b"Startdate 01-JAN-2020 X X X".ljust(80)
+        + b"01.01.20"
+        + b"00.00.00"
+        + str(256 * 3).encode().ljust(8)
+        + (b"EDF+D" if discontinuous else b"EDF+C").ljust(44)
+        + str(n_records).encode().ljust(8)
+        + str(record_duration).encode().ljust(8)
+        + b"2".ljust(4)
+        + _fields(labels, 16)
+        + _fields(["", ""], 80)
+        + _fields(["bpm", ""], 8)
+        + _fields([0, -1], 8)
+        + _fields([250, 1], 8)
+        + _fields([0, -32768], 8)
+        + _fields([250, 32767], 8)
+        + _fields(["", ""], 80)
+        + _fields([hr_per_record, annot_bytes // 2], 8)
+        + _fields(["", ""], 32)
+    )
+
+    data = b""
+    for record in range(n_records):
+        onset = record * record_duration
+        samples = hr[record * hr_per_record : (record + 1) * hr_per_record]
+        tals = "+{}\x14\x14\x00".format(onset)
+        for beat in beats:
+            if onset <= beat < onset + record_duration:
+                tals += "+{}\x14R\x14\x00".format(beat)
+        for event_onset, text in events:
+            if onset <= event_onset < onset + record_duration:
+                tals += "+{}\x14{}\x14\x00".format(event_onset, text)
+        data += np.array(samples, dtype="<i2").tobytes()
+        data += tals.encode("ascii").ljust(annot_bytes, b"\x00")
+
+    return header + data
+
+
+@pytest.fixture
+def edf_file(tmpdir):
+    hr = [75, 80, 60, 0, 50, 75]
+    beats = [0.5, 1.3, 2.1, 3.0, 4.0, 4.8, 5.6]
+    edf_path = tmpdir.join("rri.edf")
+    edf_path.write_binary(_edf_bytes(hr, beats))
+
+    yield str(edf_path)
+
+
+def _fit_bytes(hrv_messages):
+    def _definition(local_type, global_type, fields, dev_fields=()):
+        header = 0x40 | local_type | (0x20 if dev_fields else 0)
+        content = struct.pack("<BBBHB", header, 0, 0, global_type, len(fields))
+        for field in fields:
+            content += struct.pack("BBB", *field)
+        if dev_fields:
+            content += struct.pack("B", len(dev_fields))
+            for field in dev_fields:
+                content += struct.pack("BBB", *field)
+        return content
+
+    # file_id message with a developer field
+    data = _definition(0, 0, [(0, 1, 0x00), (4, 4, 0x86)], dev_fields=[(0, 2, 0)])
+    data += struct.pack("<BBIH", 0, 4, 1000, 7)
+    # hrv messages of beat-to-beat intervals (in 1/1000 s), one definition
+    # (local message type) per number of intervals
+    local_types = {}
+    for i, message in enumerate(hrv_messages):
+        if len(message) not in local_types:
+            local_types[len(message)] = local_type = len(local_types) + 1
+            data += _definition(local_type, 78, [(0, 2 * len(message), 0x84)])
+        local_type = local_types[len(message)]
+        # alternate between normal and compressed timestamp headers
+        header = local_type if i % 2 == 0 else 0x80 | (local_type << 5) | i
+        data += struct.pack("<B{}H".format(len(message)), header, *message)
+
+    header = struct.pack("<BBHI4sH", 14, 16, 2100, len(data), b".FIT", 0)
+    return header + data + b"\x00\x00"
+
+
+@pytest.fixture
+def fit_file(tmpdir):
+    hrv_messages = [
+        (800, 810, 815, 750, 0xFFFF),
+        (790, 815, 800, 795, 0xFFFF),
+    ]
+    fit_path = tmpdir.join("rri.fit")
+    fit_path.write_binary(_fit_bytes(hrv_messages))
+
+    yield str(fit_path)
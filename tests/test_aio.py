@@ -0,0 +1,123 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from hrv.aio import windowed_metrics
+from hrv.filters import _quotient
+from hrv.planner import compute
+from hrv.rri import RRi
+from hrv.sampledata import load_noisy_rri, load_rest_rri
+
+
+async def _beats(values, chunk_size=1):
+    for position in range(0, len(values), chunk_size):
+        await asyncio.sleep(0)
+        yield values[position : position + chunk_size]
+
+
+async def _collect(metrics):
+    return [results async for results in metrics]
+
+
+def _expected_windows(values, time, window, step, indices, **kwargs):
+    expected = []
+    start = 0.0
+    while start + window <= time[-1]:
+        mask = (time >= start) & (time < start + window)
+        results = {"start": start, "end": start + window, "n_beats": int(mask.sum())}
+        results.update(compute(RRi(values[mask], time[mask]), indices, **kwargs))
+        expected.append(results)
+        start += step
+    return expected
+
+
+def _assert_windows_equal(windows, expected):
+    assert len(windows) == len(expected)
+    for results, expected_results in zip(windows, expected):
+        assert list(results.keys()) == list(expected_results.keys())
+        for key, value in expected_results.items():
+            np.testing.assert_allclose(results[key], value)
+
+
+class TestWindowedMetrics:
+    def test_time_domain_and_non_linear_windows(self):
+        rri = load_rest_rri()
+
+        windows = asyncio.run(
+            _collect(windowed_metrics(_beats(rri.values), window=120, step=60))
+        )
+
+        expected = _expected_windows(
+            rri.values, rri.time, 120, 60, ["time", "non_linear"]
+        )
+        _assert_windows_equal(windows, expected)
+
+    def test_frequency_domain_in_executor(self):
+        rri = load_rest_rri()
+
+        async def _run():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                metrics = windowed_metrics(
+                    _beats(rri.values, chunk_size=7),
+                    window=180,
+                    step=90,
+                    indices=["rmssd", "lf", "hf"],
+                    executor=executor,
+                    nperseg=256,
+                )
+                return await _collect(metrics)
+
+        windows = asyncio.run(_run())
+
+        expected = _expected_windows(
+            rri.values, rri.time, 180, 90, ["rmssd", "lf", "hf"], nperseg=256
+        )
+        _assert_windows_equal(windows, expected)
+
+    def test_quotient_filter(self):
+        rri = load_noisy_rri()
+
+        windows = asyncio.run(
+            _collect(
+                windowed_metrics(
+                    _beats(rri.values, chunk_size=10),
+                    window=60,
+                    step=60,
+                    filters=["quotient"],
+                    indices=["time"],
+                )
+            )
+        )
+
+        values, time = _quotient(rri.values, rri.time)
+        expected = _expected_windows(values, time, 60, 60, ["time"])
+        _assert_windows_equal(windows, expected)
+
+    def test_many_concurrent_streams(self):
+        rri = load_rest_rri()
+
+        async def _run():
+            streams = [
+                _collect(
+                    windowed_metrics(
+                        _beats(rri.values[:300], chunk_size=20),
+                        window=60,
+                        step=30,
+                        indices=["rmssd"],
+                    )
+                )
+                for _ in range(500)
+            ]
+            return await asyncio.gather(*streams)
+
+        all_windows = asyncio.run(_run())
+
+        assert len(all_windows) == 500
+        assert all(windows == all_windows[0] for windows in all_windows)
+        assert len(all_windows[0]) > 0
+
+    def test_invalid_step(self):
+        with pytest.raises(ValueError):
+            asyncio.run(_collect(windowed_metrics(_beats([800]), window=10, step=20)))
@@ -0,0 +1,206 @@
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import hrv.batch
+from hrv.batch import run_incremental
+from hrv.pipeline import Pipeline
+
+SAMPLES = ["exercise_rri.hrm", "noisy_rri.hrm", "rest_rri.txt"]
+
+
+@pytest.fixture
+def cohort(tmpdir):
+    directory = tmpdir.mkdir("cohort")
+    for sample in SAMPLES:
+        shutil.copy(os.path.join("hrv", "sampledata", sample), str(directory))
+    return str(directory)
+
+
+@pytest.fixture
+def analysed(monkeypatch):
+    names = []
+    analyse = hrv.batch._analyse
+
+    def _counted(task):
+        names.append(task[0])
+        return analyse(task)
+
+    monkeypatch.setattr(hrv.batch, "_analyse", _counted)
+    return names
+
+
+class TestRunIncremental:
+    def test_first_run_analyses_every_file(self, cohort, tmpdir):
+        pipeline = Pipeline(indices=["time"])
+        manifest = str(tmpdir.join("manifest.json"))
+
+        results, errors, computed = run_incremental(cohort, pipeline, manifest)
+
+        assert list(results.keys()) == SAMPLES
+        assert errors == {}
+        assert computed == SAMPLES
+        expected = pipeline.run(os.path.join(cohort, "rest_rri.txt"))
+        assert results["rest_rri.txt"] == pytest.approx(dict(expected))
+        with open(manifest) as manifest_file:
+            state = json.load(manifest_file)
+        assert state["config"]["pipeline"] == repr(pipeline)
+        assert sorted(state["files"]) == SAMPLES
+
+    def test_unchanged_files_are_not_analysed(self, cohort, tmpdir, analysed):
+        pipeline = Pipeline(indices=["time"])
+        manifest = str(tmpdir.join("manifest.json"))
+        first_results, _, _ = run_incremental(cohort, pipeline, manifest)
+        del analysed[:]
+
+        results, errors, computed = run_incremental(cohort, pipeline, manifest)
+
+        assert analysed == []
+        assert computed == []
+        assert results == first_results
+
+    def test_only_new_and_changed_files_are_analysed(self, cohort, tmpdir, analysed):
+        pipeline = Pipeline(indices=["time", "non_linear"])
+        manifest = str(tmpdir.join("manifest.json"))
+        run_incremental(cohort, pipeline, manifest)
+        del analysed[:]
+        with open(os.path.join(cohort, "rest_rri.txt"), "a") as rri_file:
+            rri_file.write("\n1000\n")
+        shutil.copy(
+            os.path.join("tests", "test_files", "test_file_2.hrm"),
+            os.path.join(cohort, "new.hrm"),
+        )
+
+        results, errors, computed = run_incremental(cohort, pipeline, manifest)
+
+        assert sorted(analysed) == ["new.hrm", "rest_rri.txt"]
+        assert computed == ["new.hrm", "rest_rri.txt"]
+        assert list(results.keys()) == ["exercise_rri.hrm", "new.hrm"] + SAMPLES[1:]
+
+    def test_touched_file_with_same_content_is_not_analysed(
+        self, cohort, tmpdir, analysed
+    ):
+        pipeline = Pipeline(indices=["time"])
+        manifest = str(tmpdir.join("manifest.json"))
+        run_incremental(cohort, pipeline, manifest)
+        del analysed[:]
+        os.utime(os.path.join(cohort, "noisy_rri.hrm"), (0, 0))
+
+        _, _, computed = run_incremental(cohort, pipeline, manifest)
+
+        assert computed == []
+        with open(manifest) as manifest_file:
+            state = json.load(manifest_file)
+        assert state["files"]["noisy_rri.hrm"]["signature"][1] == 0
+
+    def test_configuration_change_analyses_every_file(self, cohort, tmpdir):
+        manifest = str(tmpdir.join("manifest.json"))
+        run_incremental(cohort, Pipeline(indices=["time"]), manifest)
+
+        results, _, computed = run_incremental(
+            cohort, Pipeline(filters=["quotient"], indices=["time"]), manifest
+        )
+
+        assert computed == SAMPLES
+
+    def test_removed_files_leave_the_manifest(self, cohort, tmpdir):
+        pipeline = Pipeline(indices=["time"])
+        manifest = str(tmpdir.join("manifest.json"))
+        run_incremental(cohort, pipeline, manifest)
+        os.remove(os.path.join(cohort, "noisy_rri.hrm"))
+
+        results, _, computed = run_incremental(cohort, pipeline, manifest)
+
+        assert list(results.keys()) == ["exercise_rri.hrm", "rest_rri.txt"]
+        with open(manifest) as manifest_file:
+            assert "noisy_rri.hrm" not in json.load(manifest_file)["files"]
+
+    def test_errors_are_analysed_again(self, tmpdir, analysed):
+        files = [
+            os.path.join("hrv", "sampledata", "rest_rri.txt"),
+            os.path.join("tests", "test_files", "empty.txt"),
+        ]
+        pipeline = Pipeline(indices=["time"])
+        manifest = str(tmpdir.join("manifest.json"))
+
+        run_incremental(files, pipeline, manifest)
+        results, errors, computed = run_incremental(files, pipeline, manifest)
+
+        assert list(results.keys()) == [files[0]]
+        assert list(errors.keys()) == [files[1]]
+        assert analysed == files + [files[1]]
+
+    def test_resume_after_interruption(self, cohort, tmpdir, monkeypatch):
+        pipeline = Pipeline(indices=["time"])
+        manifest = str(tmpdir.join("manifest.json"))
+        analyse = hrv.batch._analyse
+
+        def _interrupted(task):
+            if task[0] == "noisy_rri.hrm":
+                raise KeyboardInterrupt
+            return analyse(task)
+
+        monkeypatch.setattr(hrv.batch, "_analyse", _interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            run_incremental(cohort, pipeline, manifest, checkpoint_every=1)
+        monkeypatch.setattr(hrv.batch, "_analyse", analyse)
+
+        results, _, computed = run_incremental(cohort, pipeline, manifest)
+
+        assert computed == ["noisy_rri.hrm", "rest_rri.txt"]
+        assert list(results.keys()) == SAMPLES
+
+    def test_interrupted_process_pool_stops_submitting_files(
+        self, tmpdir, monkeypatch
+    ):
+        directory = tmpdir.mkdir("cohort")
+        for index in range(40):
+            shutil.copy(
+                os.path.join("hrv", "sampledata", "rest_rri.txt"),
+                str(directory.join("{:02d}.txt".format(index))),
+            )
+        manifest = str(tmpdir.join("manifest.json"))
+        submitted = []
+
+        class _CountingExecutor(ProcessPoolExecutor):
+            def submit(self, fn, task):
+                submitted.append(task[0])
+                return super().submit(fn, task)
+
+        write_manifest = hrv.batch._write_manifest
+        checkpoints = []
+
+        def _interrupted(manifest, state):
+            checkpoints.append(len(state["files"]))
+            if len(checkpoints) == 2:
+                raise KeyboardInterrupt
+            write_manifest(manifest, state)
+
+        monkeypatch.setattr(hrv.batch, "ProcessPoolExecutor", _CountingExecutor)
+        monkeypatch.setattr(hrv.batch, "_write_manifest", _interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            run_incremental(
+                str(directory), Pipeline(), manifest, n_jobs=2, checkpoint_every=1
+            )
+
+        # 4 files in flight plus the one submitted after the first checkpoint
+        assert len(submitted) == 5
+        assert checkpoints == [1, 2, 2]
+        with open(manifest) as manifest_file:
+            assert len(json.load(manifest_file)["files"]) == 2
+
+    def test_process_pool(self, cohort, tmpdir):
+        pipeline = Pipeline(indices=["time", "non_linear"])
+        serial_results, _, _ = run_incremental(
+            cohort, pipeline, str(tmpdir.join("serial.json"))
+        )
+
+        results, errors, computed = run_incremental(
+            cohort, pipeline, str(tmpdir.join("parallel.json")), n_jobs=2
+        )
+
+        assert computed == SAMPLES
+        assert results == serial_results
@@ -0,0 +1,179 @@
+import os
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from hrv.cache import ResultCache, _hash_call
+from hrv.classical import frequency_domain, non_linear, time_domain
+from hrv.detrend import polynomial_detrend
+from hrv.rri import RRi, RRiDetrended
+from hrv.sampledata import load_exercise_rri, load_rest_rri
+
+
+class TestResultCache:
+    def test_cached_results_are_equal_to_calculated_results(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        rri = load_rest_rri()
+        cached_time_domain = cache.cached(time_domain)
+        cached_non_linear = cache.cached(non_linear)
+
+        first = cached_time_domain(rri)
+        second = cached_time_domain(rri)
+
+        assert first == second == time_domain(rri)
+        assert cached_non_linear(rri) == non_linear(rri)
+        assert (cache.hits, cache.misses) == (1, 2)
+        assert len(cache) == 2
+
+    def test_hit_does_not_call_function(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        calls = []
+
+        def analysis(rri, fs=4.0):
+            calls.append(fs)
+            return {"mean": np.mean(rri)}
+
+        cached_analysis = cache.cached(analysis)
+        cached_analysis(load_rest_rri(), fs=4.0)
+        cached_analysis(load_rest_rri(), fs=4.0)
+
+        assert calls == [4.0]
+
+    def test_parameters_are_part_of_the_key(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        rri = load_rest_rri()
+        cached_frequency_domain = cache.cached(frequency_domain)
+
+        welch_results = cached_frequency_domain(rri, fs=4.0)
+        other_results = cached_frequency_domain(rri, fs=5.0)
+
+        assert welch_results == frequency_domain(rri, fs=4.0)
+        assert other_results == frequency_domain(rri, fs=5.0)
+        assert cache.misses == 2
+
+    def test_rri_values_and_time_are_part_of_the_key(self):
+        rri = load_rest_rri()
+        shifted = RRi(rri.values, rri.time + 1)
+        detrended = RRiDetrended(rri.values, rri.time, detrended=True)
+
+        keys = {
+            _hash_call(time_domain, (rri,), {}),
+            _hash_call(time_domain, (shifted,), {}),
+            _hash_call(time_domain, (detrended,), {}),
+            _hash_call(time_domain, (load_exercise_rri(),), {}),
+            _hash_call(non_linear, (rri,), {}),
+        }
+
+        assert len(keys) == 5
+
+    def test_time_of_rri_in_lists_is_part_of_the_key(self):
+        rri = load_rest_rri()
+        shifted = RRi(rri.values, rri.time + 1)
+
+        key = _hash_call(time_domain, ([rri, rri],), {})
+
+        assert _hash_call(time_domain, ([rri, shifted],), {}) != key
+        assert _hash_call(time_domain, ([rri.values, rri.values],), {}) != key
+
+    def test_calls_are_normalized_by_signature(self):
+        def analysis(rri, a=1, b=2):
+            return a + b
+
+        rri = load_rest_rri()
+        key = _hash_call(analysis, (rri,), {})
+
+        assert _hash_call(analysis, (rri, 1), {"b": 2}) == key
+        assert _hash_call(analysis, (load_rest_rri(),), {"b": 2, "a": 1}) == key
+        assert _hash_call(analysis, (rri,), {"a": 2}) != key
+
+    def test_local_functions_with_the_same_name_have_different_keys(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        rri = load_rest_rri()
+
+        def scaled(factor):
+            return cache.cached(lambda rri: np.mean(rri) * factor)
+
+        assert scaled(1)(rri) == np.mean(rri)
+        assert scaled(2)(rri) == 2 * np.mean(rri)
+        assert cache.cached(lambda rri: np.max(rri))(rri) == np.max(rri)
+        assert cache.misses == 3
+
+    def test_arguments_without_content_hash_are_refused(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        cached_analysis = cache.cached(lambda rri, options: len(rri))
+
+        with pytest.raises(TypeError):
+            cached_analysis(load_rest_rri(), object())
+
+        keys = {
+            _hash_call(np.mean, (np.array(["a", "b"]),), {}),
+            _hash_call(np.mean, (np.array(["a", "c"]),), {}),
+        }
+        assert len(keys) == 2
+
+    @pytest.mark.parametrize(
+        "content", [b"", b"not a pickle", b"\x80\x04cmissing_module\nResult\n."]
+    )
+    def test_unreadable_entries_are_misses(self, tmpdir, content):
+        cache = ResultCache(str(tmpdir))
+        cache.set("a", 1)
+        tmpdir.join("a.pkl").write_binary(content)
+
+        assert cache.get("a") == (False, None)
+        assert cache.misses == 1
+        assert "a" not in cache
+        assert cache.size == 0
+
+    def test_writes_do_not_scan_the_directory_below_the_limit(self, tmpdir):
+        cache = ResultCache(str(tmpdir), max_size=10 ** 9)
+
+        with mock.patch.object(ResultCache, "_entries") as entries:
+            for key in "abc":
+                cache.set(key, np.zeros(100))
+            cache.set("a", np.zeros(200))
+
+        entries.assert_not_called()
+        assert cache._size == cache.size
+
+    def test_cache_detrender(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        rri = load_rest_rri()
+        cached_detrend = cache.cached(polynomial_detrend)
+
+        cached_detrend(rri, degree=2)
+        detrended = cached_detrend(rri, degree=2)
+
+        expected = polynomial_detrend(rri, degree=2)
+        assert isinstance(detrended, RRiDetrended)
+        assert detrended.detrended
+        np.testing.assert_array_equal(detrended.values, expected.values)
+        np.testing.assert_array_equal(detrended.time, expected.time)
+        assert cache.hits == 1
+
+    def test_least_recently_used_entries_are_evicted(self, tmpdir):
+        cache = ResultCache(str(tmpdir), max_size=10 ** 9)
+        for key in "abc":
+            cache.set(key, np.zeros(100))
+        entry_size = cache.size // 3
+        for mtime, key in enumerate("abc"):
+            os.utime(cache._path(key), (mtime, mtime))
+        # Reading "a" makes "b" the least recently used entry
+        assert cache.get("a")[0]
+
+        cache.max_size = 3 * entry_size
+        cache.set("d", np.zeros(100))
+
+        assert "b" not in cache
+        assert all(key in cache for key in "acd")
+        assert cache.size <= cache.max_size
+
+    def test_clear(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.get("a") == (False, None)
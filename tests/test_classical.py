@@ -8,6 +8,7 @@ from spectrum import marple_data
 
 from hrv.classical import (
     time_domain,
+    time_domain_windows,
     frequency_domain,
     _auc,
     _poincare,
@@ -17,6 +18,7 @@ from hrv.classical import (
 )
 from hrv.io import read_from_text
 from hrv.rri import RRi, RRiDetrended
+from hrv.sampledata import load_rest_rri
 from tests.test_utils import FAKE_RRI
 
 
@@ -67,6 +69,27 @@ class TimeDomainIndexesTestCase(unittest.TestCase):
         self.assertEqual(pnn50, expected)
 
 
+class TimeDomainWindowsTestCase(unittest.TestCase):
+    def test_equal_to_time_domain_of_each_window(self):
+        values, _ = load_rest_rri().beat_split(size=128, overlap=64)
+
+        response = time_domain_windows(values)
+
+        self.assertEqual(list(response.keys()), list(time_domain(values[0]).keys()))
+        for position, window in enumerate(values):
+            for index, value in time_domain(window).items():
+                np.testing.assert_allclose(response[index][position], value)
+
+    def test_chunks_give_the_same_results(self):
+        values, _ = load_rest_rri().beat_split(size=64, overlap=60)
+
+        response = time_domain_windows(values, chunk_size=7)
+
+        for index, expected in time_domain_windows(values).items():
+            np.testing.assert_allclose(response[index], expected)
+        self.assertEqual(len(response["rmssd"]), len(values))
+
+
 class FrequencyDomainTestCase(unittest.TestCase):
     def setUp(self):
         self.real_rri = read_from_text("tests/test_files/real_rri.txt")
@@ -0,0 +1,150 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from hrv.classical import frequency_domain, non_linear, time_domain
+from hrv.cli import main
+from hrv.detrend import polynomial_detrend
+from hrv.filters import quotient
+from hrv.sampledata import load_noisy_rri
+
+NOISY_RRI = "hrv/sampledata/noisy_rri.hrm"
+REST_RRI = "hrv/sampledata/rest_rri.txt"
+
+
+class TestCommandLine:
+    def test_analyse_files_to_csv(self, capsys):
+        exit_code = main([REST_RRI, NOISY_RRI, "--jobs", "1", "--indices", "time"])
+
+        out, err = capsys.readouterr()
+        lines = out.splitlines()
+        assert exit_code == 0
+        assert lines[0] == "file,rmssd,sdnn,sdsd,nn50,pnn50,mrri,mhr"
+        assert lines[1].startswith(REST_RRI + ",")
+        assert lines[2].startswith(NOISY_RRI + ",")
+        assert "2 files (0 errors)" in err
+        assert "read" in err and "time" in err
+
+    def test_analyse_files_with_filter_and_detrend(self, tmpdir):
+        output = str(tmpdir.join("results.jsonl"))
+
+        main(
+            [
+                NOISY_RRI,
+                "--filter",
+                "quotient",
+                "--detrend",
+                "polynomial",
+                "-j",
+                "1",
+                "-o",
+                output,
+                "--quiet",
+            ]
+        )
+
+        with open(output) as fobj:
+            row = json.loads(fobj.readline())
+        rri = quotient(load_noisy_rri())
+        expected = dict(time_domain(rri))
+        expected.update(frequency_domain(polynomial_detrend(rri)))
+        expected.update(non_linear(rri))
+        assert row["file"] == NOISY_RRI
+        for key, value in expected.items():
+            np.testing.assert_almost_equal(row[key], value)
+
+    def test_analyse_files_in_process_pool(self, capsys):
+        main([REST_RRI, NOISY_RRI, REST_RRI, "--jobs", "2", "--format", "jsonl", "-q"])
+
+        out, err = capsys.readouterr()
+        rows = [json.loads(line) for line in out.splitlines()]
+        assert [row["file"] for row in rows] == [REST_RRI, NOISY_RRI, REST_RRI]
+        assert err == ""
+
+    def test_report_files_with_errors(self, capsys):
+        exit_code = main(["tests/test_files/empty.txt", REST_RRI, "-j", "1"])
+
+        out, err = capsys.readouterr()
+        assert exit_code == 1
+        assert len(out.splitlines()) == 2
+        assert "tests/test_files/empty.txt: 'empty file!'" in err
+        assert "2 files (1 errors)" in err
+
+
+class TestCommandLineStream:
+    def test_stream_windows(self, capsys, monkeypatch):
+        rri = load_noisy_rri()
+        rri = rri[:400]
+        lines = [" ".join(map(str, chunk)) for chunk in np.split(rri.values, 80)]
+        monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(lines)))
+
+        exit_code = main(
+            ["--stream", "--window", "60", "--step", "30", "--indices", "time"]
+        )
+
+        out, err = capsys.readouterr()
+        rows = [json.loads(line) for line in out.splitlines()]
+        assert exit_code == 0
+        assert len(rows) == int((rri.time[-1] - 60) / 30) + 1
+        for row in rows:
+            window = (rri.time >= row["start"]) & (rri.time < row["end"])
+            expected = time_domain(rri[window])
+            assert row["n_beats"] > 0
+            for key, value in expected.items():
+                np.testing.assert_almost_equal(row[key], value)
+
+    def test_stream_writes_undefined_indices_as_null(self, capsys, monkeypatch):
+        # The PSD of a constant window is zero, so lf_hf is 0 / 0
+        monkeypatch.setattr("sys.stdin", io.StringIO("800 " * 10))
+
+        main(["--stream", "--window", "4", "--step", "4", "--indices", "frequency"])
+
+        out, _ = capsys.readouterr()
+        row = json.loads(out.splitlines()[0], parse_constant=pytest.fail)
+        assert row["n_beats"] == 5
+        assert row["lf"] == 0
+        assert row["lf_hf"] is None
+        assert row["hfnu"] is None
+
+    def test_stream_requires_valid_step(self, capsys):
+        with pytest.raises(SystemExit):
+            main(["--stream", "--window", "30", "--step", "60"])
+
+    def test_files_are_required_without_stream(self, capsys):
+        with pytest.raises(SystemExit):
+            main([])
+
+
+class TestCommandLineManifest:
+    def test_second_run_reads_results_from_manifest(self, tmpdir, capsys):
+        manifest = str(tmpdir.join("manifest.json"))
+        argv = [REST_RRI, NOISY_RRI, "-j", "1", "--indices", "time"]
+
+        main(argv + ["--manifest", manifest])
+        first_out, first_err = capsys.readouterr()
+        exit_code = main(argv + ["--manifest", manifest])
+        out, err = capsys.readouterr()
+
+        assert exit_code == 0
+        assert "2 files analysed, 0 read" in first_err
+        assert "0 files analysed, 2 read" in err
+        assert out == first_out
+        assert out.splitlines()[0] == "file,rmssd,sdnn,sdsd,nn50,pnn50,mrri,mhr"
+
+
+class TestCommandLineServe:
+    def test_serve_with_command_line_pipeline(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            "hrv.cli.serve", lambda *args, **kwargs: calls.append((args, kwargs))
+        )
+
+        exit_code = main(["--serve", "--port", "0", "--indices", "time", "-j", "2"])
+
+        (host, port), kwargs = calls[0]
+        assert exit_code == 0
+        assert (host, port) == ("127.0.0.1", 0)
+        assert kwargs["pipeline"].indices == ("time",)
+        assert kwargs["n_workers"] == 2
@@ -1,11 +1,42 @@
+import bz2
+import gzip
+import io
+import lzma
+import pathlib
+import shutil
 import unittest
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
 import pytest
 import numpy as np
 
-from hrv.exceptions import EmptyFileError
-from hrv.io import read_from_text, read_from_hrm, read_from_csv
-from hrv.rri import RRi
+from hrv.exceptions import EmptyFileError, FileNotSupportedError
+from hrv.io import (
+    _edf_record_onsets,
+    read_from_text,
+    read_from_hrm,
+    read_from_csv,
+    read_from_wfdb,
+    read_from_edf,
+    read_from_fit,
+    read_file,
+    read_many,
+    list_files,
+    write_to_text,
+    write_to_csv,
+    write_to_hrm,
+    write_results,
+    rri_to_arrow,
+    rri_from_arrow,
+    results_to_arrow,
+    write_to_parquet,
+    read_from_parquet,
+)
+from hrv.nonstationary import TimeVarying
+from hrv.rri import RRi, RRiDetrended
+from tests.conftest import _edf_bytes, _fit_bytes
 from tests.test_utils import FAKE_RRI
 
 
@@ -44,6 +75,13 @@ class TestRRIFileOpening:
 
         np.testing.assert_equal(rri.values, expected)
 
+    def test_open_text_rri_ignores_single_digit_integers(self):
+        content = io.StringIO("800 1\n812.5 0\n790\n5\n")
+
+        rri = read_from_text(content)
+
+        np.testing.assert_equal(rri.values, [800, 812.5, 790])
+
 
 class TestOpenRRiFromCsv:
     def test_open_rri_single_column(self):
@@ -112,3 +150,513 @@ class TestOpenRRiFromCsv:
         assert isinstance(rri, RRi)
         np.testing.assert_equal(rri.values, np.array([790, 815, 800, 795]))
         np.testing.assert_equal(rri.time, np.array([56, 57, 58, 59]))
+
+
+class TestOpenRRiFromWFDB:
+    def test_open_wfdb_annotation_file(self):
+        rri = read_from_wfdb("tests/test_files/test_file_4.atr")
+
+        assert isinstance(rri, RRi)
+        np.testing.assert_almost_equal(
+            rri.values,
+            np.array([290, 350, 350, 3700, 194700, 310, 290]) / 360 * 1000,
+        )
+        np.testing.assert_almost_equal(
+            rri.time, np.array([300, 1250, 1600, 5300, 200000, 200310, 200600]) / 360
+        )
+
+    def test_open_wfdb_annotation_file_with_sampling_frequency(self):
+        rri = read_from_wfdb("tests/test_files/test_file_4.atr", fs=100)
+
+        np.testing.assert_almost_equal(
+            rri.values, [2900, 3500, 3500, 37000, 1947000, 3100, 2900]
+        )
+
+    def test_open_wfdb_annotation_file_with_beat_codes(self):
+        # Include premature ventricular contractions ('V')
+        rri = read_from_wfdb("tests/test_files/test_file_4.atr", fs=100, beat_codes=(1, 5))
+
+        np.testing.assert_almost_equal(
+            rri.values, [2900, 3200, 2800, 3500, 3500, 37000, 1947000, 3100, 2900]
+        )
+
+    def test_open_wfdb_without_header_file(self, tmpdir):
+        atr_file = tmpdir.join("record.atr")
+        with open("tests/test_files/test_file_4.atr", "rb") as fobj:
+            atr_file.write_binary(fobj.read())
+
+        with pytest.raises(ValueError):
+            read_from_wfdb(str(atr_file))
+
+    def test_open_empty_wfdb_file(self):
+        with pytest.raises(EmptyFileError):
+            read_from_wfdb("tests/test_files/empty.txt", fs=360)
+
+
+class TestOpenRRiFromEDF:
+    def test_open_edf_annotations(self, edf_file):
+        rri = read_from_edf(edf_file)
+
+        assert isinstance(rri, RRi)
+        np.testing.assert_almost_equal(rri.values, [800, 800, 900, 1000, 800, 800])
+        np.testing.assert_almost_equal(rri.time, [1.3, 2.1, 3.0, 4.0, 4.8, 5.6])
+
+    def test_open_edf_annotations_in_time_range(self, edf_file):
+        rri = read_from_edf(edf_file, annotation="R", start=2, end=4.5)
+
+        np.testing.assert_almost_equal(rri.values, [900, 1000])
+        np.testing.assert_almost_equal(rri.time, [3.0, 4.0])
+
+    def test_open_edf_annotations_not_found(self, edf_file):
+        with pytest.raises(EmptyFileError):
+            read_from_edf(edf_file, annotation="N")
+
+    def test_open_edf_ignores_annotations_other_than_beats(self, tmpdir):
+        edf_path = tmpdir.join("rri.edf")
+        edf_path.write_binary(
+            _edf_bytes(
+                [75] * 4,
+                [0.5, 1.3, 2.1, 3.0],
+                annot_bytes=100,
+                events=[(0.9, "Sleep stage W"), (2.5, "Arousal")],
+            )
+        )
+
+        rri = read_from_edf(str(edf_path))
+
+        np.testing.assert_almost_equal(rri.values, [800, 800, 900])
+        np.testing.assert_almost_equal(rri.time, [1.3, 2.1, 3.0])
+
+    def test_open_discontinuous_edf_decodes_only_records_in_range(self, tmpdir):
+        beats = np.arange(0.5, 64, 0.8).round(1)
+        edf_path = tmpdir.join("rri.edf")
+        edf_path.write_binary(_edf_bytes([75] * 64, beats, discontinuous=True))
+
+        with mock.patch(
+            "hrv.io._edf_record_onsets", wraps=_edf_record_onsets
+        ) as record_onsets:
+            rri = read_from_edf(str(edf_path), channel="HR", start=10, end=12)
+
+        np.testing.assert_almost_equal(rri.values, [800, 800, 800])
+        np.testing.assert_almost_equal(rri.time, [10, 11, 12])
+        decoded = sum(len(args[0]) for args, _ in record_onsets.call_args_list)
+        assert decoded < 20
+
+    def test_open_edf_heart_rate_channel(self, edf_file):
+        rri = read_from_edf(edf_file, channel="HR")
+
+        np.testing.assert_almost_equal(rri.values, [800, 750, 1000, 1200, 800])
+        np.testing.assert_almost_equal(rri.time, [0, 1, 2, 4, 5])
+
+    def test_open_edf_heart_rate_channel_in_time_range(self, edf_file):
+        rri = read_from_edf(edf_file, channel=0, start=1, end=4)
+
+        np.testing.assert_almost_equal(rri.values, [750, 1000, 1200])
+        np.testing.assert_almost_equal(rri.time, [1, 2, 4])
+
+    def test_open_edf_file_object(self, edf_file):
+        with open(edf_file, "rb") as fobj:
+            content = io.BytesIO(fobj.read())
+
+        rri = read_from_edf(content, channel="HR", start=1, end=4)
+
+        np.testing.assert_almost_equal(rri.values, [750, 1000, 1200])
+        np.testing.assert_almost_equal(rri.time, [1, 2, 4])
+
+    def test_open_edf_channel_does_not_exist(self, edf_file):
+        with pytest.raises(ValueError):
+            read_from_edf(edf_file, channel="ECG")
+
+
+class TestOpenRRiFromFit:
+    def test_open_fit_file(self, fit_file):
+        rri = read_from_fit(fit_file)
+
+        assert isinstance(rri, RRi)
+        np.testing.assert_equal(
+            rri.values, np.array([800, 810, 815, 750, 790, 815, 800, 795])
+        )
+
+    def test_open_fit_file_with_many_hrv_definitions(self, tmpdir):
+        fit_path = tmpdir.join("rri.fit")
+        fit_path.write_binary(_fit_bytes([(800, 801), (900, 901, 902), (700, 701)]))
+
+        rri = read_from_fit(str(fit_path))
+
+        np.testing.assert_equal(rri.values, [800, 801, 900, 901, 902, 700, 701])
+
+    def test_open_empty_fit_file(self):
+        with pytest.raises(EmptyFileError):
+            read_from_fit("tests/test_files/empty.txt")
+
+    def test_open_file_not_fit(self):
+        with pytest.raises(FileNotSupportedError):
+            read_from_fit("tests/test_files/test_file_1.txt")
+
+
+class TestOpenCompressedFiles:
+    def _compress(self, tmpdir, pathname, opener, extension):
+        compressed_path = str(tmpdir.join("rri" + extension))
+        with open(pathname, "rb") as fobj, opener(compressed_path, "wb") as cfobj:
+            cfobj.write(fobj.read())
+
+        return compressed_path
+
+    @pytest.mark.parametrize(
+        "opener,extension", [(gzip.open, ".gz"), (bz2.open, ".bz2"), (lzma.open, ".xz")]
+    )
+    def test_open_compressed_text_file(self, tmpdir, opener, extension):
+        pathname = self._compress(
+            tmpdir, "tests/test_files/test_file_1.txt", opener, extension
+        )
+
+        rri = read_from_text(pathname)
+
+        np.testing.assert_equal(rri.values, np.array(FAKE_RRI))
+
+    def test_open_compressed_hrm_file(self, tmpdir):
+        pathname = self._compress(
+            tmpdir, "tests/test_files/test_file_2.hrm", gzip.open, ".gz"
+        )
+
+        rri = read_from_hrm(pathname)
+
+        np.testing.assert_equal(rri.values, np.array(FAKE_RRI))
+
+    def test_open_compressed_csv_file(self, tmpdir):
+        pathname = self._compress(
+            tmpdir, "tests/test_files/rri_multiple_columns.csv", bz2.open, ".bz2"
+        )
+
+        rri = read_from_csv(pathname, rri_col_index=1, time_col_index=0, row_offset=1)
+
+        np.testing.assert_equal(rri.values, np.array([790, 815, 800, 795]))
+        np.testing.assert_equal(rri.time, np.array([1.0, 2.0, 3.0, 4.0]))
+
+    def test_open_compressed_edf_file(self, tmpdir, edf_file):
+        pathname = self._compress(tmpdir, edf_file, gzip.open, ".gz")
+
+        rri = read_from_edf(pathname)
+
+        np.testing.assert_almost_equal(rri.values, [800, 800, 900, 1000, 800, 800])
+        np.testing.assert_almost_equal(rri.time, [1.3, 2.1, 3.0, 4.0, 4.8, 5.6])
+
+    def test_open_compressed_wfdb_file(self, tmpdir):
+        pathname = self._compress(
+            tmpdir, "tests/test_files/test_file_4.atr", lzma.open, ".xz"
+        )
+
+        rri = read_from_wfdb(pathname, fs=100)
+
+        np.testing.assert_almost_equal(
+            rri.values, [2900, 3500, 3500, 37000, 1947000, 3100, 2900]
+        )
+
+    def test_open_compressed_wfdb_file_with_header(self, tmpdir):
+        shutil.copy("tests/test_files/test_file_4.hea", str(tmpdir.join("rri.hea")))
+        with open("tests/test_files/test_file_4.atr", "rb") as fobj:
+            tmpdir.join("rri.atr.gz").write_binary(gzip.compress(fobj.read()))
+
+        rri = read_from_wfdb(str(tmpdir.join("rri.atr.gz")))
+        rris, errors = read_many(str(tmpdir))
+
+        expected = read_from_wfdb("tests/test_files/test_file_4.atr")
+        np.testing.assert_almost_equal(rri.values, expected.values)
+        assert not errors
+        np.testing.assert_almost_equal(rris["rri.atr.gz"].values, expected.values)
+
+    def test_open_compressed_file_object(self):
+        with open("tests/test_files/test_file_1.txt", "rb") as fobj:
+            compressed = io.BytesIO(gzip.compress(fobj.read()))
+
+        rri = read_from_text(compressed)
+
+        np.testing.assert_equal(rri.values, np.array(FAKE_RRI))
+        assert not compressed.closed
+
+    def test_open_text_file_object(self):
+        with open("tests/test_files/rri_semicolon.csv") as fobj:
+            rri = read_from_csv(fobj, row_offset=1)
+
+            assert not fobj.closed
+
+        np.testing.assert_equal(rri.values, [790, 815, 800, 795])
+
+
+class TestReadMany:
+    def _make_cohort(self, tmpdir):
+        cohort = tmpdir.mkdir("cohort")
+        shutil.copy("tests/test_files/test_file_1.txt", str(cohort.join("a.txt")))
+        shutil.copy("tests/test_files/test_file_2.hrm", str(cohort.join("b.hrm")))
+        shutil.copy("tests/test_files/empty.txt", str(cohort.join("c.txt")))
+        shutil.copy("tests/test_files/test_file_4.atr", str(cohort.join("d.atr")))
+        shutil.copy("tests/test_files/test_file_4.hea", str(cohort.join("d.hea")))
+        with open("tests/test_files/rri_1.csv", "rb") as fobj:
+            cohort.mkdir("sub").join("e.csv.gz").write_binary(gzip.compress(fobj.read()))
+
+        return cohort
+
+    def test_read_directory(self, tmpdir):
+        cohort = self._make_cohort(tmpdir)
+
+        rris, errors = read_many(str(cohort))
+
+        assert list(rris.keys()) == ["a.txt", "b.hrm", "d.atr", "sub/e.csv.gz"]
+        assert list(errors.keys()) == ["c.txt"]
+        assert isinstance(errors["c.txt"], EmptyFileError)
+        np.testing.assert_equal(rris["a.txt"].values, FAKE_RRI)
+        np.testing.assert_equal(rris["b.hrm"].values, FAKE_RRI)
+        np.testing.assert_equal(rris["sub/e.csv.gz"].values, [790, 815, 800, 795])
+
+    def test_read_glob_pattern(self, tmpdir):
+        cohort = self._make_cohort(tmpdir)
+
+        rris, errors = read_many(str(cohort.join("*.txt")))
+
+        assert list(rris.keys()) == [str(cohort.join("a.txt"))]
+        assert list(errors.keys()) == [str(cohort.join("c.txt"))]
+
+    def test_read_zip_archive(self, tmpdir):
+        cohort = self._make_cohort(tmpdir)
+        archive_path = str(tmpdir.join("cohort.zip"))
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for name in ["a.txt", "b.hrm", "c.txt", "d.atr"]:
+                archive.write(str(cohort.join(name)), name)
+
+        rris, errors = read_many(archive_path, reader_kwargs={".atr": {"fs": 360}})
+
+        assert list(rris.keys()) == ["a.txt", "b.hrm", "d.atr"]
+        assert list(errors.keys()) == ["c.txt"]
+        np.testing.assert_equal(rris["b.hrm"].values, FAKE_RRI)
+
+    def test_read_with_process_pool(self, tmpdir):
+        cohort = self._make_cohort(tmpdir)
+
+        rris, errors = read_many(str(cohort), use_processes=True, max_workers=2)
+
+        assert list(rris.keys()) == ["a.txt", "b.hrm", "d.atr", "sub/e.csv.gz"]
+        np.testing.assert_equal(rris["a.txt"].values, FAKE_RRI)
+
+    def test_read_with_executor(self, tmpdir):
+        cohort = self._make_cohort(tmpdir)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            rris, errors = read_many(str(cohort), executor=executor)
+
+        assert len(rris) == 4
+        assert len(errors) == 1
+
+    def test_list_supported_files(self, tmpdir):
+        cohort = self._make_cohort(tmpdir)
+
+        files = list(list_files(str(cohort)))
+
+        assert [name for name, _, _ in files] == [
+            "a.txt",
+            "b.hrm",
+            "c.txt",
+            "d.atr",
+            "sub/e.csv.gz",
+        ]
+        assert files[0] == ("a.txt", str(cohort.join("a.txt")), None)
+
+    def test_read_file_from_zip_archive(self, tmpdir):
+        cohort = self._make_cohort(tmpdir)
+        archive_path = str(tmpdir.join("cohort.zip"))
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            archive.write(str(cohort.join("d.atr")), "d.atr")
+
+        rri = read_file(archive_path, "d.atr", fs=360)
+
+        expected = read_from_wfdb(str(cohort.join("d.atr")))
+        np.testing.assert_equal(rri.values, expected.values)
+
+    def test_read_edf_from_zip_archive(self, tmpdir, edf_file):
+        archive_path = str(tmpdir.join("cohort.zip"))
+        with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(edf_file, "rri.edf")
+
+        rris, errors = read_many(archive_path, reader_kwargs={".edf": {"end": 4.5}})
+
+        assert errors == {}
+        np.testing.assert_almost_equal(rris["rri.edf"].values, [800, 800, 900, 1000])
+        np.testing.assert_almost_equal(
+            read_file(archive_path, "rri.edf").values, read_from_edf(edf_file).values
+        )
+
+    def test_read_file_with_unsupported_extension(self, tmpdir):
+        pathname = tmpdir.join("rri.dat")
+        pathname.write("800\n810\n")
+
+        with pytest.raises(FileNotSupportedError):
+            read_file(str(pathname))
+
+
+class TestWriteRRi:
+    def setup_method(self, method):
+        self.rri = RRi([800.5, 810, 815.25, 750], time=[1, 2, 3, 4])
+
+    def test_write_to_text(self, tmpdir):
+        pathname = str(tmpdir.join("rri.txt"))
+
+        write_to_text(self.rri, pathname)
+
+        with open(pathname) as fobj:
+            assert fobj.read() == "800.5\n810\n815.25\n750\n"
+        np.testing.assert_equal(read_from_text(pathname).values, self.rri.values)
+
+    def test_write_to_compressed_text(self, tmpdir):
+        pathname = str(tmpdir.join("rri.txt.gz"))
+
+        write_to_text(FAKE_RRI, pathname)
+
+        np.testing.assert_equal(read_from_text(pathname).values, FAKE_RRI)
+
+    def test_write_to_csv(self, tmpdir):
+        pathname = str(tmpdir.join("rri.csv"))
+
+        write_to_csv(self.rri, pathname)
+
+        rri = read_from_csv(pathname, time_col_index=1)
+        np.testing.assert_equal(rri.values, self.rri.values)
+        np.testing.assert_equal(rri.time, self.rri.time)
+
+    def test_write_to_csv_with_header_and_without_time(self, tmpdir):
+        pathname = str(tmpdir.join("rri.csv"))
+
+        write_to_csv(self.rri, pathname, time=False, sep=";", header=True)
+
+        with open(pathname) as fobj:
+            assert fobj.read() == "rri\n800.5\n810\n815.25\n750\n"
+
+    def test_write_to_hrm(self, tmpdir):
+        pathname = str(tmpdir.join("rri.hrm"))
+
+        write_to_hrm(FAKE_RRI, pathname)
+
+        with open(pathname) as fobj:
+            content = fobj.read()
+        assert "Interval=238" in content
+        assert content.endswith("[HRData]\n800\n810\n815\n750\n")
+        np.testing.assert_equal(read_from_hrm(pathname).values, FAKE_RRI)
+
+    def test_write_to_pathlib_path(self, tmpdir):
+        pathname = pathlib.Path(str(tmpdir.join("rri.hrm.gz")))
+
+        write_to_hrm(FAKE_RRI, pathname)
+
+        np.testing.assert_equal(read_from_hrm(str(pathname)).values, FAKE_RRI)
+
+
+class TestWriteResults:
+    def setup_method(self, method):
+        self.results = [
+            {"rmssd": 30.5, "sdnn": 52, "nn50": 2},
+            {"rmssd": 31, "sdnn": 53.25, "nn50": 3},
+        ]
+
+    def test_write_single_result(self):
+        buffer = io.StringIO()
+
+        write_results(self.results[0], buffer)
+
+        assert buffer.getvalue() == "rmssd,sdnn,nn50\n30.5,52,2\n"
+
+    def test_write_list_of_results(self):
+        buffer = io.StringIO()
+
+        write_results(self.results, buffer, sep=";")
+
+        assert buffer.getvalue() == "rmssd;sdnn;nn50\n30.5;52;2\n31;53.25;3\n"
+
+    def test_write_named_results(self, tmpdir):
+        pathname = str(tmpdir.join("results.csv.gz"))
+
+        write_results({"a.txt": self.results[0], "b.txt": self.results[1]}, pathname)
+
+        with gzip.open(pathname, "rt") as fobj:
+            assert fobj.read() == (
+                "name,rmssd,sdnn,nn50\na.txt,30.5,52,2\nb.txt,31,53.25,3\n"
+            )
+
+    def test_write_named_results_to_pathlib_path(self, tmpdir):
+        pathname = pathlib.Path(str(tmpdir.join("results.csv")))
+
+        write_results({"a.txt": self.results[0]}, pathname)
+
+        assert pathname.read_text() == "name,rmssd,sdnn,nn50\na.txt,30.5,52,2\n"
+
+    def test_write_time_varying_results(self):
+        segments = [
+            RRi([810, 800, 815], time=[1, 2, 3]),
+            RRi([810, 800, 815], time=[4, 5, 6]),
+        ]
+        tv = TimeVarying(None, self.results, segments, seg_size=10, overlap=5)
+        buffer = io.StringIO()
+
+        write_results(tv, buffer)
+
+        assert buffer.getvalue() == (
+            "time,rmssd,sdnn,nn50\n2,30.5,52,2\n5,31,53.25,3\n"
+        )
+
+
+class TestArrowAndParquet:
+    def setup_method(self, method):
+        pytest.importorskip("pyarrow")
+        self.rri = RRi([800.5, 810, 815.25, 750], time=[1, 2, 3, 4])
+
+    def test_rri_to_arrow_does_not_copy(self):
+        table = rri_to_arrow(self.rri)
+
+        assert table.column_names == ["rri", "time"]
+        assert table.schema.metadata[b"hrv.detrended"] == b"false"
+        rri_buffer = table.column("rri").chunk(0).buffers()[1]
+        assert rri_buffer.address == self.rri.values.ctypes.data
+
+    def test_rri_arrow_round_trip(self):
+        rri = rri_from_arrow(rri_to_arrow(self.rri))
+
+        assert isinstance(rri, RRi)
+        np.testing.assert_equal(rri.values, self.rri.values)
+        np.testing.assert_equal(rri.time, self.rri.time)
+
+    def test_rri_detrended_arrow_round_trip(self):
+        detrended = RRiDetrended([-10, 5, 20], time=[1, 2, 3], interpolated=True)
+
+        rri = rri_from_arrow(rri_to_arrow(detrended))
+
+        assert isinstance(rri, RRiDetrended)
+        assert rri.interpolated
+        np.testing.assert_equal(rri.values, detrended.values)
+
+    def test_results_to_arrow(self):
+        results = {
+            "a.txt": {"rmssd": 30.5, "sdnn": 52},
+            "b.txt": {"rmssd": 31, "sdnn": 53.25},
+        }
+
+        table = results_to_arrow(results)
+
+        assert table.column_names == ["name", "rmssd", "sdnn"]
+        assert table.column("name").to_pylist() == ["a.txt", "b.txt"]
+        assert table.column("sdnn").to_pylist() == [52, 53.25]
+
+    def test_parquet_round_trip(self, tmpdir):
+        pathname = str(tmpdir.join("rri.parquet"))
+
+        write_to_parquet(self.rri, pathname)
+        rri = read_from_parquet(pathname)
+
+        np.testing.assert_equal(rri.values, self.rri.values)
+        np.testing.assert_equal(rri.time, self.rri.time)
+
+    def test_write_results_to_parquet(self, tmpdir):
+        from pyarrow import parquet
+
+        pathname = str(tmpdir.join("results.parquet"))
+
+        write_to_parquet([{"rmssd": 30.5}, {"rmssd": 31}], pathname)
+
+        table = parquet.read_table(pathname)
+        assert table.column("rmssd").to_pylist() == [30.5, 31]
@@ -1,11 +1,22 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from unittest import mock
 
+import numpy as np
 import pytest
 import matplotlib
+from scipy.signal import lfilter
 
-from hrv.rri import RRi
-from hrv.sampledata import load_rest_rri
-from hrv.nonstationary import TimeVarying, time_varying
+from hrv.classical import _auc, frequency_domain, time_domain
+from hrv.rri import RRi, RRiDetrended
+from hrv.sampledata import load_exercise_rri, load_rest_rri
+from hrv.nonstationary import (
+    TimeFrequency,
+    TimeVarying,
+    time_varying,
+    time_varying_ar,
+    time_varying_wavelet,
+)
 
 
 class TestTimeVarying:
@@ -72,3 +83,239 @@ class TestTimeVarying:
         expected = [2.0, 5.0]
 
         assert xaxis == expected
+
+    def test_frequency_domain_segments(self):
+        rri = load_rest_rri()
+
+        tv_results = time_varying(
+            rri, seg_size=60, overlap=30, analysis=frequency_domain, nperseg=128
+        )
+        segments = rri.time_split(seg_size=60, overlap=30)
+
+        assert tv_results.results == [
+            frequency_domain(segment, nperseg=128) for segment in segments
+        ]
+        assert tv_results.ylabel_mapper("lf_hf") == "LF/HF"
+
+    def test_thread_pool_keeps_segments_order(self):
+        rri = load_rest_rri()
+        serial = time_varying(
+            rri, seg_size=60, overlap=30, analysis=frequency_domain, nperseg=128
+        )
+
+        threaded = time_varying(
+            rri,
+            seg_size=60,
+            overlap=30,
+            analysis=frequency_domain,
+            n_jobs=4,
+            nperseg=128,
+        )
+
+        assert threaded.results == serial.results
+        assert threaded.build_xaxis() == serial.build_xaxis()
+
+    def test_executor(self):
+        rri = load_rest_rri()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            tv_results = time_varying(rri, seg_size=30, overlap=0, executor=executor)
+
+        assert tv_results.results == [
+            time_domain(segment) for segment in rri.time_split(seg_size=30)
+        ]
+
+    def test_results_are_stored_as_array_and_segment_bounds(self):
+        rri = load_exercise_rri()
+        segments = rri.time_split(seg_size=60, overlap=30, keep_last=True)
+
+        tv_results = time_varying(rri, seg_size=60, overlap=30, keep_last=True)
+
+        assert tv_results.values.shape == (len(segments), 7)
+        assert tv_results.values.dtype == np.float64
+        assert tv_results.columns == list(time_domain(segments[0]).keys())
+        assert len(tv_results) == len(segments)
+        for segment, expected in zip(tv_results.rri_segments, segments):
+            np.testing.assert_array_equal(segment.values, expected.values)
+            np.testing.assert_array_equal(segment.time, expected.time)
+        assert tv_results.build_xaxis() == [
+            np.median(segment.time) for segment in segments
+        ]
+
+    def test_indices_keep_their_type(self):
+        tv_results = time_varying(load_exercise_rri(), seg_size=60, overlap=30)
+
+        assert tv_results.data["nn50"].dtype.kind == "i"
+        assert tv_results.data["rmssd"].dtype == np.float64
+        assert all(type(value) is int for value in tv_results.nn50)
+        assert type(tv_results.results[0]["nn50"]) is int
+        assert tv_results.rmssd is tv_results.rmssd
+
+    def test_segments_keep_the_flags_of_the_rri(self):
+        rri = load_rest_rri()
+        detrended = RRiDetrended(rri.values, rri.time, interpolated=True)
+
+        tv_results = time_varying(detrended, seg_size=60, overlap=30)
+
+        for segment in tv_results.rri_segments:
+            assert isinstance(segment, RRiDetrended)
+            assert segment.detrended
+            assert segment.interpolated
+
+    def test_pickle(self):
+        tv_results = time_varying(load_rest_rri(), seg_size=30, overlap=0)
+
+        unpickled = pickle.loads(pickle.dumps(tv_results))
+
+        assert unpickled.rmssd == tv_results.rmssd
+        assert unpickled.build_xaxis() == tv_results.build_xaxis()
+
+
+def _ar2_coefficients(peak_frequency, radius, fs=4.0):
+    theta = 2 * np.pi * peak_frequency / fs
+    return np.array([1, -2 * radius * np.cos(theta), radius ** 2])
+
+
+def _ar2_band_powers(coefficients, noise_variance, fs=4.0):
+    fxx = np.linspace(0, fs / 2, 20001)
+    lags = np.exp(-2j * np.pi * np.outer(fxx, np.arange(3)) / fs)
+    pxx = 2 * noise_variance / fs / np.abs(lags @ coefficients) ** 2
+    return _auc(fxx, pxx, (0, 0.04), (0.04, 0.15), (0.15, 0.4))
+
+
+def _interpolated_rri(values, fs=4.0):
+    return RRi._from_arrays(values, np.arange(len(values)) / fs, interpolated=True)
+
+
+def _lf_then_hf_rri(lf_model, hf_model):
+    # LF oscillations in the first 10 minutes and HF in the last 10
+    noise = np.random.RandomState(0).normal(0, 10, 4800)
+    return _interpolated_rri(
+        900
+        + np.concatenate(
+            [lfilter([1], lf_model, noise[:2400]), lfilter([1], hf_model, noise[2400:])]
+        )
+    )
+
+
+class TestTimeVaryingAR:
+    def setup_method(self, method):
+        self.lf_model = _ar2_coefficients(0.1, 0.95)
+        self.hf_model = _ar2_coefficients(0.25, 0.95)
+        self.rri = _lf_then_hf_rri(self.lf_model, self.hf_model)
+
+    def test_one_estimate_per_sample(self):
+        rri = load_exercise_rri()
+
+        results = time_varying_ar(rri)
+
+        assert isinstance(results, TimeFrequency)
+        assert list(results.results.keys()) == [
+            "total_power",
+            "vlf",
+            "lf",
+            "hf",
+            "lf_hf",
+            "lfnu",
+            "hfnu",
+        ]
+        assert len(results.lf) == len(results.time) == len(results)
+        np.testing.assert_allclose(np.diff(results.time), 0.25)
+        assert np.isfinite(results.lf_hf).all()
+
+    def test_band_powers_of_known_ar_processes(self):
+        results = time_varying_ar(self.rri, order=8)
+
+        for samples, model in [
+            (slice(800, 2000), self.lf_model),
+            (slice(3200, 4400), self.hf_model),
+        ]:
+            expected = _ar2_band_powers(model, noise_variance=100)
+            for index in ["lf", "hf"]:
+                np.testing.assert_allclose(
+                    np.median(results.results[index][samples]),
+                    expected[index],
+                    rtol=0.2,
+                )
+
+    def test_tracks_transition_between_bands(self):
+        results = time_varying_ar(self.rri)
+
+        assert (results.lf_hf[800:2000] > 1).all()
+        assert (results.lf_hf[3200:4400] < 1).all()
+
+    def test_short_series(self):
+        with pytest.raises(ValueError):
+            time_varying_ar(_interpolated_rri(np.full(10, 800.0)), order=16)
+
+    def test_index_property_and_plot(self):
+        results = time_varying_ar(self.rri)
+
+        with pytest.raises(ValueError):
+            results.dontexist
+        with mock.patch("hrv.nonstationary.plt.show"):
+            fig, ax = results.plot(index="lf_hf")
+
+        assert isinstance(fig, matplotlib.figure.Figure)
+        assert results.ylabel_mapper("lf_hf") == "LF/HF"
+        assert str(results) == "Time Frequency ar - #4800"
+
+
+class TestTimeVaryingWavelet:
+    def test_one_estimate_per_sample(self):
+        rri = load_exercise_rri()
+
+        results = time_varying_wavelet(rri)
+
+        assert isinstance(results, TimeFrequency)
+        assert len(results.hf) == len(results.time) == len(results)
+        assert np.isfinite(results.lf_hf).all()
+        assert str(results) == "Time Frequency wavelet - #{}".format(len(results))
+
+    def test_band_powers_of_white_noise(self):
+        rng = np.random.RandomState(0)
+        rri = _interpolated_rri(900 + rng.normal(0, 10, 4 * 3600))
+
+        results = time_varying_wavelet(rri)
+
+        # One-sided PSD of 2 * 100 / 4 ms²/Hz, away from the edges
+        for index, band in [("lf", (0.04, 0.15)), ("hf", (0.15, 0.4))]:
+            np.testing.assert_allclose(
+                np.mean(results.results[index][2000:-2000]),
+                50 * (band[1] - band[0]),
+                rtol=0.15,
+            )
+
+    def test_tracks_transition_between_bands(self):
+        rri = _lf_then_hf_rri(
+            _ar2_coefficients(0.1, 0.95), _ar2_coefficients(0.25, 0.95)
+        )
+
+        results = time_varying_wavelet(rri)
+
+        assert np.median(results.lf_hf[800:2000]) > 1
+        assert np.median(results.lf_hf[3200:4400]) < 1
+
+    def test_blocks_of_frequencies_give_the_same_results(self):
+        rri = load_rest_rri()
+        expected = time_varying_wavelet(rri)
+
+        with mock.patch("hrv.nonstationary._CHUNK_SIZE", 64):
+            results = time_varying_wavelet(rri)
+
+        for index, values in expected.results.items():
+            np.testing.assert_allclose(results.results[index], values)
+
+    def test_chunks_of_the_series_give_the_same_results(self):
+        rng = np.random.RandomState(0)
+        rri = _interpolated_rri(900 + rng.normal(0, 10, 4 * 3600))
+        with mock.patch("hrv.nonstationary._CHUNK_SIZE", 10 ** 6):
+            expected = time_varying_wavelet(rri)
+
+        # Chunks of 2 * 4630 samples, the margin of the longest wavelet
+        results = time_varying_wavelet(rri)
+
+        for index, values in expected.results.items():
+            np.testing.assert_allclose(
+                results.results[index], values, rtol=1e-5, atol=1e-6 * values.max()
+            )
@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from hrv.classical import frequency_domain, non_linear, time_domain
+from hrv.detrend import polynomial_detrend, smoothness_priors
+from hrv.filters import moving_median, quotient
+from hrv.pipeline import Pipeline, analyse_file, to_builtin
+from hrv.rri import RRi
+from hrv.sampledata import load_exercise_rri, load_noisy_rri, load_rest_rri
+from hrv.utils import _create_interp_time, _interpolate_rri
+
+
+def _assert_results_equal(results, expected):
+    assert list(results.keys()) == list(expected.keys())
+    for key, value in expected.items():
+        np.testing.assert_almost_equal(results[key], value)
+
+
+class TestPipeline:
+    def test_run_default_pipeline(self):
+        rri = load_rest_rri()
+
+        results = Pipeline().run(rri)
+
+        expected = dict(time_domain(rri))
+        expected.update(frequency_domain(rri))
+        expected.update(non_linear(rri))
+        _assert_results_equal(results, expected)
+
+    def test_run_filters_and_detrend(self):
+        rri = load_noisy_rri()
+        pipeline = Pipeline(
+            filters=["quotient", ("moving_median", {"order": 5})],
+            detrend="polynomial",
+            indices=["time", "frequency"],
+            method="ar",
+        )
+
+        results = pipeline.run(rri)
+
+        filtered = moving_median(quotient(rri), order=5)
+        expected = dict(time_domain(filtered))
+        expected.update(frequency_domain(polynomial_detrend(filtered), method="ar"))
+        _assert_results_equal(results, expected)
+
+    def test_run_resample_before_detrend(self):
+        rri = load_rest_rri()
+        pipeline = Pipeline(resample=5.0, indices=["frequency"])
+
+        results = pipeline.run(rri)
+
+        values = _interpolate_rri(rri.values, rri.time, 5.0, "cubic")
+        time = _create_interp_time(rri.time, 5.0)
+        expected = frequency_domain(values, time=time, fs=5.0, interp_method=None)
+        _assert_results_equal(results, expected)
+
+    def test_run_smoothness_priors_detrend(self):
+        rri = load_rest_rri()[:300]
+        pipeline = Pipeline(
+            detrend=("smoothness_priors", {"l": 100}), indices=["frequency"]
+        )
+
+        results = pipeline.run(rri)
+
+        expected = frequency_domain(smoothness_priors(rri, l=100))
+        _assert_results_equal(results, expected)
+
+    def test_preprocess(self):
+        rri = load_noisy_rri()
+
+        filtered = Pipeline(filters=["quotient"]).preprocess(rri)
+
+        assert isinstance(filtered, RRi)
+        np.testing.assert_equal(filtered.values, quotient(rri).values)
+        np.testing.assert_equal(filtered.time, quotient(rri).time)
+
+    def test_run_from_file(self):
+        results = Pipeline(indices=["non_linear"]).run("hrv/sampledata/rest_rri.txt")
+
+        _assert_results_equal(results, non_linear(load_rest_rri()))
+
+    def test_analyse_file_as_builtin_types(self):
+        pipeline = Pipeline(indices=["time", "non_linear"])
+        timings = {}
+
+        pathname = "hrv/sampledata/rest_rri.txt"
+
+        results = analyse_file(pipeline, pathname, timings=timings)
+
+        assert results == to_builtin(pipeline.run(load_rest_rri()))
+        assert not any(isinstance(value, np.generic) for value in results.values())
+        assert list(timings.keys()) == ["read", "time", "non_linear"]
+
+    def test_map_backends_have_identical_results(self):
+        rris = [load_rest_rri(), load_noisy_rri(), load_exercise_rri()]
+        pipeline = Pipeline(filters=["quotient"], detrend="savitzky_golay")
+
+        serial = pipeline.map(rris)
+        threads = pipeline.map(rris, backend="thread", n_jobs=2)
+        processes = pipeline.map(rris, backend="process", n_jobs=2)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor_results = pipeline.map(rris, executor=executor)
+
+        assert len(serial) == 3
+        assert serial == threads == processes == executor_results
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"filters": ["dontexist"]},
+            {"detrend": "dontexist"},
+            {"indices": ["dontexist"]},
+        ],
+    )
+    def test_invalid_steps(self, kwargs):
+        with pytest.raises(ValueError):
+            Pipeline(**kwargs)
+
+    def test_invalid_backend(self):
+        with pytest.raises(ValueError):
+            Pipeline().map([load_rest_rri()], backend="dontexist")
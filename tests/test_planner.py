@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+import hrv
+import hrv.planner
+from hrv.classical import frequency_domain, non_linear, time_domain
+from hrv.detrend import polynomial_detrend
+from hrv.planner import INDICES, compute
+from hrv.sampledata import load_exercise_rri, load_rest_rri
+
+
+def _count_calls(monkeypatch, name):
+    calls = []
+    func = getattr(hrv.planner, name)
+
+    def _counted(*args, **kwargs):
+        calls.append(name)
+        return func(*args, **kwargs)
+
+    monkeypatch.setattr(hrv.planner, name, _counted)
+    return calls
+
+
+class TestCompute:
+    def test_all_indices_are_equal_to_classical_functions(self):
+        rri = load_exercise_rri()
+
+        results = compute(rri)
+
+        expected = dict(time_domain(rri))
+        expected.update(frequency_domain(rri))
+        expected.update(non_linear(rri))
+        assert list(results.keys()) == list(INDICES)
+        for key, value in expected.items():
+            assert results[key] == value
+
+    def test_frequency_arguments(self):
+        rri = load_rest_rri()
+        kwargs = dict(fs=5.0, interp_method="linear", detrend="linear", nperseg=128)
+
+        results = compute(rri, indices=["frequency"], **kwargs)
+
+        assert results == frequency_domain(rri, **kwargs)
+
+    def test_detrended_rri(self):
+        rri = polynomial_detrend(load_rest_rri(), degree=1)
+
+        results = compute(rri, indices="frequency")
+
+        assert results == frequency_domain(rri)
+
+    def test_requested_indices_in_requested_order(self):
+        results = compute(load_rest_rri(), indices=["hf", "rmssd", "sd1", "hf"])
+
+        assert list(results.keys()) == ["hf", "rmssd", "sd1"]
+
+    def test_accepts_array_like(self):
+        rri = load_rest_rri()
+
+        results = compute(list(rri.values), indices=["time"])
+
+        assert results == time_domain(rri)
+
+    def test_time_indices_do_not_estimate_psd(self, monkeypatch):
+        psd_calls = _count_calls(monkeypatch, "_psd")
+
+        compute(load_rest_rri(), indices=["rmssd", "sd1", "pnn50"])
+
+        assert psd_calls == []
+
+    def test_intermediates_are_evaluated_once(self, monkeypatch):
+        psd_calls = _count_calls(monkeypatch, "_psd")
+        interp_calls = _count_calls(monkeypatch, "_interpolate_rri")
+
+        compute(load_rest_rri())
+
+        assert psd_calls == ["_psd"]
+        assert interp_calls == ["_interpolate_rri"]
+
+    def test_unknown_index(self):
+        with pytest.raises(ValueError) as e:
+            compute(load_rest_rri(), indices=["rmssd", "pnn20"])
+
+        assert e.value.args[0].startswith("`pnn20` not supported!")
+
+    def test_unknown_psd_method(self):
+        with pytest.raises(ValueError) as e:
+            compute(load_rest_rri(), indices=["rmssd"], method="bogus")
+
+        assert e.value.args[0] == "`bogus` not supported! Choose among: welch, ar"
+
+    def test_package_level_entry_point(self):
+        rri = load_rest_rri()
+
+        np.testing.assert_equal(
+            hrv.compute(rri, indices=["rmssd"])["rmssd"], time_domain(rri)["rmssd"]
+        )
@@ -1,4 +1,8 @@
+import multiprocessing
+import pickle
+import sys
 from collections import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
 from unittest import mock
 
 import matplotlib
@@ -7,8 +11,11 @@ import pytest
 from hrv.rri import (
     RRi,
     RRiDetrended,
+    SharedRRi,
+    _attach_block,
     _create_time_array,
     _prepare_table,
+    _tracker_id,
     _validate_rri,
     _validate_time,
 )
@@ -579,3 +586,130 @@ class TestSplitRRi(TestSegmentsMixin):
         ]
 
         self.assert_splitted_equal(splitted_rri, expected)
+
+    def test_time_split_keeps_flags(self):
+        rri = RRiDetrended([800, 810, 790, 795], time=[1, 5, 10, 20], interpolated=True)
+
+        splitted_rri = rri.time_split(seg_size=10, overlap=0)
+
+        assert all(isinstance(segment, RRiDetrended) for segment in splitted_rri)
+        assert all(segment.detrended for segment in splitted_rri)
+        assert all(segment.interpolated for segment in splitted_rri)
+
+    def test_beat_split_with_overlap(self):
+        rri = RRi([800, 810, 790, 795, 801, 805, 799], time=[1, 2, 3, 4, 5, 6, 7])
+
+        values, time = rri.beat_split(size=3, overlap=1)
+
+        np.testing.assert_array_equal(
+            values, [[800, 810, 790], [790, 795, 801], [801, 805, 799]]
+        )
+        np.testing.assert_array_equal(time, [[1, 2, 3], [3, 4, 5], [5, 6, 7]])
+
+    def test_beat_split_discards_incomplete_last_segment(self):
+        rri = RRi([800, 810, 790, 795, 801])
+
+        values, _ = rri.beat_split(size=2)
+
+        np.testing.assert_array_equal(values, [[800, 810], [790, 795]])
+
+    def test_beat_split_returns_read_only_views(self):
+        rri = RRi(FAKE_RRI)
+
+        values, time = rri.beat_split(size=2, overlap=1)
+
+        assert np.shares_memory(values, rri.values)
+        assert np.shares_memory(time, rri.time)
+        with pytest.raises(ValueError):
+            values[0, 0] = 1000
+
+    def test_beat_split_invalid_arguments(self):
+        rri = RRi(FAKE_RRI)
+
+        with pytest.raises(ValueError):
+            rri.beat_split(size=2, overlap=2)
+        with pytest.raises(ValueError):
+            rri.beat_split(size=len(FAKE_RRI) + 1)
+
+
+def _rri_values(rri):
+    return rri.values.tolist(), rri.time.tolist()
+
+
+def _shares_tracker(shared):
+    shared.to_rri()
+    return _tracker_id() == shared.tracker
+
+
+class TestRRiSerialization:
+    def test_pickle_keeps_values_time_and_flags(self):
+        rri = RRiDetrended([800, 810, 790], time=[1, 2, 3], interpolated=True)
+
+        unpickled = pickle.loads(pickle.dumps(rri))
+
+        assert isinstance(unpickled, RRiDetrended)
+        assert unpickled.detrended and unpickled.interpolated
+        np.testing.assert_array_equal(unpickled.values, rri.values)
+        np.testing.assert_array_equal(unpickled.time, rri.time)
+
+    def test_unpickle_does_not_validate_again(self):
+        rri = RRi(FAKE_RRI)
+        data = pickle.dumps(rri)
+
+        with mock.patch("hrv.rri._validate_rri") as _validate:
+            pickle.loads(data)
+
+        _validate.assert_not_called()
+
+    def test_shared_memory_round_trip(self):
+        rri = RRi(FAKE_RRI, time=np.arange(1, len(FAKE_RRI) + 1))
+
+        with rri.to_shared_memory() as shared:
+            shared_rri = RRi.from_shared_memory(shared)
+
+            assert isinstance(shared, SharedRRi)
+            assert shared.length == len(rri)
+            np.testing.assert_array_equal(shared_rri.values, rri.values)
+            np.testing.assert_array_equal(shared_rri.time, rri.time)
+            assert not shared_rri.values.flags.writeable
+            del shared_rri
+
+    def test_shared_rri_pickles_only_its_handle(self):
+        rri = RRi(np.random.uniform(600, 1000, 10000))
+
+        with rri.to_shared_memory() as shared:
+            shared_rri = shared.to_rri()
+            data = pickle.dumps(shared_rri)
+            unpickled = pickle.loads(data)
+
+            assert len(data) < 500
+            np.testing.assert_array_equal(unpickled.values, rri.values)
+            del shared_rri, unpickled
+
+    @pytest.mark.parametrize("start_method", [None, "spawn"])
+    def test_shared_rri_in_worker_processes(self, start_method):
+        rri = RRiDetrended(FAKE_RRI, time=np.arange(1, len(FAKE_RRI) + 1))
+        context = multiprocessing.get_context(start_method)
+
+        with rri.to_shared_memory() as shared:
+            with ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+                results = list(executor.map(_rri_values, [shared.to_rri()] * 2))
+                shares_tracker = list(executor.map(_shares_tracker, [shared] * 2))
+
+        assert results == [_rri_values(rri)] * 2
+        # Workers keep the registration of the creator in the shared tracker
+        assert shares_tracker == [True, True]
+
+    def test_attaching_with_another_tracker_unregisters_the_block(self):
+        rri = RRi(FAKE_RRI)
+
+        with rri.to_shared_memory() as shared:
+            shared.close()
+            tracker = "multiprocessing.resource_tracker.unregister"
+            with mock.patch(tracker) as unregister:
+                _attach_block(shared.name, shared.tracker)
+                shared.close()
+                _attach_block(shared.name, ("another", "tracker"))
+
+        if sys.version_info < (3, 13):
+            unregister.assert_called_once_with("/" + shared.name, "shared_memory")
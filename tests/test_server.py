@@ -0,0 +1,139 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pytest
+
+from hrv.pipeline import Pipeline
+from hrv.sampledata import load_exercise_rri, load_rest_rri
+from hrv.server import AnalysisServer
+
+
+def _get(url):
+    with urlopen(url, timeout=30) as response:
+        return response.status, json.loads(response.read())
+
+
+def _post(url, payload):
+    request = Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def _assert_results_equal(results, expected):
+    assert list(results.keys()) == list(expected.keys())
+    for key, value in expected.items():
+        np.testing.assert_allclose(results[key], value)
+
+
+@pytest.fixture
+def server():
+    pipeline = Pipeline(indices=["time", "non_linear"])
+    with AnalysisServer(port=0, pipeline=pipeline, backend="thread") as server:
+        yield server
+
+
+class TestAnalysisServer:
+    def test_analyse_rri(self, server):
+        rri = load_rest_rri()
+
+        status, results = _post(server.url + "/analyse", {"rri": rri.values.tolist()})
+
+        assert status == 200
+        _assert_results_equal(results, server.pipeline.run(rri))
+
+    def test_analyse_rri_with_time(self, server):
+        rri = load_exercise_rri()
+        payload = {"rri": rri.values.tolist(), "time": rri.time.tolist()}
+
+        status, results = _post(server.url + "/analyse", payload)
+
+        assert status == 200
+        _assert_results_equal(results, server.pipeline.run(rri))
+
+    def test_concurrent_requests_are_batched(self, server):
+        rris = [load_rest_rri(), load_exercise_rri()] * 20
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            responses = list(
+                executor.map(
+                    lambda rri: _post(
+                        server.url + "/analyse", {"rri": rri.values.tolist()}
+                    ),
+                    rris,
+                )
+            )
+
+        for rri, (status, results) in zip(rris, responses):
+            assert status == 200
+            _assert_results_equal(results, server.pipeline.run(rri))
+        stats = server.stats()
+        assert stats["requests"] == 40
+        assert stats["batches"] < 40
+        assert stats["mean_batch_size"] > 1
+
+    def test_invalid_payloads(self, server):
+        status, body = _post(server.url + "/analyse", {"values": [800, 810]})
+        assert status == 400
+        assert body["error"].startswith("invalid payload")
+
+        status, body = _post(server.url + "/analyse", {"rri": [800, -810, 820]})
+        assert status == 422
+        assert "positive" in body["error"]
+
+    def test_indices_not_calculated_are_null(self, server):
+        status, results = _post(server.url + "/analyse", {"rri": [800, 810, 805]})
+
+        assert status == 200
+        assert results["sd2"] is None
+        assert results["rmssd"] == pytest.approx(7.9056941504)
+
+    def test_shutdown_server_not_started(self):
+        server = AnalysisServer(port=0, backend="thread")
+        shutdown = threading.Thread(target=server.shutdown, daemon=True)
+
+        shutdown.start()
+        shutdown.join(timeout=10)
+
+        assert not shutdown.is_alive()
+
+    def test_stats_endpoint(self, server):
+        _post(server.url + "/analyse", {"rri": load_rest_rri().values.tolist()})
+        _post(server.url + "/analyse", {"rri": [800, -810, 820]})
+
+        status, stats = _get(server.url + "/stats")
+
+        assert status == 200
+        assert stats["requests"] == 2
+        assert stats["errors"] == 1
+        assert stats["batches"] == 2
+        assert 0 < stats["latency_p50"] <= stats["latency_max"]
+        assert stats["throughput"] > 0
+
+    def test_health_and_unknown_paths(self, server):
+        assert _get(server.url + "/health") == (200, {"status": "ok"})
+        with pytest.raises(HTTPError) as error:
+            _get(server.url + "/unknown")
+        assert error.value.code == 404
+
+    def test_process_pool(self):
+        rri = load_rest_rri()
+        pipeline = Pipeline(indices=["time", "frequency"])
+
+        with AnalysisServer(port=0, pipeline=pipeline, n_workers=2) as server:
+            status, results = _post(
+                server.url + "/analyse", {"rri": rri.values.tolist()}
+            )
+
+        assert status == 200
+        _assert_results_equal(results, pipeline.run(rri))
@@ -0,0 +1,338 @@
+from functools import reduce
+
+import numpy as np
+import pytest
+from scipy.signal import welch
+
+from hrv.classical import frequency_domain, non_linear, time_domain
+from hrv.filters import _quotient, _threshold_filter
+from hrv.sampledata import load_exercise_rri, load_noisy_rri, load_rest_rri
+from hrv.utils import _interpolate_rri
+from hrv.streaming import (
+    BandPowerTracker,
+    QuotientFilter,
+    RRiBuffer,
+    ThresholdFilter,
+    TimeDomainAccumulator,
+)
+
+
+def _assert_results_equal(results, expected):
+    assert list(results.keys()) == list(expected.keys())
+    for key, value in expected.items():
+        np.testing.assert_allclose(results[key], value, rtol=1e-10)
+
+
+class TestTimeDomainAccumulator:
+    def test_update_beat_by_beat(self):
+        rri = load_rest_rri()
+        accumulator = TimeDomainAccumulator()
+
+        for value in rri:
+            accumulator.update(value)
+
+        _assert_results_equal(accumulator.result(), time_domain(rri))
+        assert accumulator.count == len(rri)
+
+    def test_update_in_chunks(self):
+        rri = load_exercise_rri()
+        accumulator = TimeDomainAccumulator()
+
+        for chunk in np.array_split(rri.values, 13):
+            accumulator.update(chunk)
+
+        _assert_results_equal(accumulator.result(), time_domain(rri))
+
+    def test_update_with_rri_object(self):
+        rri = load_rest_rri()
+        accumulator = TimeDomainAccumulator()
+
+        accumulator.update(rri)
+
+        _assert_results_equal(accumulator.result(), time_domain(rri))
+
+    def test_merge_chunk_accumulators(self):
+        rri = load_exercise_rri()
+        accumulators = []
+        for chunk in np.array_split(rri.values, 7):
+            accumulator = TimeDomainAccumulator()
+            accumulator.update(chunk)
+            accumulators.append(accumulator)
+
+        merged = reduce(TimeDomainAccumulator.merge, accumulators)
+
+        _assert_results_equal(merged.result(), time_domain(rri))
+        # merge does not change the merged accumulators
+        _assert_results_equal(
+            accumulators[0].result(),
+            time_domain(np.array_split(rri.values, 7)[0]),
+        )
+
+    def test_merge_single_value_and_empty_accumulators(self):
+        rri = load_rest_rri()
+        single, rest = TimeDomainAccumulator(), TimeDomainAccumulator()
+        single.update(rri[0])
+        rest.update(rri.values[1:])
+
+        merged = TimeDomainAccumulator().merge(single).merge(TimeDomainAccumulator())
+        merged = merged.merge(rest)
+
+        _assert_results_equal(merged.result(), time_domain(rri))
+
+    def test_numerically_stable_for_large_offsets(self):
+        rng = np.random.RandomState(42)
+        rri = 1e9 + rng.normal(0, 10, 10000)
+        accumulator = TimeDomainAccumulator()
+
+        for chunk in np.array_split(rri, 100):
+            accumulator.update(chunk)
+
+        np.testing.assert_allclose(
+            accumulator.result()["sdnn"], np.std(rri, ddof=1), rtol=1e-6
+        )
+
+    def test_indices_not_available_yet_are_nan(self):
+        accumulator = TimeDomainAccumulator()
+        accumulator.update(800)
+
+        results = accumulator.result()
+
+        assert results["mrri"] == 800
+        assert np.isnan(results["rmssd"])
+        assert np.isnan(results["sdnn"])
+
+    def test_non_positive_values(self):
+        with pytest.raises(ValueError):
+            TimeDomainAccumulator().update([800, 0, 810])
+
+
+class TestRRiBuffer:
+    def _assert_window_results(self, buffer):
+        window = buffer.values
+        _assert_results_equal(buffer.time_domain(), time_domain(window))
+        _assert_results_equal(buffer.non_linear(), non_linear(window))
+
+    def test_indices_of_the_time_horizon(self):
+        rri = load_exercise_rri()
+        buffer = RRiBuffer(capacity=1000, horizon=60)
+
+        for position, value in enumerate(rri.values):
+            buffer.append(value)
+            if position > 10 and position % 37 == 0:
+                self._assert_window_results(buffer)
+
+        expected_window = rri.time[rri.time >= rri.time[-1] - 60]
+        np.testing.assert_allclose(buffer.time, expected_window)
+        self._assert_window_results(buffer)
+
+    def test_capacity_evicts_oldest_beats(self):
+        rri = load_rest_rri()
+        buffer = RRiBuffer(capacity=50, horizon=10000)
+
+        buffer.extend(rri.values[:123])
+
+        assert len(buffer) == 50
+        np.testing.assert_array_equal(buffer.values, rri.values[73:123])
+        self._assert_window_results(buffer)
+
+    def test_explicit_time(self):
+        rri = load_rest_rri()
+        buffer = RRiBuffer(capacity=1000, horizon=30)
+
+        buffer.extend(rri.values, rri.time)
+
+        window = buffer.to_rri()
+        assert window.time[0] >= rri.time[-1] - 30
+        np.testing.assert_array_equal(window.values, rri.values[-len(buffer):])
+
+    def test_default_time_is_cumulative_sum(self):
+        buffer = RRiBuffer(capacity=10)
+
+        buffer.extend([1000, 800, 1200])
+
+        np.testing.assert_allclose(buffer.time, [0, 0.8, 2.0])
+
+    def test_running_sums_do_not_drift(self):
+        rng = np.random.RandomState(1)
+        buffer = RRiBuffer(capacity=64, horizon=1e9)
+
+        buffer.extend(rng.uniform(400, 1600, 100000))
+
+        self._assert_window_results(buffer)
+
+    def test_not_enough_beats(self):
+        buffer = RRiBuffer(capacity=10)
+        buffer.append(800)
+
+        assert buffer.time_domain()["mrri"] == 800
+        assert np.isnan(buffer.time_domain()["rmssd"])
+        assert np.isnan(buffer.non_linear()["sd1"])
+
+    def test_invalid_beats(self):
+        buffer = RRiBuffer(capacity=10)
+        buffer.append(800, time=1)
+
+        with pytest.raises(ValueError):
+            buffer.append(-800)
+        with pytest.raises(ValueError):
+            buffer.append(800, time=1)
+
+
+def _concatenate(outputs):
+    return (
+        np.concatenate([values for values, _ in outputs]),
+        np.concatenate([time for _, time in outputs]),
+    )
+
+
+class TestQuotientFilter:
+    def test_beat_by_beat_equals_offline_filter(self):
+        rri = load_noisy_rri()
+        quotient_filter = QuotientFilter()
+
+        outputs = [quotient_filter.update(value) for value in rri.values]
+        outputs.append(quotient_filter.flush())
+
+        expected = _quotient(rri.values, rri.time)
+        values, time = _concatenate(outputs)
+        np.testing.assert_array_equal(values, expected[0])
+        np.testing.assert_allclose(time, expected[1])
+
+    def test_chunks_with_time(self):
+        rri = load_noisy_rri()
+        quotient_filter = QuotientFilter()
+
+        outputs = [
+            quotient_filter.update(values, time)
+            for values, time in zip(
+                np.array_split(rri.values, 9), np.array_split(rri.time, 9)
+            )
+        ]
+        outputs.append(quotient_filter.flush())
+
+        expected = _quotient(rri.values, rri.time)
+        values, time = _concatenate(outputs)
+        np.testing.assert_array_equal(values, expected[0])
+        np.testing.assert_array_equal(time, expected[1])
+
+    def test_latency_of_two_beats(self):
+        quotient_filter = QuotientFilter()
+
+        assert len(quotient_filter.update([800, 810])[0]) == 0
+        np.testing.assert_array_equal(quotient_filter.update(820)[0], [800])
+        np.testing.assert_array_equal(quotient_filter.update([1500, 830])[0], [810])
+        # 820 and 1500 are removed as their ratio is bigger than 1.2, the last
+        # two beats are kept
+        np.testing.assert_array_equal(quotient_filter.flush()[0], [1500, 830])
+
+
+class TestThresholdFilter:
+    def test_detects_the_same_beats_as_offline_filter(self):
+        rri = load_noisy_rri()
+        threshold_filter = ThresholdFilter(threshold="strong")
+
+        outputs = [
+            threshold_filter.update(chunk) for chunk in np.array_split(rri.values, 50)
+        ]
+        outputs.append(threshold_filter.flush())
+
+        offline, _ = _threshold_filter(rri.values, rri.time, threshold="strong")
+        values, time = _concatenate(outputs)
+        replaced = values != rri.values
+        assert replaced.any()
+        np.testing.assert_array_equal(replaced, ~np.isclose(offline, rri.values))
+        np.testing.assert_allclose(time, rri.time)
+
+    def test_ectopic_beat_replaced_by_local_median(self):
+        threshold_filter = ThresholdFilter(threshold=100, local_median_size=3)
+
+        warm_up = threshold_filter.update([800, 810, 820, 830])
+        values, time = threshold_filter.update([1200, 840])
+
+        np.testing.assert_array_equal(warm_up[0], [800, 810, 820, 830])
+        np.testing.assert_array_equal(values, [820, 840])
+        np.testing.assert_allclose(time, [3.66, 4.5])
+
+    def test_latency_is_local_median_size(self):
+        threshold_filter = ThresholdFilter(local_median_size=3)
+
+        for value in [800, 810, 820]:
+            assert len(threshold_filter.update(value)[0]) == 0
+        assert len(threshold_filter.update(830)[0]) == 4
+        assert len(threshold_filter.update(840)[0]) == 1
+        assert threshold_filter.latency == 3
+
+    def test_short_stream_is_flushed_unfiltered(self):
+        threshold_filter = ThresholdFilter(local_median_size=5)
+        threshold_filter.update([800, 2000])
+
+        values, _ = threshold_filter.flush()
+
+        np.testing.assert_array_equal(values, [800, 2000])
+
+
+class TestBandPowerTracker:
+    def _samples(self):
+        rri = load_exercise_rri()
+        return _interpolate_rri(rri.values, rri.time, 4.0)
+
+    def test_band_powers_equal_welch_of_the_window(self):
+        samples = self._samples()[:1500]
+        tracker = BandPowerTracker(fs=4.0, nperseg=256)
+
+        traces = tracker.extend(samples)
+
+        for end in [256, 300, 511, 512, 1024, 1500]:
+            expected = frequency_domain(
+                samples[end - 256 : end], fs=4.0, interp_method=None, nperseg=256
+            )
+            for key in ["total_power", "vlf", "lf", "hf", "lf_hf"]:
+                np.testing.assert_allclose(traces[key][end - 1], expected[key])
+
+    def test_custom_bands_and_window(self):
+        samples = self._samples()[:400]
+        bands = {"vlf_band": (0, 0.05), "lf_band": (0.05, 0.2), "hf_band": (0.2, 0.5)}
+        tracker = BandPowerTracker(fs=4.0, nperseg=128, **bands)
+
+        for sample in samples:
+            results = tracker.update(sample)
+
+        expected = frequency_domain(
+            samples[-128:], fs=4.0, interp_method=None, nperseg=128, **bands
+        )
+        _assert_results_equal(results, expected)
+
+    @pytest.mark.parametrize("nperseg", [128, 127])
+    @pytest.mark.parametrize("hf_band", [(0.15, 2.0), (0.4, 2.5)])
+    def test_bands_reaching_the_nyquist_frequency(self, nperseg, hf_band):
+        samples = self._samples()[:400]
+        tracker = BandPowerTracker(fs=4.0, nperseg=nperseg, hf_band=hf_band)
+
+        tracker.extend(samples)
+
+        fxx, pxx = welch(samples[-nperseg:], fs=4.0, nperseg=nperseg)
+        indexes = np.logical_and(fxx >= hf_band[0], fxx < hf_band[1])
+        np.testing.assert_allclose(
+            tracker.band_powers()["hf"], np.trapz(pxx[indexes], fxx[indexes])
+        )
+
+    def test_recursion_does_not_drift(self):
+        rng = np.random.RandomState(3)
+        samples = 1000 + rng.normal(0, 50, 20000)
+        tracker = BandPowerTracker(fs=4.0, nperseg=256)
+
+        # Stop between two recalculations of the bins
+        tracker.extend(samples[:-100])
+
+        expected = frequency_domain(
+            samples[-356:-100], fs=4.0, interp_method=None, nperseg=256
+        )
+        _assert_results_equal(tracker.band_powers(), expected)
+
+    def test_band_powers_are_nan_before_a_full_window(self):
+        tracker = BandPowerTracker(nperseg=16)
+
+        traces = tracker.extend(np.full(16, 800.0))
+
+        assert np.isnan(traces["lf"][:15]).all()
+        assert traces["lf"][15] == 0